@@ -32,6 +32,13 @@ logger = logging.getLogger(__name__)
 # Instância global do gerenciador de auth
 auth_manager = MicrosoftAuth()
 
+# Módulo alertas usa o mesmo auth (sem MicrosoftAuth() por fatura)
+try:
+    from processor.alertas.auth_compartilhado import configurar_auth_alertas
+    configurar_auth_alertas(auth_manager)
+except ImportError:
+    pass  # Alertas opcionais
+
 # ✅ VARIÁVEIS ORIGINAIS (que funcionavam)
 MICROSOFT_CLIENT_ID = os.getenv('MICROSOFT_CLIENT_ID')
 PASTA_BRK_ID = os.getenv('PASTA_BRK_ID')
@@ -600,6 +607,98 @@ def estatisticas_database():
         logger.error(f"Erro estatísticas: {e}")
         return jsonify({"erro": str(e)}), 500
 
+@app.route('/relatorio-consumo', methods=['GET'])
+def relatorio_consumo():
+    """Classificação histórica de consumo por casa (?casa=...&cdc=...)"""
+    try:
+        if not auth_manager.access_token:
+            return jsonify({"erro": "Token não disponível"}), 401
+        
+        processor = EmailProcessor(auth_manager)
+        if not getattr(processor, 'database_brk', None):
+            return jsonify({"status": "aviso", "mensagem": "DatabaseBRK não disponível"})
+        
+        from processor.analise_consumo import analisar_historico_consumo
+        with processor.database_brk.lock_conexao:
+            resultado = analisar_historico_consumo(
+                processor.database_brk.conn,
+                casa=request.args.get('casa'),
+                cdc=request.args.get('cdc')
+            )
+        
+        return jsonify(resultado), (200 if resultado.get('status') == 'sucesso' else 500)
+        
+    except Exception as e:
+        logger.error(f"Erro relatório consumo: {e}")
+        return jsonify({"erro": str(e)}), 500
+
+@app.route('/api/faltantes', methods=['GET'])
+def api_faltantes():
+    """Casas sem fatura no mês (?mes=&ano=, padrão mês atual) via anti-join no DatabaseBRK"""
+    try:
+        if not auth_manager.access_token:
+            return jsonify({"erro": "Token não disponível"}), 401
+        
+        processor = EmailProcessor(auth_manager)
+        if not getattr(processor, 'database_brk', None):
+            return jsonify({"status": "aviso", "mensagem": "DatabaseBRK não disponível"})
+        
+        hoje = datetime.now()
+        mes = int(request.args.get('mes', hoje.month))
+        ano = int(request.args.get('ano', hoje.year))
+        if not 1 <= mes <= 12:
+            return jsonify({"status": "erro", "mensagem": "Mês inválido"}), 400
+        
+        from processor.excel_brk import ExcelGeneratorBRK
+        excel_generator = ExcelGeneratorBRK()
+        excel_generator.auth = auth_manager
+        sincronizacao = excel_generator.sincronizar_relacionamento(processor.database_brk)
+        if sincronizacao['status'] != 'sucesso' and not sincronizacao['qtd_casas']:
+            return jsonify({"status": "erro", "mensagem": sincronizacao['mensagem']}), 503
+        
+        faltantes = processor.database_brk.casas_faltantes(mes, ano)
+        
+        return jsonify({
+            "status": "sucesso",
+            "mes": mes,
+            "ano": ano,
+            "total": len(faltantes),
+            "casas_relacionamento": sincronizacao['qtd_casas'],
+            "relacionamento": sincronizacao,
+            "faltantes": faltantes,
+            "timestamp": datetime.now().isoformat()
+        })
+        
+    except ValueError:
+        return jsonify({"status": "erro", "mensagem": "mes/ano devem ser números"}), 400
+    except Exception as e:
+        logger.error(f"Erro faltantes: {e}")
+        return jsonify({"erro": str(e)}), 500
+
+@app.route('/export/faturas.csv', methods=['GET'])
+@app.route('/export/faturas.ndjson', methods=['GET'])
+def exportar_faturas():
+    """Exportação em fluxo de faturas_brk (?ano=&mes=&status=), sem content_bytes"""
+    try:
+        if not auth_manager.access_token:
+            return jsonify({"erro": "Token não disponível"}), 401
+        
+        processor = EmailProcessor(auth_manager)
+        if not getattr(processor, 'database_brk', None):
+            return jsonify({"status": "aviso", "mensagem": "DatabaseBRK não disponível"})
+        
+        from processor.exportacao import resposta_exportacao
+        formato = request.path.rsplit('.', 1)[-1]
+        aceita_gzip = 'gzip' in request.headers.get('Accept-Encoding', '').lower()
+        
+        return resposta_exportacao(processor.database_brk, formato, request.args, aceita_gzip)
+        
+    except ValueError as e:
+        return jsonify({"status": "erro", "mensagem": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Erro exportação faturas: {e}")
+        return jsonify({"erro": str(e)}), 500
+
 @app.route('/test-onedrive', methods=['GET'])
 def test_onedrive():
     """Teste OneDrive que funcionava (retorna JSON como antes)"""
@@ -731,6 +830,61 @@ def gerar_planilha_brk():
     from processor.excel_brk import ExcelGeneratorBRK
     return ExcelGeneratorBRK().handle_request()
 
+# REPROCESSAMENTO HISTÓRICO (patterns corrigidos sobre content_bytes)
+_processor_reprocessamento = None
+
+def _processor_compartilhado():
+    """
+    EmailProcessor cujo DatabaseBRK é o do monitor (mesma conexão e lock_conexao).
+    Sem monitor ativo: um único processor criado sob demanda e reutilizado -
+    nunca uma cópia descartável do database por requisição.
+    """
+    global _processor_reprocessamento
+    from processor.monitor_brk import MonitorBRK
+    
+    monitor = MonitorBRK._monitor_instance
+    if monitor is not None and getattr(getattr(monitor, 'processor', None), 'database_brk', None):
+        return monitor.processor
+    
+    if _processor_reprocessamento is None:
+        _processor_reprocessamento = EmailProcessor(auth_manager)
+    return _processor_reprocessamento
+
+@app.route('/reprocessar-faturas', methods=['POST'])
+def reprocessar_faturas():
+    """Dispara reprocessamento em background - padrão simulação (aplicar=false)"""
+    try:
+        if not auth_manager.access_token:
+            return jsonify({"erro": "Token não disponível"}), 401
+        
+        from processor.reprocessamento import iniciar_reprocessamento_background
+        
+        dados = request.get_json(silent=True) or request.form or {}
+        opcoes = {
+            "aplicar": str(dados.get('aplicar', 'false')).lower() in ('true', '1', 'sim'),
+            "tamanho_lote": int(dados.get('tamanho_lote', 50)),
+            "workers": int(dados['workers']) if dados.get('workers') else None,
+            "retomar": str(dados.get('retomar', 'true')).lower() in ('true', '1', 'sim'),
+            "job_id": dados.get('job_id', 'padrao')
+        }
+        
+        resultado = iniciar_reprocessamento_background(_processor_compartilhado(), **opcoes)
+        
+        return jsonify(resultado), (202 if resultado.get('status') == 'sucesso' else 409)
+        
+    except Exception as e:
+        logger.error(f"Erro reprocessamento: {e}")
+        return jsonify({"erro": str(e)}), 500
+
+@app.route('/reprocessar-faturas/status', methods=['GET'])
+def reprocessar_faturas_status():
+    """Progresso do reprocessamento (processadas, alteradas, faturas/s)"""
+    from processor.reprocessamento import obter_progresso_reprocessamento
+    return jsonify({
+        "progresso": obter_progresso_reprocessamento(),
+        "timestamp": datetime.now().isoformat()
+    })
+
 # @app.route('/status-scheduler-brk')
 # def status_scheduler_brk():
 #    """Status scheduler"""
@@ -813,7 +967,10 @@ def not_found(error):
             "/", "/login", "/logout", "/status",
             "/diagnostico-pasta", "/processar-emails-novos", 
             "/processar-emails-form", "/test-onedrive", 
-            "/estatisticas-database", "/health", "/dbedit"
+            "/estatisticas-database", "/health", "/dbedit",
+            "/reprocessar-faturas", "/reprocessar-faturas/status",
+            "/export/faturas.csv", "/export/faturas.ndjson",
+            "/relatorio-consumo", "/api/faltantes"
         ]
         
     }), 404
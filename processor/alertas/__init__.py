@@ -11,8 +11,13 @@
 🎯 MÓDULOS DISPONÍVEIS:
 - alert_processor: Orquestração principal dos alertas (COM ANEXOS)
 - ccb_database: Acesso à base CCB via OneDrive
+- auth_compartilhado: Token Microsoft único injetado pelo app.py
+- responsaveis_cache: Diretório de responsáveis em memória (eTag + TTL)
+- alert_outbox: Despacho assíncrono dos alertas gravados em alertas_outbox
+- alert_digest: Alertas do ciclo agrupados por responsável (modo digest)
 - message_formatter: Formatação de mensagens Telegram
 - telegram_sender: Envio via API Telegram (COM ANEXOS)
+- telegram_stub_server: Bot API local para testes/benchmark de despacho
 
 📋 EXEMPLO DE USO:
 from processor.alertas.alert_processor import processar_alerta_fatura
@@ -37,25 +42,48 @@ __description__ = "Integração alertas BRK + CCB via Telegram COM ANEXOS PDF"
 
 # Imports principais para facilitar uso
 try:
-    from .alert_processor import processar_alerta_fatura
+    from .alert_processor import (
+        processar_alerta_fatura,
+        preparar_alerta_fatura,
+        enviar_alerta_responsavel,
+        obter_estatisticas_pdf_onedrive
+    )
+    from .alert_outbox import obter_despachante, iniciar_despachante_alertas, descarregar_alertas_ciclo
+    from .alert_digest import enviar_digests, modo_digest_ativo
     from .telegram_sender import (
         enviar_telegram, 
         enviar_telegram_com_anexo,  # 🆕 NOVA FUNÇÃO
         testar_telegram_bot,
-        testar_telegram_com_anexo   # 🆕 NOVA FUNÇÃO
+        testar_telegram_com_anexo,  # 🆕 NOVA FUNÇÃO
+        obter_estatisticas_file_id
     )
-    from .message_formatter import formatar_mensagem_alerta
+    from .message_formatter import formatar_mensagem_alerta, formatar_mensagem_digest
     from .ccb_database import obter_responsaveis_por_codigo
+    from .responsaveis_cache import obter_cache_responsaveis
+    from .auth_compartilhado import configurar_auth_alertas, obter_estatisticas_auth_alertas
     
     # Lista de funções públicas
     __all__ = [
         'processar_alerta_fatura',
+        'preparar_alerta_fatura',
+        'enviar_alerta_responsavel',
+        'obter_estatisticas_pdf_onedrive',
+        'obter_despachante',
+        'iniciar_despachante_alertas',
+        'descarregar_alertas_ciclo',
+        'enviar_digests',
+        'modo_digest_ativo',
         'enviar_telegram', 
         'enviar_telegram_com_anexo',        # 🆕 NOVA FUNÇÃO
         'testar_telegram_bot',
         'testar_telegram_com_anexo',        # 🆕 NOVA FUNÇÃO
+        'obter_estatisticas_file_id',
         'formatar_mensagem_alerta',
-        'obter_responsaveis_por_codigo'
+        'formatar_mensagem_digest',
+        'obter_responsaveis_por_codigo',
+        'obter_cache_responsaveis',
+        'configurar_auth_alertas',
+        'obter_estatisticas_auth_alertas'
     ]
     
     # Status das funcionalidades
@@ -65,6 +93,9 @@ try:
         'fallback_automatico': True,
         'rate_limiting': True,
         'consulta_ccb': True,
+        'cache_responsaveis': True,
+        'outbox_assincrono': True,
+        'digest_por_responsavel': True,
         'formatacao_avancada': True
     }
     
@@ -78,6 +109,9 @@ except ImportError as e:
         'fallback_automatico': False,
         'rate_limiting': False,
         'consulta_ccb': False,
+        'cache_responsaveis': False,
+        'outbox_assincrono': False,
+        'digest_por_responsavel': False,
         'formatacao_avancada': False
     }
 
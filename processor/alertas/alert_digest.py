@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📋 ALERT DIGEST - Alertas agrupados por responsável
+📧 FUNÇÃO: No modo digest (ALERTAS_MODO_DIGEST=true) os alertas não críticos
+          do outbox ficam AGUARDANDO_DIGEST e, no fim do ciclo do monitor,
+          cada user_id recebe UMA mensagem com todas as suas casas + os PDFs
+          em media group (até 10 por grupo)
+👨‍💼 RESPONSÁVEL: Sidney Gubitoso - Auxiliar Tesouraria Administrativa Mauá
+📁 SALVAR EM: processor/alertas/alert_digest.py
+
+⚠️ REGRAS:
+- Crítico/Emergência continuam saindo na hora (mensagem completa)
+- ALERTAS_DIGEST_ESPERA_MAXIMA_MINUTOS (60): o despachante envia sozinho os
+  digests mais antigos que isso (ex.: processamento manual sem monitor)
+- Entregas são reservadas (ENVIANDO_DIGEST) antes do envio: monitor e
+  despachante nunca mandam o mesmo digest duas vezes; reserva órfã
+  (processo reiniciado no meio) volta para AGUARDANDO_DIGEST na inicialização
+"""
+
+import os
+import json
+
+STATUS_AGUARDANDO_DIGEST = 'AGUARDANDO_DIGEST'
+STATUS_ENVIANDO_DIGEST = 'ENVIANDO_DIGEST'
+
+
+def modo_digest_ativo():
+    """Modo digest ligado (ALERTAS_MODO_DIGEST, padrão false)."""
+    return os.getenv("ALERTAS_MODO_DIGEST", "false").lower() in ("1", "true", "sim")
+
+
+def registrar_para_digest(database, outbox_id, responsaveis):
+    """Marca a entrega de cada responsável como AGUARDANDO_DIGEST."""
+    with database.lock_conexao:
+        database.conn.executemany("""
+            INSERT INTO alertas_entregas (outbox_id, user_id, nome, status, tentativas)
+            VALUES (?, ?, ?, ?, 0)
+            ON CONFLICT(outbox_id, user_id) DO UPDATE SET
+                status = excluded.status,
+                atualizado_em = CURRENT_TIMESTAMP
+        """, [
+            (outbox_id, str(r['user_id']), r.get('nome'), STATUS_AGUARDANDO_DIGEST)
+            for r in responsaveis
+        ])
+        database.conn.commit()
+
+    print(f"📋 Alerta {outbox_id} aguardando digest ({len(responsaveis)} responsável(is))")
+
+
+def enviar_digests(database, somente_vencidos=False):
+    """
+    Envia os digests pendentes: uma mensagem (+ media group) por user_id.
+
+    Args:
+        database: DatabaseBRK com o outbox
+        somente_vencidos: só usuários com alerta esperando além da espera máxima
+
+    Returns:
+        dict: {'usuarios', 'faturas', 'enviados', 'falhas'}
+    """
+    resultado = {'usuarios': 0, 'faturas': 0, 'enviados': 0, 'falhas': 0}
+
+    espera_maxima = int(os.getenv("ALERTAS_DIGEST_ESPERA_MAXIMA_MINUTOS", "60"))
+    max_tentativas = int(os.getenv("ALERTAS_OUTBOX_MAX_TENTATIVAS", "5"))
+
+    linhas = _reservar_entregas_digest(database, espera_maxima, somente_vencidos)
+
+    por_usuario = {}
+    for user_id, nome, outbox_id, fatura_id, dados_json in linhas:
+        grupo = por_usuario.setdefault(user_id, {'nome': nome, 'itens': []})
+        grupo['itens'].append({'outbox_id': outbox_id, 'fatura_id': fatura_id, 'dados_json': dados_json})
+
+    if not por_usuario:
+        return resultado
+
+    print(f"\n📋 ENVIANDO DIGESTS: {len(por_usuario)} responsável(is)")
+
+    pdfs_por_outbox = {}
+    outbox_afetados = set()
+
+    for user_id, grupo in por_usuario.items():
+        itens = grupo['itens']
+        for item in itens:
+            item['dados_fatura'] = json.loads(item['dados_json'])
+            outbox_afetados.add(item['outbox_id'])
+
+        sucesso = _enviar_digest_usuario(database, user_id, grupo['nome'], itens, pdfs_por_outbox)
+        _atualizar_entregas_digest(database, user_id, itens, sucesso, max_tentativas)
+
+        resultado['usuarios'] += 1
+        resultado['faturas'] += len(itens)
+        resultado['enviados' if sucesso else 'falhas'] += 1
+
+    _finalizar_outbox_digest(database, outbox_afetados)
+
+    print(f"📋 Digests: {resultado['enviados']} enviado(s), {resultado['falhas']} falha(s), "
+          f"{resultado['faturas']} fatura(s) agrupada(s)")
+    return resultado
+
+
+def _reservar_entregas_digest(database, espera_maxima, somente_vencidos):
+    """
+    Reserva (AGUARDANDO_DIGEST → ENVIANDO_DIGEST) as entregas a enviar no
+    mesmo UPDATE que as seleciona: quem chegar depois (monitor x despachante)
+    não encontra mais essas entregas.
+
+    Returns:
+        list: (user_id, nome, outbox_id, fatura_id, dados_json) só das reservadas
+    """
+    filtro_vencidos = ""
+    parametros = [STATUS_ENVIANDO_DIGEST, STATUS_AGUARDANDO_DIGEST]
+    if somente_vencidos:
+        # Usuário com algum alerta além da espera máxima leva o digest inteiro
+        filtro_vencidos = """
+            AND user_id IN (
+                SELECT e.user_id FROM alertas_entregas e
+                JOIN alertas_outbox o ON o.id = e.outbox_id
+                WHERE e.status = ? AND o.criado_em <= datetime('now', ?)
+            )"""
+        parametros += [STATUS_AGUARDANDO_DIGEST, f"-{espera_maxima} minutes"]
+
+    with database.lock_conexao:
+        reservadas = database.conn.execute(f"""
+            UPDATE alertas_entregas
+            SET status = ?, atualizado_em = CURRENT_TIMESTAMP
+            WHERE status = ?{filtro_vencidos}
+            RETURNING outbox_id, user_id, nome
+        """, parametros).fetchall()
+        database.conn.commit()
+
+        if not reservadas:
+            return []
+
+        outbox_ids = sorted({outbox_id for outbox_id, _, _ in reservadas})
+        marcadores = ", ".join("?" for _ in outbox_ids)
+        dados_outbox = {
+            linha[0]: linha[1:] for linha in database.conn.execute(
+                f"SELECT id, fatura_id, dados_json FROM alertas_outbox WHERE id IN ({marcadores})",
+                outbox_ids
+            )
+        }
+
+    return [
+        (user_id, nome, outbox_id, *dados_outbox[outbox_id])
+        for outbox_id, user_id, nome in sorted(reservadas, key=lambda r: (r[1], r[0]))
+        if outbox_id in dados_outbox
+    ]
+
+
+def _enviar_digest_usuario(database, user_id, nome, itens, pdfs_por_outbox):
+    """Mensagem única (ou alerta normal se só houver uma fatura) + PDFs."""
+    from .alert_processor import obter_pdf_alerta, enviar_alerta_responsavel, _gerar_nome_arquivo_pdf
+    from .message_formatter import formatar_mensagem_alerta, formatar_mensagem_digest
+    from .telegram_sender import enviar_telegram, enviar_telegram_grupo_documentos
+
+    documentos = []
+    for item in itens:
+        outbox_id = item['outbox_id']
+        if outbox_id not in pdfs_por_outbox:
+            dados_fatura = dict(item['dados_fatura'])
+            dados_fatura.update(database.obter_pdf_fatura(item['fatura_id']))
+            pdfs_por_outbox[outbox_id] = obter_pdf_alerta(dados_fatura)[0]
+
+        if pdfs_por_outbox[outbox_id]:
+            documentos.append({
+                'pdf_bytes': pdfs_por_outbox[outbox_id],
+                'nome_arquivo': _gerar_nome_arquivo_pdf(item['dados_fatura']),
+                'chave_arquivo': item['dados_fatura'].get('hash_arquivo') or None
+            })
+
+    responsavel = {'user_id': user_id, 'nome': nome or 'Responsável'}
+
+    # Uma fatura só: mesma mensagem do envio imediato
+    if len(itens) == 1:
+        dados_fatura = itens[0]['dados_fatura']
+        alerta = {
+            'mensagem': formatar_mensagem_alerta(dados_fatura),
+            'pdf_bytes': documentos[0]['pdf_bytes'] if documentos else None,
+            'nome_arquivo': _gerar_nome_arquivo_pdf(dados_fatura),
+            'chave_arquivo': dados_fatura.get('hash_arquivo') or None
+        }
+        return enviar_alerta_responsavel(alerta, responsavel)
+
+    print(f"📱 Digest para: {responsavel['nome']} - ID: {user_id} ({len(itens)} faturas)")
+
+    partes = formatar_mensagem_digest([item['dados_fatura'] for item in itens])
+    if not partes:
+        return False
+
+    for parte in partes:
+        if not enviar_telegram(user_id, parte):
+            return False
+
+    # Texto já entregue: falha nos PDFs não reenvia o resumo
+    if documentos and not enviar_telegram_grupo_documentos(user_id, documentos):
+        print(f"⚠️ Digest {user_id}: mensagem enviada, mas PDFs falharam")
+
+    return True
+
+
+def _atualizar_entregas_digest(database, user_id, itens, sucesso, max_tentativas):
+    """ENVIADO; ou volta a AGUARDANDO_DIGEST para o próximo digest até esgotar (ERRO)."""
+    with database.lock_conexao:
+        for item in itens:
+            if sucesso:
+                database.conn.execute("""
+                    UPDATE alertas_entregas
+                    SET status = 'ENVIADO', tentativas = tentativas + 1, ultimo_erro = NULL,
+                        atualizado_em = CURRENT_TIMESTAMP
+                    WHERE outbox_id = ? AND user_id = ?
+                """, (item['outbox_id'], user_id))
+            else:
+                database.conn.execute("""
+                    UPDATE alertas_entregas
+                    SET tentativas = tentativas + 1,
+                        status = CASE WHEN tentativas + 1 >= ? THEN 'ERRO' ELSE ? END,
+                        ultimo_erro = 'Falha no envio do digest',
+                        atualizado_em = CURRENT_TIMESTAMP
+                    WHERE outbox_id = ? AND user_id = ?
+                """, (max_tentativas, STATUS_AGUARDANDO_DIGEST, item['outbox_id'], user_id))
+        database.conn.commit()
+
+
+def _finalizar_outbox_digest(database, outbox_ids):
+    """Item do outbox sem entregas aguardando: ENVIADO (todas ok) ou FALHOU."""
+    with database.lock_conexao:
+        for outbox_id in outbox_ids:
+            pendentes, com_erro = database.conn.execute("""
+                SELECT SUM(status IN (?, ?)), SUM(status = 'ERRO')
+                FROM alertas_entregas WHERE outbox_id = ?
+            """, (STATUS_AGUARDANDO_DIGEST, STATUS_ENVIANDO_DIGEST, outbox_id)).fetchone()
+
+            if pendentes:
+                continue
+
+            database.conn.execute("""
+                UPDATE alertas_outbox SET status = ?, atualizado_em = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, ('FALHOU' if com_erro else 'ENVIADO', outbox_id))
+        database.conn.commit()
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📬 ALERT OUTBOX - Despacho assíncrono dos alertas de fatura
+📧 FUNÇÃO: Drenar a tabela alertas_outbox (gravada junto com a fatura) em
+          background, com limite de concorrência, retry com backoff e status
+          de entrega por responsável (alertas_entregas)
+👨‍💼 RESPONSÁVEL: Sidney Gubitoso - Auxiliar Tesouraria Administrativa Mauá
+📁 SALVAR EM: processor/alertas/alert_outbox.py
+
+🔄 CICLO DE VIDA DE UM ITEM:
+PENDENTE → PROCESSANDO → ENVIADO
+                       → AGUARDANDO_DIGEST (modo digest) → ENVIADO/FALHOU no fim do ciclo
+                       → ERRO (nova tentativa após backoff) → ... → FALHOU
+                       → DESCARTADO (sem casa/responsáveis - não há para quem enviar)
+
+⚙️ CONFIGURAÇÃO:
+- ALERTAS_OUTBOX_CONCORRENCIA (4): alertas processados em paralelo
+- ALERTAS_OUTBOX_MAX_TENTATIVAS (5): tentativas antes de FALHOU
+- ALERTAS_OUTBOX_BACKOFF_SEGUNDOS (30): base do backoff exponencial (máx. 1h)
+- ALERTAS_OUTBOX_INTERVALO_SEGUNDOS (15): varredura periódica das retentativas
+"""
+
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from processor.alertas.alert_digest import (
+    modo_digest_ativo, enviar_digests, STATUS_AGUARDANDO_DIGEST, STATUS_ENVIANDO_DIGEST
+)
+
+BACKOFF_MAXIMO_SEGUNDOS = 3600
+
+
+class DespachanteAlertas:
+    """
+    Thread única que drena o outbox de todos os DatabaseBRK registrados.
+    Acesso ao SQLite sempre sob database.lock_conexao (conexão compartilhada
+    com o processamento de emails).
+    """
+
+    def __init__(self):
+        self.concorrencia = int(os.getenv("ALERTAS_OUTBOX_CONCORRENCIA", "4"))
+        self.max_tentativas = int(os.getenv("ALERTAS_OUTBOX_MAX_TENTATIVAS", "5"))
+        self.backoff_segundos = int(os.getenv("ALERTAS_OUTBOX_BACKOFF_SEGUNDOS", "30"))
+        self.intervalo_segundos = int(os.getenv("ALERTAS_OUTBOX_INTERVALO_SEGUNDOS", "15"))
+
+        self.databases = []
+        self._evento = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._ativo = False
+
+        self.estatisticas = {
+            'itens_processados': 0,
+            'itens_enviados': 0,
+            'itens_descartados': 0,
+            'itens_falhos': 0,
+            'itens_em_digest': 0,
+            'entregas_ok': 0,
+            'entregas_erro': 0,
+            'ultimo_ciclo': None,
+        }
+
+    # ------------------------------------------------------------------
+    # CONTROLE
+    # ------------------------------------------------------------------
+
+    def registrar_database(self, database):
+        """Adiciona um DatabaseBRK ao despacho (itens PROCESSANDO órfãos voltam para PENDENTE)."""
+        with self._lock:
+            if any(db is database for db in self.databases):
+                return
+
+            self._recuperar_itens_orfaos(database)
+            self.databases.append(database)
+
+    def iniciar(self):
+        """Inicia a thread do despachante (idempotente)."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+
+            self._ativo = True
+            self._thread = threading.Thread(target=self._loop, name="DespachanteAlertasBRK", daemon=True)
+            self._thread.start()
+            print(f"📬 Despachante de alertas iniciado (concorrência: {self.concorrencia})")
+
+    def notificar(self):
+        """Acorda o despachante (novo item no outbox)."""
+        self._evento.set()
+
+    def parar(self):
+        """Sinaliza parada; a thread termina após o ciclo em andamento."""
+        self._ativo = False
+        self._evento.set()
+
+    def _loop(self):
+        while self._ativo:
+            self._evento.wait(self.intervalo_segundos)
+            self._evento.clear()
+
+            for database in list(self.databases):
+                try:
+                    # Continua drenando enquanto houver itens prontos
+                    while self._ativo and self.drenar(database)['processados']:
+                        pass
+
+                    # Salvaguarda: digest esperando demais sai mesmo sem o monitor
+                    if modo_digest_ativo():
+                        enviar_digests(database, somente_vencidos=True)
+                except Exception as e:
+                    print(f"❌ Despachante alertas: erro drenando outbox: {e}")
+
+    # ------------------------------------------------------------------
+    # DRENAGEM
+    # ------------------------------------------------------------------
+
+    def drenar(self, database, limite=None):
+        """
+        Processa um lote de itens prontos do outbox.
+
+        Returns:
+            dict: {'processados': int, 'enviados': int, 'erros': int}
+        """
+        itens = self._reivindicar_itens(database, limite or self.concorrencia * 2)
+        if not itens:
+            return {'processados': 0, 'enviados': 0, 'erros': 0}
+
+        with ThreadPoolExecutor(max_workers=self.concorrencia) as executor:
+            status_itens = list(executor.map(lambda item: self._processar_item(database, item), itens))
+
+        enviados = status_itens.count('ENVIADO')
+        self.estatisticas['ultimo_ciclo'] = datetime.now().isoformat()
+
+        print(f"📬 Outbox: {len(itens)} alerta(s) processado(s) - "
+              f"{enviados} enviado(s), {len(itens) - enviados} pendente(s)/descartado(s)")
+
+        # Sem sincronizar_onedrive aqui: o estado do outbox vai para o OneDrive
+        # uma vez por ciclo do monitor (descarregar_alertas_ciclo)
+        return {'processados': len(itens), 'enviados': enviados, 'erros': len(itens) - enviados}
+
+    def _reivindicar_itens(self, database, limite):
+        """Marca até `limite` itens prontos como PROCESSANDO e os retorna."""
+        with database.lock_conexao:
+            cursor = database.conn.cursor()
+            cursor.execute("""
+                SELECT id, fatura_id, dados_json, tentativas
+                FROM alertas_outbox
+                WHERE status IN ('PENDENTE', 'ERRO')
+                  AND proxima_tentativa <= CURRENT_TIMESTAMP
+                ORDER BY id
+                LIMIT ?
+            """, (limite,))
+            itens = cursor.fetchall()
+
+            if itens:
+                cursor.executemany("""
+                    UPDATE alertas_outbox
+                    SET status = 'PROCESSANDO', tentativas = tentativas + 1,
+                        atualizado_em = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                """, [(item[0],) for item in itens])
+                database.conn.commit()
+
+        return [
+            {'id': id_outbox, 'fatura_id': fatura_id, 'dados_json': dados_json, 'tentativas': tentativas + 1}
+            for id_outbox, fatura_id, dados_json, tentativas in itens
+        ]
+
+    def _processar_item(self, database, item):
+        """Prepara o alerta e envia para os responsáveis ainda não atendidos."""
+        from processor.alertas.alert_processor import preparar_alerta_fatura, enviar_alerta_responsavel
+        from processor.alertas.message_formatter import determinar_tipo_alerta, TIPOS_ALERTA_CRITICOS
+        from processor.alertas.alert_digest import registrar_para_digest
+
+        try:
+            dados_fatura = json.loads(item['dados_json'])
+
+            # Digest: não críticos esperam o fim do ciclo (PDF só é buscado no envio)
+            para_digest = modo_digest_ativo() and determinar_tipo_alerta(dados_fatura) not in TIPOS_ALERTA_CRITICOS
+            if not para_digest:
+                dados_fatura.update(database.obter_pdf_fatura(item['fatura_id']))
+
+            alerta = preparar_alerta_fatura(dados_fatura, incluir_pdf=not para_digest)
+
+            if alerta['status'] == 'ignorado':
+                return self._finalizar_item(database, item, 'DESCARTADO', alerta['mensagem'])
+
+            if alerta['status'] != 'sucesso':
+                return self._finalizar_item(database, item, 'ERRO', alerta['mensagem'])
+
+            ja_entregues = self._obter_entregues(database, item['id'])
+            pendentes = [
+                r for r in alerta['responsaveis']
+                if r.get('user_id') and str(r['user_id']) not in ja_entregues
+            ]
+
+            if para_digest:
+                registrar_para_digest(database, item['id'], pendentes)
+                return self._finalizar_item(database, item, 'AGUARDANDO_DIGEST')
+
+            falhas = 0
+            for responsavel in pendentes:
+                sucesso = enviar_alerta_responsavel(alerta, responsavel)
+                self._registrar_entrega(database, item['id'], responsavel, sucesso)
+                if not sucesso:
+                    falhas += 1
+
+            if falhas:
+                return self._finalizar_item(database, item, 'ERRO', f"{falhas}/{len(pendentes)} entrega(s) falharam")
+
+            return self._finalizar_item(database, item, 'ENVIADO')
+
+        except Exception as e:
+            print(f"❌ Outbox: erro processando alerta {item['id']}: {e}")
+            return self._finalizar_item(database, item, 'ERRO', str(e))
+
+    def _obter_entregues(self, database, outbox_id):
+        with database.lock_conexao:
+            linhas = database.conn.execute("""
+                SELECT user_id FROM alertas_entregas
+                WHERE outbox_id = ? AND status = 'ENVIADO'
+            """, (outbox_id,)).fetchall()
+        return {linha[0] for linha in linhas}
+
+    def _registrar_entrega(self, database, outbox_id, responsavel, sucesso):
+        """Status de entrega por responsável (uma linha por outbox_id + user_id)."""
+        with database.lock_conexao:
+            database.conn.execute("""
+                INSERT INTO alertas_entregas (outbox_id, user_id, nome, status, tentativas, ultimo_erro)
+                VALUES (?, ?, ?, ?, 1, ?)
+                ON CONFLICT(outbox_id, user_id) DO UPDATE SET
+                    nome = excluded.nome,
+                    status = excluded.status,
+                    tentativas = alertas_entregas.tentativas + 1,
+                    ultimo_erro = excluded.ultimo_erro,
+                    atualizado_em = CURRENT_TIMESTAMP
+            """, (
+                outbox_id,
+                str(responsavel['user_id']),
+                responsavel.get('nome'),
+                'ENVIADO' if sucesso else 'ERRO',
+                None if sucesso else 'Falha no envio Telegram'
+            ))
+            database.conn.commit()
+
+        with self._lock:
+            self.estatisticas['entregas_ok' if sucesso else 'entregas_erro'] += 1
+
+    def _finalizar_item(self, database, item, status, erro=None):
+        """Grava o status final do item; ERRO vira FALHOU ao esgotar tentativas."""
+        atraso = 0
+        if status == 'ERRO':
+            if item['tentativas'] >= self.max_tentativas:
+                status = 'FALHOU'
+            else:
+                atraso = min(self.backoff_segundos * 2 ** (item['tentativas'] - 1), BACKOFF_MAXIMO_SEGUNDOS)
+
+        with database.lock_conexao:
+            database.conn.execute("""
+                UPDATE alertas_outbox
+                SET status = ?, ultimo_erro = ?,
+                    proxima_tentativa = datetime('now', ?),
+                    atualizado_em = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, (status, erro, f"+{atraso} seconds", item['id']))
+            database.conn.commit()
+
+        with self._lock:
+            self.estatisticas['itens_processados'] += 1
+            if status == 'ENVIADO':
+                self.estatisticas['itens_enviados'] += 1
+            elif status == 'DESCARTADO':
+                self.estatisticas['itens_descartados'] += 1
+            elif status == 'FALHOU':
+                self.estatisticas['itens_falhos'] += 1
+            elif status == 'AGUARDANDO_DIGEST':
+                self.estatisticas['itens_em_digest'] += 1
+
+        if status == 'ERRO':
+            print(f"🔁 Outbox: alerta {item['id']} - nova tentativa em {atraso}s ({erro})")
+        elif status == 'FALHOU':
+            print(f"❌ Outbox: alerta {item['id']} falhou após {item['tentativas']} tentativas ({erro})")
+
+        return status
+
+    def _recuperar_itens_orfaos(self, database):
+        """
+        Itens que ficaram PROCESSANDO e entregas reservadas ENVIANDO_DIGEST
+        (processo reiniciado no meio) voltam para a fila.
+        """
+        try:
+            with database.lock_conexao:
+                cursor = database.conn.execute("""
+                    UPDATE alertas_outbox SET status = 'PENDENTE', atualizado_em = CURRENT_TIMESTAMP
+                    WHERE status = 'PROCESSANDO'
+                """)
+                cursor_digest = database.conn.execute("""
+                    UPDATE alertas_entregas SET status = ?, atualizado_em = CURRENT_TIMESTAMP
+                    WHERE status = ?
+                """, (STATUS_AGUARDANDO_DIGEST, STATUS_ENVIANDO_DIGEST))
+                database.conn.commit()
+            if cursor.rowcount:
+                print(f"🔄 Outbox: {cursor.rowcount} alerta(s) órfão(s) devolvido(s) à fila")
+            if cursor_digest.rowcount:
+                print(f"🔄 Outbox: {cursor_digest.rowcount} entrega(s) de digest órfã(s) devolvida(s) ao digest")
+        except Exception as e:
+            print(f"⚠️ Outbox: falha recuperando itens órfãos: {e}")
+
+    # ------------------------------------------------------------------
+    # STATUS
+    # ------------------------------------------------------------------
+
+    def obter_estatisticas(self):
+        """Contadores do despachante + itens por status em cada database."""
+        fila = {}
+        for database in list(self.databases):
+            try:
+                with database.lock_conexao:
+                    linhas = database.conn.execute(
+                        "SELECT status, COUNT(*) FROM alertas_outbox GROUP BY status"
+                    ).fetchall()
+                for status, total in linhas:
+                    fila[status] = fila.get(status, 0) + total
+            except Exception:
+                pass
+
+        with self._lock:
+            return {
+                **self.estatisticas,
+                'thread_viva': bool(self._thread and self._thread.is_alive()),
+                'databases': len(self.databases),
+                'fila_por_status': fila,
+            }
+
+
+# Instância única do processo
+_despachante = None
+_lock_instancia = threading.Lock()
+
+
+def obter_despachante():
+    """Retorna o despachante do processo (criado sob demanda, sem iniciar a thread)."""
+    global _despachante
+
+    with _lock_instancia:
+        if _despachante is None:
+            _despachante = DespachanteAlertas()
+        return _despachante
+
+
+def descarregar_alertas_ciclo(database):
+    """
+    Fim de ciclo do monitor: drena o outbox agora (sem esperar a thread) e
+    envia os digests acumulados.
+    """
+    despachante = obter_despachante()
+    despachante.registrar_database(database)
+
+    while despachante.drenar(database)['processados']:
+        pass
+
+    resultado = enviar_digests(database) if modo_digest_ativo() else None
+
+    # Estado do outbox vai para o OneDrive junto com o database, uma vez por ciclo
+    try:
+        database.sincronizar_onedrive()
+    except Exception as e:
+        print(f"⚠️ Outbox: falha sincronizando database: {e}")
+
+    return resultado
+
+
+def iniciar_despachante_alertas(database):
+    """Registra o database, garante a thread ativa e acorda o despachante."""
+    despachante = obter_despachante()
+    despachante.registrar_database(database)
+    despachante.iniciar()
+    despachante.notificar()
+    return despachante
@@ -15,22 +15,81 @@ CORREÇÕES APLICADAS v2.3:
 import os
 import requests
 import re
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from .ccb_database import obter_responsaveis_por_codigo
+from .responsaveis_cache import obter_cache_responsaveis
+from .auth_compartilhado import obter_auth_alertas, renovar_token_alertas
 from .telegram_sender import enviar_telegram, enviar_telegram_com_anexo
-from .message_formatter import formatar_mensagem_alerta
+from .message_formatter import formatar_mensagem_alerta, determinar_tipo_alerta
+
+GRAPH_BASE_URL = "https://graph.microsoft.com/v1.0"
+
+# PDFs enviados ao OneDrive neste processo (item id → bytes), LRU
+LIMITE_CACHE_PDFS = int(os.getenv("ALERTAS_CACHE_PDF_MAX", "50"))
+_cache_pdfs_recentes = OrderedDict()
+_lock_cache_pdfs = threading.Lock()
+_estatisticas_pdf_onedrive = {'hits_cache': 0, 'downloads_por_id': 0, 'falhas_por_id': 0, 'fallback_caminho': 0}
 
 def processar_alerta_fatura(dados_fatura):
-    """Função principal - sem alterações"""
+    """Função principal (envio inline): prepara o alerta e envia para cada responsável"""
     try:
         print(f"\n🚨 [v2.3 FALLBACK CORRIGIDO] INICIANDO PROCESSAMENTO ALERTA COM ANEXO")
         
+        alerta = preparar_alerta_fatura(dados_fatura)
+        if alerta['status'] != 'sucesso':
+            return False
+        
+        # 5. Enviar para cada responsável
+        enviados_sucesso = 0
+        enviados_erro = 0
+        
+        for responsavel in alerta['responsaveis']:
+            if enviar_alerta_responsavel(alerta, responsavel):
+                enviados_sucesso += 1
+            else:
+                enviados_erro += 1
+        
+        # 6. Resultado final
+        pdf_foi_anexado = bool(alerta['pdf_bytes'])
+        
+        if alerta['pdf_bytes']:
+            alerta['pdf_bytes'] = None  # Limpeza da memória
+            print(f"🧹 PDF removido da memória")
+        
+        print(f"\n📊 RESULTADO PROCESSAMENTO ALERTA v2.3:")
+        print(f"   🏠 Casa completa: {alerta['casa_oracao']}")
+        print(f"   🔍 Código CCB: {alerta['codigo_casa']}")
+        print(f"   👥 Responsáveis: {len(alerta['responsaveis'])}")
+        print(f"   📎 PDF anexado: {'✅ Sim' if pdf_foi_anexado else '❌ Não'}")
+        print(f"   📁 Fonte PDF: {alerta['fonte_pdf']}")
+        print(f"   ✅ Enviados: {enviados_sucesso}")
+        print(f"   ❌ Falhas: {enviados_erro}")
+        
+        return enviados_sucesso > 0
+        
+    except Exception as e:
+        print(f"❌ Erro processando alerta v2.3: {e}")
+        return False
+
+def preparar_alerta_fatura(dados_fatura, incluir_pdf=True):
+    """
+    Etapas 1-4 do alerta: código da casa, responsáveis, mensagem e PDF.
+    incluir_pdf=False pula a etapa 4 (alerta que vai para o digest).
+    
+    Returns:
+        dict: {'status': 'sucesso', 'responsaveis', 'mensagem', 'pdf_bytes', ...}
+              {'status': 'ignorado', 'mensagem'} - não há como enviar (sem casa/responsáveis)
+              {'status': 'erro', 'mensagem'} - falha transitória, pode tentar de novo
+    """
+    try:
         # 1. Extrair código da casa
         casa_oracao_completa = dados_fatura.get('casa_oracao', '')
         
         if not casa_oracao_completa:
             print("⚠️ Código da casa não encontrado em dados_fatura")
-            return False
+            return {'status': 'ignorado', 'mensagem': 'Casa de oração ausente'}
         
         print(f"🏠 Casa detectada (completa): {casa_oracao_completa}")
         
@@ -38,7 +97,7 @@ def processar_alerta_fatura(dados_fatura):
         
         if not codigo_casa:
             print("❌ Não foi possível extrair código da casa")
-            return False
+            return {'status': 'ignorado', 'mensagem': f'Código CCB não identificado: {casa_oracao_completa}'}
         
         print(f"🔍 Código extraído (formato CCB): '{codigo_casa}'")
         
@@ -56,7 +115,7 @@ def processar_alerta_fatura(dados_fatura):
                 responsaveis = [{'user_id': admin_ids[0].strip(), 'nome': 'Admin', 'funcao': 'Administrador'}]
             else:
                 print(f"❌ ADMIN_IDS não configurado - cancelando envio")
-                return False
+                return {'status': 'ignorado', 'mensagem': 'Sem responsáveis e ADMIN_IDS não configurado'}
         
         print(f"👥 Responsáveis encontrados: {len(responsaveis)}")
         
@@ -66,230 +125,141 @@ def processar_alerta_fatura(dados_fatura):
         
         if not mensagem or mensagem == "Erro na formatação da mensagem":
             print(f"❌ Erro na formatação da mensagem")
-            return False
+            return {'status': 'erro', 'mensagem': 'Erro na formatação da mensagem'}
         
         print(f"✅ Mensagem formatada: {len(mensagem)} caracteres")
         
         # 4. Obter PDF dos dados OU OneDrive (FALLBACK CORRIGIDO)
-        print(f"📎 Obtendo PDF para anexo...")
-        pdf_bytes = None
-        fonte_pdf = "nenhuma"
+        pdf_bytes, fonte_pdf = obter_pdf_alerta(dados_fatura) if incluir_pdf else (None, "adiado")
 
-        # PRIMEIRO: Tentar usar PDF dos dados (registros novos)
-        content_bytes = dados_fatura.get('content_bytes')
-        if content_bytes and content_bytes.strip() and len(content_bytes) > 100:
-            try:
-                import base64
-                pdf_bytes = base64.b64decode(content_bytes)
-                fonte_pdf = "content_bytes"
-                print(f"✅ PDF dos dados (novo): {len(pdf_bytes)} bytes")
-            except Exception as e:
-                print(f"⚠️ Erro decodificando content_bytes: {e}")
-                pdf_bytes = None
-        else:
-            print(f"📝 content_bytes: {'ausente' if not content_bytes else 'inválido'} - usando fallback")
+        return {
+            'status': 'sucesso',
+            'tipo_alerta': determinar_tipo_alerta(dados_fatura),
+            'casa_oracao': casa_oracao_completa,
+            'codigo_casa': codigo_casa,
+            'responsaveis': responsaveis,
+            'mensagem': mensagem,
+            'pdf_bytes': pdf_bytes,
+            'fonte_pdf': fonte_pdf,
+            'nome_arquivo': _gerar_nome_arquivo_pdf(dados_fatura),
+            'chave_arquivo': dados_fatura.get('hash_arquivo') or None
+        }
+        
+    except Exception as e:
+        print(f"❌ Erro preparando alerta: {e}")
+        return {'status': 'erro', 'mensagem': str(e)}
 
-        # FALLBACK CORRIGIDO: OneDrive (registros antigos)
-        if not pdf_bytes:
-            print(f"📥 Usando fallback OneDrive CORRIGIDO (registro antigo)")
-            pdf_bytes = _baixar_pdf_onedrive_sincronizado(dados_fatura)
-            if pdf_bytes:
-                fonte_pdf = "onedrive"
-                print(f"✅ PDF do OneDrive: {len(pdf_bytes)} bytes")
-            else:
-                print(f"⚠️ PDF não encontrado no OneDrive")
+def obter_pdf_alerta(dados_fatura):
+    """
+    PDF da fatura: content_bytes, OneDrive por onedrive_item_id ou, para
+    registros antigos, OneDrive pelo caminho reconstruído.
+    
+    Returns:
+        tuple: (pdf_bytes ou None, fonte: 'content_bytes' | 'onedrive' | 'nenhuma')
+    """
+    print(f"📎 Obtendo PDF para anexo...")
+    pdf_bytes = None
+    fonte_pdf = "nenhuma"
 
-        # Log detalhado se não encontrou
-        if not pdf_bytes:
-            fonte_pdf = "nenhuma"
-            print(f"⚠️ PDF não disponível em nenhuma fonte")
-            print(f"   📝 content_bytes: {'presente' if content_bytes else 'ausente'}")
-            print(f"   📁 OneDrive: falhou")
-            print(f"   📨 Enviando apenas mensagem")
+    # PRIMEIRO: Tentar usar PDF dos dados (registros novos)
+    content_bytes = dados_fatura.get('content_bytes')
+    if content_bytes and content_bytes.strip() and len(content_bytes) > 100:
+        try:
+            import base64
+            pdf_bytes = base64.b64decode(content_bytes)
+            fonte_pdf = "content_bytes"
+            print(f"✅ PDF dos dados (novo): {len(pdf_bytes)} bytes")
+        except Exception as e:
+            print(f"⚠️ Erro decodificando content_bytes: {e}")
+            pdf_bytes = None
+    else:
+        print(f"📝 content_bytes: {'ausente' if not content_bytes else 'inválido'} - usando fallback")
 
-        nome_arquivo = _gerar_nome_arquivo_pdf(dados_fatura)
-        
-        # 5. Enviar para cada responsável
-        enviados_sucesso = 0
-        enviados_erro = 0
-        
-        for responsavel in responsaveis:
-            user_id = responsavel.get('user_id')
-            nome = responsavel.get('nome', 'Responsável')
-            funcao = responsavel.get('funcao', 'N/A')
-            
-            if not user_id:
-                print(f"⚠️ user_id vazio para {nome}")
-                enviados_erro += 1
-                continue
-            
-            print(f"📱 Enviando para: {nome} ({funcao}) - ID: {user_id}")
-            
-            # Enviar com anexo se disponível
-            if pdf_bytes:
-                sucesso = enviar_telegram_com_anexo(user_id, mensagem, pdf_bytes, nome_arquivo)
-                
-                if not sucesso:
-                    # Fallback: Se anexo falha, enviar só mensagem
-                    print(f"⚠️ Falha no envio com anexo - tentando só mensagem")
-                    sucesso = enviar_telegram(user_id, mensagem)
-            else:
-                # Enviar só mensagem
-                sucesso = enviar_telegram(user_id, mensagem)
-            
-            if sucesso:
-                enviados_sucesso += 1
-                print(f"✅ Enviado para {nome}")
-            else:
-                enviados_erro += 1
-                print(f"❌ Falha enviando para {nome}")
-        
-        # 6. Resultado final
-        pdf_foi_anexado = bool(pdf_bytes)
-        
+    # SEGUNDO: OneDrive pelo item id gravado no upload (cache local → Graph)
+    onedrive_item_id = dados_fatura.get('onedrive_item_id')
+    if not pdf_bytes and onedrive_item_id:
+        pdf_bytes = baixar_pdf_onedrive_por_id(onedrive_item_id)
         if pdf_bytes:
-            pdf_bytes = None  # Limpeza da memória
-            print(f"🧹 PDF removido da memória")
-        
-        print(f"\n📊 RESULTADO PROCESSAMENTO ALERTA v2.3:")
-        print(f"   🏠 Casa completa: {casa_oracao_completa}")
-        print(f"   🔍 Código CCB: {codigo_casa}")
-        print(f"   👥 Responsáveis: {len(responsaveis)}")
-        print(f"   📎 PDF anexado: {'✅ Sim' if pdf_foi_anexado else '❌ Não'}")
-        print(f"   📁 Fonte PDF: {fonte_pdf}")
-        print(f"   ✅ Enviados: {enviados_sucesso}")
-        print(f"   ❌ Falhas: {enviados_erro}")
-        
-        return enviados_sucesso > 0
-        
-    except Exception as e:
-        print(f"❌ Erro processando alerta v2.3: {e}")
+            fonte_pdf = "onedrive"
+
+    # FALLBACK: caminho reconstruído (registros anteriores ao onedrive_item_id)
+    if not pdf_bytes:
+        print(f"📥 Usando fallback OneDrive por caminho (registro antigo)")
+        pdf_bytes = _baixar_pdf_onedrive_sincronizado(dados_fatura)
+        if pdf_bytes:
+            fonte_pdf = "onedrive"
+            _estatisticas_pdf_onedrive['fallback_caminho'] += 1
+            print(f"✅ PDF do OneDrive: {len(pdf_bytes)} bytes")
+        else:
+            print(f"⚠️ PDF não encontrado no OneDrive")
+
+    # Log detalhado se não encontrou
+    if not pdf_bytes:
+        fonte_pdf = "nenhuma"
+        print(f"⚠️ PDF não disponível em nenhuma fonte")
+        print(f"   📝 content_bytes: {'presente' if content_bytes else 'ausente'}")
+        print(f"   📁 OneDrive: falhou")
+        print(f"   📨 Enviando apenas mensagem")
+
+    return pdf_bytes, fonte_pdf
+
+def enviar_alerta_responsavel(alerta, responsavel):
+    """
+    Envia um alerta preparado (preparar_alerta_fatura) para um responsável.
+    Com PDF: tenta anexo e cai para só mensagem se o anexo falhar.
+    
+    Returns:
+        bool: True se entregue
+    """
+    user_id = responsavel.get('user_id')
+    nome = responsavel.get('nome', 'Responsável')
+    funcao = responsavel.get('funcao', 'N/A')
+    
+    if not user_id:
+        print(f"⚠️ user_id vazio para {nome}")
         return False
+    
+    print(f"📱 Enviando para: {nome} ({funcao}) - ID: {user_id}")
+    
+    # Enviar com anexo se disponível
+    if alerta.get('pdf_bytes'):
+        sucesso = enviar_telegram_com_anexo(
+            user_id, alerta['mensagem'], alerta['pdf_bytes'], alerta['nome_arquivo'], alerta.get('chave_arquivo')
+        )
+        
+        if not sucesso:
+            # Fallback: Se anexo falha, enviar só mensagem
+            print(f"⚠️ Falha no envio com anexo - tentando só mensagem")
+            sucesso = enviar_telegram(user_id, alerta['mensagem'])
+    else:
+        # Enviar só mensagem
+        sucesso = enviar_telegram(user_id, alerta['mensagem'])
+    
+    if sucesso:
+        print(f"✅ Enviado para {nome}")
+    else:
+        print(f"❌ Falha enviando para {nome}")
+    
+    return sucesso
 
 def obter_responsaveis_por_codigo_sincronizado(codigo_casa):
-    """Função de consulta responsáveis - sem alterações"""
+    """Consulta responsáveis via cache em memória (revalidado por eTag + TTL)"""
     try:
-        print(f"🔍 Consultando base CCB (sincronizado) para: {codigo_casa}")
+        print(f"🔍 Consultando base CCB (cache) para: {codigo_casa}")
         
-        onedrive_alerta_id = os.getenv("ONEDRIVE_ALERTA_ID")
-        if not onedrive_alerta_id:
-            print(f"❌ ONEDRIVE_ALERTA_ID não configurado")
-            return []
-        
-        print(f"📁 OneDrive Alerta ID: {onedrive_alerta_id[:20]}...")
-        
-        from auth.microsoft_auth import MicrosoftAuth
-        auth_manager = MicrosoftAuth()
-        
-        print(f"🔄 Recarregando token do persistent disk...")
-        tokens_ok = auth_manager.carregar_token()
-        
-        if not tokens_ok or not auth_manager.access_token:
-            print(f"❌ Auth Microsoft não disponível após reload")
-            return []
-        
-        print(f"🔐 Auth Microsoft: ✅ Token recarregado from disk")
-        
-        headers = auth_manager.obter_headers_autenticados()
-        
-        print(f"🧪 Testando conectividade OneDrive CCB...")
-        test_url = f"https://graph.microsoft.com/v1.0/me/drive/items/{onedrive_alerta_id}"
-        test_response = requests.get(test_url, headers=headers, timeout=10)
-        
-        if test_response.status_code == 401:
-            print(f"🔄 HTTP 401 detectado - renovando token automaticamente...")
-            if auth_manager.atualizar_token():
-                headers = auth_manager.obter_headers_autenticados()
-                print(f"✅ Token renovado com sucesso")
-                
-                test_response = requests.get(test_url, headers=headers, timeout=10)
-                if test_response.status_code != 200:
-                    print(f"❌ Falha persistente após renovação: HTTP {test_response.status_code}")
-                    return []
-            else:
-                print(f"❌ Falha na renovação automática do token")
-                return []
-        elif test_response.status_code != 200:
-            print(f"❌ Erro de conectividade: HTTP {test_response.status_code}")
-            return []
+        cache = obter_cache_responsaveis()
+        resultado = cache.obter_responsaveis(codigo_casa)
         
-        print(f"✅ Conectividade OneDrive CCB confirmada")
+        estatisticas = cache.obter_estatisticas()
+        print(f"✅ Responsáveis encontrados (cache): {len(resultado)} "
+              f"[hits: {estatisticas['hits']}, misses: {estatisticas['misses']}]")
+        for resp in resultado:
+            print(f"   👤 {resp['nome']} ({resp['funcao']}) - ID: {resp['user_id']}")
         
-        # Buscar database
-        print(f"☁️ Buscando alertas_bot.db na pasta /Alerta/...")
-        
-        url = f"https://graph.microsoft.com/v1.0/me/drive/items/{onedrive_alerta_id}/children"
-        response = requests.get(url, headers=headers, timeout=30)
-        
-        if response.status_code != 200:
-            print(f"❌ Erro acessando pasta /Alerta/: HTTP {response.status_code}")
-            return []
-        
-        arquivos = response.json().get('value', [])
-        
-        db_file_id = None
-        for arquivo in arquivos:
-            if arquivo.get('name', '').lower() == 'alertas_bot.db':
-                db_file_id = arquivo['id']
-                print(f"💾 alertas_bot.db encontrado: {arquivo['name']}")
-                break
-        
-        if not db_file_id:
-            print(f"❌ alertas_bot.db não encontrado na pasta /Alerta/")
-            return []
-        
-        # Baixar database
-        print(f"📥 Baixando alertas_bot.db...")
-        
-        download_url = f"https://graph.microsoft.com/v1.0/me/drive/items/{db_file_id}/content"
-        download_response = requests.get(download_url, headers=headers, timeout=60)
-        
-        if download_response.status_code != 200:
-            print(f"❌ Erro baixando database: HTTP {download_response.status_code}")
-            return []
-        
-        import tempfile
-        import sqlite3
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.db', prefix='ccb_cache_') as tmp_file:
-            tmp_file.write(download_response.content)
-            db_path = tmp_file.name
-        
-        print(f"💾 Database baixado para: {db_path}")
-        
-        # Consultar responsáveis
-        conn = sqlite3.connect(db_path)
-        
-        try:
-            responsaveis = conn.execute("""
-                SELECT user_id, nome, funcao 
-                FROM responsaveis 
-                WHERE codigo_casa = ?
-            """, (codigo_casa,)).fetchall()
-            
-            resultado = []
-            for user_id, nome, funcao in responsaveis:
-                resultado.append({
-                    'user_id': user_id,
-                    'nome': nome or 'Nome não informado',
-                    'funcao': funcao or 'Função não informada'
-                })
-            
-            print(f"✅ Responsáveis encontrados (sincronizado): {len(resultado)}")
-            for resp in resultado:
-                print(f"   👤 {resp['nome']} ({resp['funcao']}) - ID: {resp['user_id']}")
-            
-            return resultado
-            
-        finally:
-            conn.close()
-            try:
-                os.unlink(db_path)
-            except:
-                pass
+        return resultado
         
     except Exception as e:
-        print(f"❌ Erro consultando base CCB (sincronizado): {e}")
+        print(f"❌ Erro consultando base CCB (cache): {e}")
         return []
 
 def extrair_codigo_formato_ccb(casa_oracao_completa):
@@ -350,53 +320,99 @@ def _baixar_pdf_onedrive_sincronizado(dados_fatura):
         
         print(f"📁 Caminho construído: {caminho_arquivo}")
         
-        from auth.microsoft_auth import MicrosoftAuth
-        auth_manager = MicrosoftAuth()
-        
-        print(f"🔄 Sincronizando token para download PDF...")
-        tokens_ok = auth_manager.carregar_token()
-        
-        if not tokens_ok or not auth_manager.access_token:
-            print(f"❌ Autenticação não disponível após sincronização")
-            return None
-        
-        headers = auth_manager.obter_headers_autenticados()
-        
         # Baixar via Microsoft Graph API
-        url = f"https://graph.microsoft.com/v1.0/me/drive/root:{caminho_arquivo}:/content"
+        url = f"{GRAPH_BASE_URL}/me/drive/root:{caminho_arquivo}:/content"
         
-        print(f"📥 Baixando PDF via Graph API (token sincronizado)...")
-        response = requests.get(url, headers=headers, timeout=30)
+        print(f"📥 Baixando PDF via Graph API (caminho)...")
+        response = _requisitar_graph(url)
         
-        if response.status_code == 200:
+        if response is not None and response.status_code == 200:
             print(f"✅ PDF baixado com sucesso: {len(response.content)} bytes")
             return response.content
-        else:
+        
+        if response is not None:
             print(f"❌ Erro baixando PDF: HTTP {response.status_code}")
-            
-            # Tentar renovar token se 401
-            if response.status_code == 401:
-                print(f"🔄 HTTP 401 - tentando renovar token para PDF...")
-                if auth_manager.atualizar_token():
-                    headers = auth_manager.obter_headers_autenticados()
-                    response = requests.get(url, headers=headers, timeout=30)
-                    
-                    if response.status_code == 200:
-                        print(f"✅ PDF baixado após renovação: {len(response.content)} bytes")
-                        return response.content
-                    else:
-                        print(f"❌ Erro persistente após renovação: HTTP {response.status_code}")
-                        return None
-                else:
-                    print(f"❌ Falha renovando token para PDF")
-                    return None
-            
-            return None
+        return None
             
     except Exception as e:
         print(f"❌ Erro baixando PDF do OneDrive (sincronizado): {e}")
         return None
 
+def baixar_pdf_onedrive_por_id(item_id):
+    """
+    PDF pelo item id do OneDrive (gravado em faturas_brk no upload).
+    Consulta antes o cache dos PDFs enviados recentemente.
+    
+    Returns:
+        bytes ou None (404/erro: o chamador cai para o caminho)
+    """
+    with _lock_cache_pdfs:
+        pdf_bytes = _cache_pdfs_recentes.get(item_id)
+        if pdf_bytes:
+            _cache_pdfs_recentes.move_to_end(item_id)
+            _estatisticas_pdf_onedrive['hits_cache'] += 1
+    
+    if pdf_bytes:
+        print(f"✅ PDF do cache local (item {item_id[:12]}...): {len(pdf_bytes)} bytes")
+        return pdf_bytes
+    
+    try:
+        print(f"📥 Baixando PDF pelo item id {item_id[:12]}...")
+        response = _requisitar_graph(f"{GRAPH_BASE_URL}/me/drive/items/{item_id}/content")
+        
+        if response is None:
+            return None
+        
+        if response.status_code != 200:
+            _estatisticas_pdf_onedrive['falhas_por_id'] += 1
+            print(f"⚠️ PDF por item id: HTTP {response.status_code}")
+            return None
+        
+        _estatisticas_pdf_onedrive['downloads_por_id'] += 1
+        guardar_pdf_recente(item_id, response.content)
+        print(f"✅ PDF do OneDrive (item id): {len(response.content)} bytes")
+        return response.content
+        
+    except Exception as e:
+        _estatisticas_pdf_onedrive['falhas_por_id'] += 1
+        print(f"❌ Erro baixando PDF por item id: {e}")
+        return None
+
+def guardar_pdf_recente(item_id, pdf_bytes):
+    """Guarda o PDF recém-enviado ao OneDrive (LRU por item id)."""
+    if not item_id or not pdf_bytes:
+        return
+    
+    with _lock_cache_pdfs:
+        _cache_pdfs_recentes[item_id] = pdf_bytes
+        _cache_pdfs_recentes.move_to_end(item_id)
+        while len(_cache_pdfs_recentes) > LIMITE_CACHE_PDFS:
+            _cache_pdfs_recentes.popitem(last=False)
+
+def obter_estatisticas_pdf_onedrive():
+    """Origem dos PDFs do OneDrive: cache local, item id ou caminho."""
+    with _lock_cache_pdfs:
+        return {**_estatisticas_pdf_onedrive, 'pdfs_em_cache': len(_cache_pdfs_recentes)}
+
+def _requisitar_graph(url, timeout=30):
+    """GET autenticado no Graph (auth compartilhado) com uma renovação em caso de HTTP 401."""
+    auth_manager = obter_auth_alertas()
+    
+    if not auth_manager.access_token:
+        print(f"❌ Autenticação Microsoft não disponível")
+        return None
+    
+    response = requests.get(url, headers=auth_manager.obter_headers_autenticados(), timeout=timeout)
+    
+    if response.status_code == 401:
+        print(f"🔄 HTTP 401 - tentando renovar token para PDF...")
+        if renovar_token_alertas():
+            response = requests.get(url, headers=auth_manager.obter_headers_autenticados(), timeout=timeout)
+        else:
+            print(f"❌ Falha renovando token para PDF")
+    
+    return response
+
 def _construir_caminho_onedrive(dados_fatura):
     """Função construir caminho - CORRIGIDA para usar vencimento"""
     try:
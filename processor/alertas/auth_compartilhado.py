@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🔐 AUTH COMPARTILHADO - Token Microsoft único para o módulo alertas
+📧 FUNÇÃO: O app.py injeta o auth_manager já autenticado e todo o módulo
+          alertas (responsáveis CCB, PDF do OneDrive) usa essa instância,
+          sem criar MicrosoftAuth() por fatura
+👨‍💼 RESPONSÁVEL: Sidney Gubitoso - Auxiliar Tesouraria Administrativa Mauá
+📁 SALVAR EM: processor/alertas/auth_compartilhado.py
+
+⚠️ SEM INJEÇÃO (scripts avulsos): cria UM MicrosoftAuth na primeira chamada
+   e reaproveita - o custo fica registrado em obter_estatisticas_auth_alertas()
+"""
+
+import time
+import threading
+
+_auth_alertas = None
+_lock_auth = threading.Lock()
+_estatisticas_auth = {
+    'injetado': False,
+    'obtencoes': 0,
+    'instancias_criadas': 0,
+    'tempo_criacao_ms': 0.0,
+    'renovacoes_401': 0,
+}
+
+
+def configurar_auth_alertas(auth_manager):
+    """
+    Injeta o auth_manager do app (chamar uma vez na inicialização).
+    O cache de responsáveis já existente passa a usar a mesma instância.
+    """
+    global _auth_alertas
+
+    with _lock_auth:
+        _auth_alertas = auth_manager
+        _estatisticas_auth['injetado'] = auth_manager is not None
+
+    from .responsaveis_cache import obter_cache_responsaveis
+    obter_cache_responsaveis().auth = auth_manager
+
+    print(f"🔐 Alertas: auth compartilhado configurado")
+
+
+def obter_auth_alertas():
+    """MicrosoftAuth compartilhado (injetado ou criado uma única vez)."""
+    global _auth_alertas
+
+    with _lock_auth:
+        _estatisticas_auth['obtencoes'] += 1
+
+        if _auth_alertas is None:
+            from auth.microsoft_auth import MicrosoftAuth
+
+            inicio = time.perf_counter()
+            _auth_alertas = MicrosoftAuth()
+            _estatisticas_auth['instancias_criadas'] += 1
+            _estatisticas_auth['tempo_criacao_ms'] += (time.perf_counter() - inicio) * 1000
+            print(f"⚠️ Alertas: auth não injetado - MicrosoftAuth criado sob demanda")
+
+        return _auth_alertas
+
+
+def renovar_token_alertas():
+    """Renova o token compartilhado após HTTP 401 (vale para todo o módulo)."""
+    auth = obter_auth_alertas()
+
+    with _lock_auth:
+        _estatisticas_auth['renovacoes_401'] += 1
+
+    return auth.atualizar_token()
+
+
+def obter_estatisticas_auth_alertas():
+    """Obtenções vs. instâncias criadas (0 quando injetado pelo app)."""
+    with _lock_auth:
+        return {
+            **_estatisticas_auth,
+            'tempo_criacao_ms': round(_estatisticas_auth['tempo_criacao_ms'], 1),
+        }
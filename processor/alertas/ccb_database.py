@@ -10,15 +10,15 @@
 """
 
 import os
-import sqlite3
 import requests
-import tempfile
-from auth.microsoft_auth import MicrosoftAuth
+from .responsaveis_cache import obter_cache_responsaveis
+from .auth_compartilhado import obter_auth_alertas
 
 def obter_responsaveis_por_codigo(codigo_casa):
     """
     Consultar responsáveis na base CCB por código da casa
-    ✅ CORRIGIDO: Acesso direto via Microsoft Graph API (sem utils/)
+    ✅ Servido do cache em memória (responsaveis_cache) - o alertas_bot.db só é
+       baixado de novo quando o eTag muda
     
     Args:
         codigo_casa (str): Código da casa (ex: "BR21-0774")
@@ -29,102 +29,13 @@ def obter_responsaveis_por_codigo(codigo_casa):
     try:
         print(f"🔍 Consultando base CCB para: {codigo_casa}")
         
-        # 1. Verificar variável ambiente
-        onedrive_alerta_id = os.getenv("ONEDRIVE_ALERTA_ID")
-        if not onedrive_alerta_id:
-            print(f"❌ ONEDRIVE_ALERTA_ID não configurado")
-            return []
-        
-        print(f"📁 OneDrive Alerta ID: {onedrive_alerta_id[:20]}...")
-        
-        # 2. Usar auth Microsoft do Sistema BRK
-        auth_manager = MicrosoftAuth()
-        if not auth_manager.access_token:
-            print(f"❌ Auth Microsoft não disponível")
-            return []
-        
-        print(f"🔐 Auth Microsoft: ✅ Disponível")
-        
-        # 3. Obter headers autenticados
-        headers = auth_manager.obter_headers_autenticados()
-        if not headers:
-            print(f"❌ Headers de autenticação não disponíveis")
-            return []
-        
-        # 4. Buscar database alertas_bot.db na pasta /Alerta/
-        print(f"☁️ Buscando alertas_bot.db na pasta /Alerta/...")
-        
-        # Listar arquivos na pasta /Alerta/
-        url = f"https://graph.microsoft.com/v1.0/me/drive/items/{onedrive_alerta_id}/children"
-        response = requests.get(url, headers=headers, timeout=30)
-        
-        if response.status_code != 200:
-            print(f"❌ Erro acessando pasta /Alerta/: HTTP {response.status_code}")
-            return []
-        
-        arquivos = response.json().get('value', [])
-        
-        # Procurar alertas_bot.db
-        db_file_id = None
-        for arquivo in arquivos:
-            if arquivo.get('name', '').lower() == 'alertas_bot.db':
-                db_file_id = arquivo['id']
-                print(f"💾 alertas_bot.db encontrado: {arquivo['name']}")
-                break
-        
-        if not db_file_id:
-            print(f"❌ alertas_bot.db não encontrado na pasta /Alerta/")
-            return []
-        
-        # 5. Baixar database para cache temporário
-        print(f"📥 Baixando alertas_bot.db...")
-        
-        download_url = f"https://graph.microsoft.com/v1.0/me/drive/items/{db_file_id}/content"
-        download_response = requests.get(download_url, headers=headers, timeout=60)
-        
-        if download_response.status_code != 200:
-            print(f"❌ Erro baixando database: HTTP {download_response.status_code}")
-            return []
+        resultado = obter_cache_responsaveis().obter_responsaveis(codigo_casa)
         
-        # Salvar em cache local temporário
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.db', prefix='ccb_cache_') as tmp_file:
-            tmp_file.write(download_response.content)
-            db_path = tmp_file.name
+        print(f"✅ Responsáveis encontrados: {len(resultado)}")
+        for resp in resultado:
+            print(f"   👤 {resp['nome']} ({resp['funcao']}) - ID: {resp['user_id']}")
         
-        print(f"💾 Database baixado para: {db_path}")
-        
-        # 6. Conectar SQLite e consultar responsáveis
-        conn = sqlite3.connect(db_path)
-        
-        try:
-            responsaveis = conn.execute("""
-                SELECT user_id, nome, funcao 
-                FROM responsaveis 
-                WHERE codigo_casa = ?
-            """, (codigo_casa,)).fetchall()
-            
-            # 7. Formatar resultado
-            resultado = []
-            for user_id, nome, funcao in responsaveis:
-                resultado.append({
-                    'user_id': user_id,
-                    'nome': nome or 'Nome não informado',
-                    'funcao': funcao or 'Função não informada'
-                })
-            
-            print(f"✅ Responsáveis encontrados: {len(resultado)}")
-            for resp in resultado:
-                print(f"   👤 {resp['nome']} ({resp['funcao']}) - ID: {resp['user_id']}")
-            
-            return resultado
-            
-        finally:
-            conn.close()
-            # Limpar cache temporário
-            try:
-                os.unlink(db_path)
-            except:
-                pass
+        return resultado
         
     except Exception as e:
         print(f"❌ Erro consultando base CCB: {e}")
@@ -146,7 +57,7 @@ def testar_conexao_ccb():
         if not onedrive_alerta_id:
             return False
         
-        auth_manager = MicrosoftAuth()
+        auth_manager = obter_auth_alertas()
         print(f"🔐 Auth Microsoft: {'✅ Disponível' if auth_manager.access_token else '❌ Não disponível'}")
         
         if not auth_manager.access_token:
@@ -191,103 +102,26 @@ def testar_conexao_ccb():
 def listar_responsaveis_todas_casas():
     """
     Função auxiliar para listar todos os responsáveis (debug)
-    ✅ CORRIGIDO: Acesso direto Graph API
+    ✅ Servido do cache em memória (responsaveis_cache)
     """
     try:
         print(f"\n📋 LISTANDO TODOS OS RESPONSÁVEIS")
         print(f"="*40)
         
-        # Verificações básicas
-        onedrive_alerta_id = os.getenv("ONEDRIVE_ALERTA_ID")
-        if not onedrive_alerta_id:
-            print(f"❌ ONEDRIVE_ALERTA_ID não configurado")
-            return []
-        
-        auth_manager = MicrosoftAuth()
-        if not auth_manager.access_token:
-            print(f"❌ Auth Microsoft não disponível")
-            return []
-        
-        # Baixar database (reutilizar lógica da função principal)
-        headers = auth_manager.obter_headers_autenticados()
-        
-        # Buscar alertas_bot.db
-        url = f"https://graph.microsoft.com/v1.0/me/drive/items/{onedrive_alerta_id}/children"
-        response = requests.get(url, headers=headers, timeout=30)
-        
-        if response.status_code != 200:
-            print(f"❌ Erro acessando pasta /Alerta/")
-            return []
-        
-        arquivos = response.json().get('value', [])
-        db_file_id = None
-        
-        for arquivo in arquivos:
-            if arquivo.get('name', '').lower() == 'alertas_bot.db':
-                db_file_id = arquivo['id']
-                break
-        
-        if not db_file_id:
-            print(f"❌ alertas_bot.db não encontrado")
-            return []
-        
-        # Baixar e consultar
-        download_url = f"https://graph.microsoft.com/v1.0/me/drive/items/{db_file_id}/content"
-        download_response = requests.get(download_url, headers=headers, timeout=60)
-        
-        if download_response.status_code != 200:
-            print(f"❌ Erro baixando database")
-            return []
+        responsaveis_lista = obter_cache_responsaveis().listar_todos()
+        print(f"👥 Total responsáveis: {len(responsaveis_lista)}")
         
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.db') as tmp_file:
-            tmp_file.write(download_response.content)
-            db_path = tmp_file.name
+        # Responsáveis por casa
+        casas = {}
+        for resp in responsaveis_lista:
+            casas[resp['codigo_casa']] = casas.get(resp['codigo_casa'], 0) + 1
         
-        # Consultar todos os responsáveis
-        conn = sqlite3.connect(db_path)
+        print(f"🏠 Casas cadastradas: {len(casas)}")
+        for codigo_casa, total in casas.items():
+            print(f"   🏪 {codigo_casa}: {total} responsável(is)")
         
-        try:
-            # Estatísticas gerais
-            total_responsaveis = conn.execute("SELECT COUNT(*) FROM responsaveis").fetchone()[0]
-            print(f"👥 Total responsáveis: {total_responsaveis}")
-            
-            # Responsáveis por casa
-            casas = conn.execute("""
-                SELECT codigo_casa, COUNT(*) as total
-                FROM responsaveis 
-                GROUP BY codigo_casa 
-                ORDER BY codigo_casa
-            """).fetchall()
-            
-            print(f"🏠 Casas cadastradas: {len(casas)}")
-            for codigo_casa, total in casas:
-                print(f"   🏪 {codigo_casa}: {total} responsável(is)")
-            
-            # Todos os responsáveis
-            todos = conn.execute("""
-                SELECT codigo_casa, user_id, nome, funcao
-                FROM responsaveis 
-                ORDER BY codigo_casa, nome
-            """).fetchall()
-            
-            responsaveis_lista = []
-            for codigo_casa, user_id, nome, funcao in todos:
-                responsaveis_lista.append({
-                    'codigo_casa': codigo_casa,
-                    'user_id': user_id,
-                    'nome': nome,
-                    'funcao': funcao
-                })
-            
-            print(f"✅ Lista completa obtida: {len(responsaveis_lista)} responsáveis")
-            return responsaveis_lista
-            
-        finally:
-            conn.close()
-            try:
-                os.unlink(db_path)
-            except:
-                pass
+        print(f"✅ Lista completa obtida: {len(responsaveis_lista)} responsáveis")
+        return responsaveis_lista
         
     except Exception as e:
         print(f"❌ Erro listando responsáveis: {e}")
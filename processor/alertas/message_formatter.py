@@ -181,6 +181,12 @@ def formatar_mensagem_alerta(dados_fatura):
 🤖 *Sistema BRK Automático*
 🙏 *Deus abençoe!*"""
         
+        # Modo histórico: referência usada na classificação logo abaixo da Média 6M
+        linha_baseline = _linha_baseline(dados_fatura)
+        if linha_baseline:
+            linha_media = f"📉 *Média (6 meses):* {media}  "
+            mensagem = mensagem.replace(linha_media, f"{linha_media}\n{linha_baseline}", 1)
+        
         print(f"✅ Mensagem formatada: {len(mensagem)} caracteres")
         return mensagem
         
@@ -188,6 +194,21 @@ def formatar_mensagem_alerta(dados_fatura):
         print(f"❌ Erro formatando mensagem: {e}")
         return "Erro na formatação da mensagem"
 
+def _linha_baseline(dados_fatura):
+    """Linha "Mediana 12 meses" quando o alerta usa a linha de base do CDC."""
+    baseline = dados_fatura.get('baseline_consumo') or {}
+    if not baseline.get('mediana') or not baseline.get('qtd_meses'):
+        return None
+    
+    from processor.baseline_consumo import modo_baseline_historico, meses_minimos_baseline
+    if not modo_baseline_historico() or baseline['qtd_meses'] < meses_minimos_baseline():
+        return None
+    
+    linha = f"📚 *Mediana ({baseline['qtd_meses']} meses):* {fmt_m3(baseline['mediana'])}  "
+    if baseline.get('mesmo_mes_ano_anterior') is not None:
+        linha += f"\n🗓️ *Mesmo mês ano anterior:* {fmt_m3(baseline['mesmo_mes_ano_anterior'])}  "
+    return linha
+
 def determinar_tipo_alerta(dados_fatura):
     """
     ✅ VERSÃO CORRIGIDA - Determinar tipo de alerta baseado no consumo
@@ -200,6 +221,15 @@ def determinar_tipo_alerta(dados_fatura):
         str: Tipo do alerta
     """
     try:
+        # ALERTA_MODO_BASELINE=historico: linha de base do próprio CDC (se houver histórico)
+        if dados_fatura.get('baseline_consumo'):
+            from processor.baseline_consumo import modo_baseline_historico, tipo_alerta_historico
+            if modo_baseline_historico():
+                tipo_historico = tipo_alerta_historico(dados_fatura)
+                if tipo_historico:
+                    print(f"   📚 Tipo pela linha de base do CDC: {tipo_historico}")
+                    return tipo_historico
+        
         medido_real = float(dados_fatura.get('medido_real', 0))
         media_6m = float(dados_fatura.get('media_6m', 0))
         
@@ -291,3 +321,83 @@ def calcular_diferenca_m3(dados_fatura):
             return f"{dif:.1f} m³"
     except:
         return "N/A"
+
+# Tipos que nunca esperam o digest: vão na hora, com a mensagem completa
+TIPOS_ALERTA_CRITICOS = ("Crítico", "Emergência")
+
+ICONES_TIPO_ALERTA = {
+    "Consumo Normal": "✅",
+    "Atenção": "🟡",
+    "Alto Consumo": "🟠",
+    "Crítico": "🔴",
+    "Emergência": "🔴",
+    "Consumo Baixo": "📉",
+}
+
+LIMITE_MENSAGEM_TELEGRAM = 4000
+
+def formatar_mensagem_digest(lista_dados_fatura):
+    """
+    📋 Mensagem única com várias faturas do mesmo responsável (modo digest)
+    
+    Args:
+        lista_dados_fatura (list): dados_fatura de cada alerta agrupado
+    
+    Returns:
+        list: partes da mensagem (cada uma cabe no limite do Telegram)
+    """
+    try:
+        print(f"📝 Formatando digest com {len(lista_dados_fatura)} fatura(s)...")
+        
+        cabecalho = f"""*A Paz de Deus!* 
+
+📋 *RESUMO DAS FATURAS BRK* ({len(lista_dados_fatura)} faturas)  
+━━━━━━━━━━━━━━━━  
+"""
+        rodape = f"""━━━━━━━━━━━━━━━━  
+💰 *Total:* {fmt_valor(_somar_valores(lista_dados_fatura))}  
+📎 *Faturas em PDF enviadas em seguida*  
+
+🤖 *Sistema BRK Automático*
+🙏 *Deus abençoe!*"""
+        
+        blocos = []
+        for dados_fatura in lista_dados_fatura:
+            tipo = determinar_tipo_alerta(dados_fatura)
+            icone = ICONES_TIPO_ALERTA.get(tipo, "ℹ️")
+            linha_consumo = f"📊 {fmt_m3(dados_fatura.get('medido_real', 0))} (média {fmt_m3(dados_fatura.get('media_6m', 0))})"
+            if tipo != "Consumo Normal":
+                linha_consumo += f" {calcular_diferenca_m3(dados_fatura)}"
+            
+            blocos.append(f"""{icone} *{dados_fatura.get('casa_oracao', 'Casa não identificada')}*  
+📆 Venc.: {fmt_data(dados_fatura.get('vencimento', ''))} | 💰 {fmt_valor(dados_fatura.get('valor', ''))}  
+{linha_consumo} - {tipo}  
+""")
+        
+        # Quebrar em várias mensagens se passar do limite
+        partes = []
+        atual = cabecalho
+        for bloco in blocos:
+            if len(atual) + len(bloco) + len(rodape) > LIMITE_MENSAGEM_TELEGRAM and atual != cabecalho:
+                partes.append(atual.rstrip())
+                atual = "📋 *RESUMO (continuação)*  \n"
+            atual += bloco + "\n"
+        partes.append(atual + rodape)
+        
+        print(f"✅ Digest formatado: {len(partes)} mensagem(ns)")
+        return partes
+        
+    except Exception as e:
+        print(f"❌ Erro formatando digest: {e}")
+        return []
+
+def _somar_valores(lista_dados_fatura):
+    """Soma valores 'R$ 1.234,56' (ignora os que não convertem)."""
+    total = 0.0
+    for dados_fatura in lista_dados_fatura:
+        valor = str(dados_fatura.get('valor', ''))
+        try:
+            total += float(valor.replace('R$', '').replace('.', '').replace(',', '.').strip())
+        except ValueError:
+            pass
+    return f"R$ {total:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🗂️ RESPONSÁVEIS CACHE - Diretório CCB em memória
+📧 FUNÇÃO: Carregar a tabela responsaveis do alertas_bot.db uma única vez e
+          servir todas as consultas por codigo_casa direto da memória
+👨‍💼 RESPONSÁVEL: Sidney Gubitoso - Auxiliar Tesouraria Administrativa Mauá
+📁 SALVAR EM: processor/alertas/responsaveis_cache.py
+
+🔄 ATUALIZAÇÃO:
+- Dentro do TTL (RESPONSAVEIS_CACHE_TTL_SEGUNDOS, padrão 300) nenhuma chamada Graph
+- Vencido o TTL: consulta só os metadados do alertas_bot.db ($select=eTag)
+- eTag igual → renova o TTL sem baixar; eTag diferente → baixa e recarrega tudo
+- Falha de rede com cache carregado → continua servindo a versão anterior
+"""
+
+import os
+import time
+import sqlite3
+import tempfile
+import threading
+import requests
+from datetime import datetime
+
+GRAPH_BASE_URL = "https://graph.microsoft.com/v1.0"
+NOME_DATABASE_CCB = "alertas_bot.db"
+
+
+class CacheResponsaveis:
+    """
+    Diretório de responsáveis por codigo_casa mantido em memória.
+    Thread-safe: o monitor e as rotas Flask podem consultar ao mesmo tempo.
+    """
+
+    def __init__(self, auth_manager=None, ttl_segundos=None):
+        self.auth = auth_manager
+        self.ttl_segundos = ttl_segundos if ttl_segundos is not None else int(
+            os.getenv("RESPONSAVEIS_CACHE_TTL_SEGUNDOS", "300")
+        )
+
+        self._responsaveis = {}
+        self._db_file_id = None
+        self._etag = None
+        self._verificado_em = 0.0
+        self._carregado_em = None
+        self._lock = threading.RLock()
+
+        self._estatisticas = {
+            'hits': 0,
+            'misses': 0,
+            'downloads': 0,
+            'verificacoes_etag': 0,
+            'etag_inalterado': 0,
+            'falhas_atualizacao': 0,
+        }
+
+    # ------------------------------------------------------------------
+    # CONSULTA
+    # ------------------------------------------------------------------
+
+    def obter_responsaveis(self, codigo_casa):
+        """
+        Responsáveis da casa [{'user_id', 'nome', 'funcao'}] servidos da memória.
+
+        Returns:
+            list: cópia da lista (vazia se a casa não tiver responsáveis)
+        """
+        with self._lock:
+            baixou = self._garantir_atualizado()
+
+            if baixou or not self._carregado_em:
+                self._estatisticas['misses'] += 1
+            else:
+                self._estatisticas['hits'] += 1
+
+            return [dict(r) for r in self._responsaveis.get(codigo_casa, [])]
+
+    def listar_todos(self):
+        """Todos os responsáveis com codigo_casa, ordenados por casa e nome."""
+        with self._lock:
+            self._garantir_atualizado()
+
+            todos = []
+            for codigo_casa in sorted(self._responsaveis):
+                for resp in self._responsaveis[codigo_casa]:
+                    todos.append({'codigo_casa': codigo_casa, **resp})
+            return todos
+
+    def invalidar(self):
+        """Força revalidação (eTag) na próxima consulta."""
+        with self._lock:
+            self._verificado_em = 0.0
+
+    def obter_estatisticas(self):
+        """Contadores hit/miss + estado do cache."""
+        with self._lock:
+            total = self._estatisticas['hits'] + self._estatisticas['misses']
+            return {
+                **self._estatisticas,
+                'taxa_hit': round(self._estatisticas['hits'] / total * 100, 1) if total else 0.0,
+                'casas_em_cache': len(self._responsaveis),
+                'responsaveis_em_cache': sum(len(r) for r in self._responsaveis.values()),
+                'etag': self._etag,
+                'carregado_em': self._carregado_em,
+                'ttl_segundos': self.ttl_segundos,
+            }
+
+    # ------------------------------------------------------------------
+    # ATUALIZAÇÃO
+    # ------------------------------------------------------------------
+
+    def _garantir_atualizado(self):
+        """
+        Revalida o cache se o TTL venceu.
+
+        Returns:
+            bool: True se o database foi baixado nesta chamada
+        """
+        if self._carregado_em and time.monotonic() - self._verificado_em < self.ttl_segundos:
+            return False
+
+        try:
+            headers = self._obter_headers()
+            if headers is None:
+                raise Exception("Auth Microsoft não disponível")
+
+            item = self._obter_metadados_database(headers)
+            if not item:
+                raise Exception(f"{NOME_DATABASE_CCB} não encontrado na pasta /Alerta/")
+
+            self._estatisticas['verificacoes_etag'] += 1
+            etag = item.get('eTag')
+
+            if self._carregado_em and etag and etag == self._etag:
+                self._estatisticas['etag_inalterado'] += 1
+                self._verificado_em = time.monotonic()
+                return False
+
+            self._baixar_e_carregar(headers, item['id'])
+            self._etag = etag
+            self._verificado_em = time.monotonic()
+            return True
+
+        except Exception as e:
+            self._estatisticas['falhas_atualizacao'] += 1
+            if self._carregado_em:
+                # Evita martelar o Graph a cada fatura durante uma instabilidade
+                print(f"⚠️ Cache responsáveis: falha atualizando ({e}) - usando versão de {self._carregado_em}")
+                self._verificado_em = time.monotonic()
+            else:
+                print(f"❌ Cache responsáveis: falha carregando base CCB: {e}")
+            return False
+
+    def _obter_headers(self):
+        """Headers autenticados com o auth compartilhado do módulo alertas."""
+        if self.auth is None:
+            from .auth_compartilhado import obter_auth_alertas
+            self.auth = obter_auth_alertas()
+
+        if not self.auth.access_token:
+            return None
+        return self.auth.obter_headers_autenticados()
+
+    def _requisitar(self, url, headers, timeout):
+        """GET com uma renovação de token em caso de HTTP 401."""
+        response = requests.get(url, headers=headers, timeout=timeout)
+
+        if response.status_code == 401 and self.auth.atualizar_token():
+            print(f"🔄 Cache responsáveis: token renovado após HTTP 401")
+            headers.update(self.auth.obter_headers_autenticados())
+            response = requests.get(url, headers=headers, timeout=timeout)
+
+        return response
+
+    def _obter_metadados_database(self, headers):
+        """Metadados (id, eTag) do alertas_bot.db - só lista a pasta na primeira vez."""
+        if self._db_file_id:
+            url = f"{GRAPH_BASE_URL}/me/drive/items/{self._db_file_id}?$select=id,eTag,size"
+            response = self._requisitar(url, headers, timeout=10)
+
+            if response.status_code == 200:
+                return response.json()
+            if response.status_code != 404:
+                raise Exception(f"HTTP {response.status_code} consultando metadados")
+
+            # Arquivo substituído (novo id): procurar de novo na pasta
+            self._db_file_id = None
+
+        onedrive_alerta_id = os.getenv("ONEDRIVE_ALERTA_ID")
+        if not onedrive_alerta_id:
+            raise Exception("ONEDRIVE_ALERTA_ID não configurado")
+
+        url = f"{GRAPH_BASE_URL}/me/drive/items/{onedrive_alerta_id}/children"
+        response = self._requisitar(url, headers, timeout=30)
+
+        if response.status_code != 200:
+            raise Exception(f"HTTP {response.status_code} acessando pasta /Alerta/")
+
+        for arquivo in response.json().get('value', []):
+            if arquivo.get('name', '').lower() == NOME_DATABASE_CCB:
+                self._db_file_id = arquivo['id']
+                return arquivo
+
+        return None
+
+    def _baixar_e_carregar(self, headers, db_file_id):
+        """Baixa o alertas_bot.db e carrega a tabela responsaveis inteira."""
+        print(f"📥 Cache responsáveis: baixando {NOME_DATABASE_CCB}...")
+
+        url = f"{GRAPH_BASE_URL}/me/drive/items/{db_file_id}/content"
+        response = self._requisitar(url, headers, timeout=60)
+
+        if response.status_code != 200:
+            raise Exception(f"HTTP {response.status_code} baixando database")
+
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.db', prefix='ccb_cache_') as tmp_file:
+            tmp_file.write(response.content)
+            db_path = tmp_file.name
+
+        try:
+            conn = sqlite3.connect(db_path)
+            try:
+                linhas = conn.execute("""
+                    SELECT codigo_casa, user_id, nome, funcao
+                    FROM responsaveis
+                    ORDER BY codigo_casa, nome
+                """).fetchall()
+            finally:
+                conn.close()
+        finally:
+            try:
+                os.unlink(db_path)
+            except OSError:
+                pass
+
+        responsaveis = {}
+        for codigo_casa, user_id, nome, funcao in linhas:
+            responsaveis.setdefault(codigo_casa, []).append({
+                'user_id': user_id,
+                'nome': nome or 'Nome não informado',
+                'funcao': funcao or 'Função não informada'
+            })
+
+        self._responsaveis = responsaveis
+        self._db_file_id = db_file_id
+        self._carregado_em = datetime.now().isoformat()
+        self._estatisticas['downloads'] += 1
+
+        print(f"✅ Cache responsáveis: {len(linhas)} responsáveis em {len(responsaveis)} casas")
+
+
+# Instância única compartilhada pelo processo
+_cache_responsaveis = None
+_lock_instancia = threading.Lock()
+
+
+def obter_cache_responsaveis():
+    """Retorna o cache de responsáveis do processo (criado sob demanda)."""
+    global _cache_responsaveis
+
+    with _lock_instancia:
+        if _cache_responsaveis is None:
+            _cache_responsaveis = CacheResponsaveis()
+        return _cache_responsaveis
@@ -11,6 +11,127 @@ import os
 import requests
 import time
 import io
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+# ============================================================================
+# DESPACHO: sessão HTTP + limites de taxa do Telegram
+# ============================================================================
+
+# Telegram: ~30 msg/s por bot e ~1 msg/s por chat
+TAXA_GLOBAL_MSG_SEGUNDO = float(os.getenv("TELEGRAM_TAXA_GLOBAL", "30"))
+INTERVALO_CHAT_SEGUNDOS = float(os.getenv("TELEGRAM_INTERVALO_CHAT_SEGUNDOS", "1.0"))
+WORKERS_ENVIO = int(os.getenv("TELEGRAM_WORKERS", "4"))
+MAX_TENTATIVAS_429 = 3
+LIMITE_MEDIA_GROUP = 10
+
+class LimitadorTelegram:
+    """
+    Token bucket global + intervalo mínimo por chat.
+    Um 429 (Retry-After) pausa todos os envios do bot até o prazo informado.
+    """
+    
+    def __init__(self, taxa=TAXA_GLOBAL_MSG_SEGUNDO, intervalo_chat=INTERVALO_CHAT_SEGUNDOS):
+        self.taxa = taxa
+        self.capacidade = max(1.0, taxa)
+        self.intervalo_chat = intervalo_chat
+        self._tokens = self.capacidade
+        self._ultima_reposicao = time.monotonic()
+        self._pausa_ate = 0.0
+        self._proximo_envio_chat = {}
+        self._lock = threading.Lock()
+    
+    def aguardar(self, chat_id):
+        """Bloqueia até haver token global e o chat estar liberado."""
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                self._tokens = min(self.capacidade, self._tokens + (agora - self._ultima_reposicao) * self.taxa)
+                self._ultima_reposicao = agora
+                
+                espera = max(
+                    self._pausa_ate - agora,
+                    self._proximo_envio_chat.get(chat_id, 0.0) - agora,
+                    (1 - self._tokens) / self.taxa if self._tokens < 1 else 0.0
+                )
+                
+                if espera <= 0:
+                    self._tokens -= 1
+                    if chat_id is not None:
+                        self._proximo_envio_chat[chat_id] = agora + self.intervalo_chat
+                    return
+            
+            time.sleep(espera)
+    
+    def pausar(self, segundos):
+        """Retry-After: nenhum envio antes de `segundos`."""
+        with self._lock:
+            self._pausa_ate = max(self._pausa_ate, time.monotonic() + segundos)
+
+_limitador = LimitadorTelegram()
+
+def configurar_limitador(taxa=None, intervalo_chat=None):
+    """Troca o limitador global (benchmark/testes contra o servidor stub)."""
+    global _limitador
+    _limitador = LimitadorTelegram(
+        taxa if taxa is not None else TAXA_GLOBAL_MSG_SEGUNDO,
+        intervalo_chat if intervalo_chat is not None else INTERVALO_CHAT_SEGUNDOS
+    )
+    return _limitador
+
+def url_api_telegram(bot_token, metodo):
+    """
+    URL de um método da Bot API. TELEGRAM_API_BASE_URL permite apontar para o
+    servidor stub local (processor/alertas/telegram_stub_server.py).
+    """
+    base_url = os.getenv("TELEGRAM_API_BASE_URL", "https://api.telegram.org").rstrip("/")
+    return f"{base_url}/bot{bot_token}/{metodo}"
+_sessao = None
+_lock_sessao = threading.Lock()
+
+def _obter_sessao():
+    """requests.Session compartilhada (keep-alive) com pool do tamanho dos workers."""
+    global _sessao
+    with _lock_sessao:
+        if _sessao is None:
+            _sessao = requests.Session()
+            adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=max(WORKERS_ENVIO, 4))
+            _sessao.mount("https://", adaptador)
+            _sessao.mount("http://", adaptador)
+        return _sessao
+
+def _post_telegram(url, data, files=None, timeout=10):
+    """
+    POST na API do Telegram respeitando o limitador e o Retry-After de respostas 429.
+    """
+    chat_id = data.get('chat_id')
+    
+    for tentativa in range(1, MAX_TENTATIVAS_429 + 1):
+        _limitador.aguardar(chat_id)
+        
+        if files:
+            for arquivo in files.values():
+                arquivo[1].seek(0)
+        
+        response = _obter_sessao().post(url, data=data, files=files, timeout=timeout)
+        
+        if response.status_code != 429 or tentativa == MAX_TENTATIVAS_429:
+            return response
+        
+        try:
+            retry_after = response.json().get('parameters', {}).get('retry_after')
+        except ValueError:
+            retry_after = None
+        retry_after = float(retry_after or response.headers.get('Retry-After') or 1)
+        
+        print(f"⏳ Telegram 429 - aguardando {retry_after:.0f}s (tentativa {tentativa}/{MAX_TENTATIVAS_429})")
+        _limitador.pausar(retry_after)
+    
+    return response
 
 def enviar_telegram(user_id, mensagem):
     """
@@ -37,7 +158,7 @@ def enviar_telegram(user_id, mensagem):
         print(f"🤖 Bot token: {bot_token[:20]}...")
         
         # 2. Preparar dados para API
-        url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+        url = url_api_telegram(bot_token, "sendMessage")
         
         data = {
             'chat_id': user_id,
@@ -48,7 +169,7 @@ def enviar_telegram(user_id, mensagem):
         print(f"📤 Enviando mensagem ({len(mensagem)} caracteres)...")
         
         # 3. Fazer requisição
-        response = requests.post(url, data=data, timeout=10)
+        response = _post_telegram(url, data, timeout=10)
         
         # 4. Verificar resultado
         if response.status_code == 200:
@@ -81,17 +202,21 @@ def enviar_telegram(user_id, mensagem):
         print(f"❌ Erro inesperado enviando Telegram: {e}")
         return False
 
-def enviar_telegram_com_anexo(user_id, mensagem, pdf_bytes, nome_arquivo):
+def enviar_telegram_com_anexo(user_id, mensagem, pdf_bytes, nome_arquivo, chave_arquivo=None):
     """
     🆕 FUNÇÃO: Enviar mensagem + PDF anexado via Telegram
     
-    Usa API sendDocument do Telegram para enviar PDF como anexo
+    Usa API sendDocument do Telegram para enviar PDF como anexo.
+    O PDF só é enviado (upload) uma vez: o file_id devolvido pelo Telegram fica
+    em cache por chave_arquivo (hash_arquivo da fatura) e os próximos
+    destinatários recebem o documento por referência.
     
     Args:
         user_id (str/int): ID do usuário Telegram
         mensagem (str): Mensagem formatada (será caption do documento)
         pdf_bytes (bytes): Conteúdo do PDF
         nome_arquivo (str): Nome do arquivo PDF
+        chave_arquivo (str): Chave do cache de file_id (padrão: SHA-256 do PDF)
     
     Returns:
         bool: True se envio bem-sucedido, False caso contrário
@@ -115,12 +240,7 @@ def enviar_telegram_com_anexo(user_id, mensagem, pdf_bytes, nome_arquivo):
         
         print(f"📄 PDF: {len(pdf_bytes)} bytes - {nome_arquivo}")
         
-        # 3. Preparar dados para API sendDocument
-        url = f"https://api.telegram.org/bot{bot_token}/sendDocument"
-        
-        # Criar arquivo em memória
-        pdf_file = io.BytesIO(pdf_bytes)
-        pdf_file.name = nome_arquivo
+        url = url_api_telegram(bot_token, "sendDocument")
         
         # Dados do formulário
         data = {
@@ -129,36 +249,49 @@ def enviar_telegram_com_anexo(user_id, mensagem, pdf_bytes, nome_arquivo):
             'parse_mode': 'Markdown'
         }
         
-        # Arquivo para upload
-        files = {
-            'document': (nome_arquivo, pdf_file, 'application/pdf')
-        }
-        
-        print(f"📤 Enviando documento via sendDocument...")
+        # 3. Já enviado antes? Mandar por referência (sem upload)
+        chave = chave_arquivo or hashlib.sha256(pdf_bytes).hexdigest()
+        file_id = obter_file_id_cache(chave)
         
-        # 4. Fazer requisição (timeout maior para upload)
-        response = requests.post(url, data=data, files=files, timeout=180)
-        
-        # 5. Verificar resultado
-        if response.status_code == 200:
-            response_data = response.json()
+        if file_id:
+            print(f"♻️ Reutilizando file_id do Telegram (sem upload)")
+            resultado = _postar_documento(url, {**data, 'document': file_id}, timeout=10)
             
-            if response_data.get('ok'):
-                message_id = response_data.get('result', {}).get('message_id')
-                print(f"✅ Telegram com anexo enviado - Message ID: {message_id}")
+            if resultado['ok']:
+                _estatisticas_file_id['envios_por_referencia'] += 1
+                print(f"✅ Telegram com anexo enviado (file_id) - Message ID: {resultado['message_id']}")
                 return True
-            else:
-                error_description = response_data.get('description', 'Erro desconhecido')
-                print(f"❌ Telegram API erro: {error_description}")
+            
+            if not resultado['file_id_invalido']:
                 return False
-        else:
-            print(f"❌ Telegram HTTP erro: {response.status_code}")
-            try:
-                error_data = response.json()
-                print(f"   Detalhes: {error_data}")
-            except:
-                print(f"   Resposta: {response.text[:200]}")
+            
+            # file_id recusado pelo Telegram: descartar e refazer o upload
+            print(f"⚠️ file_id recusado - reenviando arquivo")
+            _remover_file_id_cache(chave)
+            _estatisticas_file_id['file_ids_invalidos'] += 1
+        
+        # 4. Upload do arquivo (timeout maior)
+        pdf_file = io.BytesIO(pdf_bytes)
+        pdf_file.name = nome_arquivo
+        
+        try:
+            print(f"📤 Enviando documento via sendDocument...")
+            resultado = _postar_documento(
+                url, data, files={'document': (nome_arquivo, pdf_file, 'application/pdf')}, timeout=180
+            )
+        finally:
+            # Limpar arquivo da memória
+            pdf_file.close()
+        
+        if not resultado['ok']:
             return False
+        
+        _estatisticas_file_id['uploads'] += 1
+        if resultado['file_id']:
+            _guardar_file_id_cache(chave, resultado['file_id'])
+        
+        print(f"✅ Telegram com anexo enviado - Message ID: {resultado['message_id']}")
+        return True
             
     except requests.exceptions.Timeout:
         print(f"❌ Timeout enviando Telegram com anexo para {user_id}")
@@ -169,23 +302,159 @@ def enviar_telegram_com_anexo(user_id, mensagem, pdf_bytes, nome_arquivo):
     except Exception as e:
         print(f"❌ Erro inesperado enviando Telegram com anexo: {e}")
         return False
-    finally:
-        # Limpar arquivo da memória
+
+def enviar_telegram_grupo_documentos(user_id, documentos):
+    """
+    Envia vários PDFs como media group (sendMediaGroup, até 10 por grupo).
+    Documentos com file_id em cache vão por referência; os demais são enviados
+    (upload) e têm o file_id guardado.
+    
+    Args:
+        user_id (str/int): ID do usuário Telegram
+        documentos (list): [{'pdf_bytes', 'nome_arquivo', 'chave_arquivo'}]
+    
+    Returns:
+        bool: True se todos os grupos foram entregues
+    """
+    bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
+    if not bot_token:
+        print(f"❌ TELEGRAM_BOT_TOKEN não configurado")
+        return False
+    
+    url = url_api_telegram(bot_token, "sendMediaGroup")
+    tudo_ok = True
+    
+    for inicio in range(0, len(documentos), LIMITE_MEDIA_GROUP):
+        grupo = documentos[inicio:inicio + LIMITE_MEDIA_GROUP]
+        
+        # Telegram exige 2+ itens no media group: 1 documento vai por sendDocument
+        if len(grupo) == 1:
+            doc = grupo[0]
+            tudo_ok &= enviar_telegram_com_anexo(user_id, "", doc['pdf_bytes'], doc['nome_arquivo'], doc.get('chave_arquivo'))
+            continue
+        
+        media = []
+        files = {}
+        chaves = []
+        for i, doc in enumerate(grupo):
+            chave = doc.get('chave_arquivo') or hashlib.sha256(doc['pdf_bytes']).hexdigest()
+            chaves.append(chave)
+            file_id = obter_file_id_cache(chave)
+            
+            if file_id:
+                media.append({'type': 'document', 'media': file_id})
+            else:
+                campo = f"arquivo{i}"
+                files[campo] = (doc['nome_arquivo'], io.BytesIO(doc['pdf_bytes']), 'application/pdf')
+                media.append({'type': 'document', 'media': f"attach://{campo}"})
+        
         try:
-            if 'pdf_file' in locals():
-                pdf_file.close()
-        except:
-            pass
+            print(f"📤 Enviando grupo de {len(grupo)} PDF(s) para {user_id} ({len(files)} upload(s))...")
+            response = _post_telegram(url, {'chat_id': user_id, 'media': json.dumps(media)},
+                                      files=files or None, timeout=180)
+            response_data = response.json() if response.status_code == 200 else {}
+            
+            if not response_data.get('ok'):
+                print(f"❌ Telegram sendMediaGroup falhou: HTTP {response.status_code}")
+                tudo_ok = False
+                continue
+            
+            _estatisticas_file_id['uploads'] += len(files)
+            _estatisticas_file_id['envios_por_referencia'] += len(grupo) - len(files)
+            
+            for chave, mensagem_enviada in zip(chaves, response_data.get('result', [])):
+                file_id = mensagem_enviada.get('document', {}).get('file_id')
+                if file_id:
+                    _guardar_file_id_cache(chave, file_id)
+            
+            print(f"✅ Grupo de {len(grupo)} PDF(s) enviado")
+            
+        except Exception as e:
+            print(f"❌ Erro enviando grupo de documentos: {e}")
+            tudo_ok = False
+        finally:
+            for arquivo in files.values():
+                arquivo[1].close()
+    
+    return bool(tudo_ok)
 
-def enviar_telegram_bulk(user_ids, mensagem, delay_segundos=1):
+def _postar_documento(url, data, files=None, timeout=180):
     """
-    Enviar mensagem para múltiplos usuários com delay
-    Evita rate limiting do Telegram
+    POST sendDocument e interpretação da resposta.
+    
+    Returns:
+        dict: {'ok', 'message_id', 'file_id', 'file_id_invalido'}
+    """
+    response = _post_telegram(url, data, files=files, timeout=timeout)
+    
+    resultado = {'ok': False, 'message_id': None, 'file_id': None, 'file_id_invalido': False}
+    
+    try:
+        response_data = response.json()
+    except ValueError:
+        response_data = {}
+    
+    if response.status_code == 200 and response_data.get('ok'):
+        mensagem_enviada = response_data.get('result', {})
+        resultado['ok'] = True
+        resultado['message_id'] = mensagem_enviada.get('message_id')
+        resultado['file_id'] = mensagem_enviada.get('document', {}).get('file_id')
+        return resultado
+    
+    if response.status_code == 200:
+        print(f"❌ Telegram API erro: {response_data.get('description', 'Erro desconhecido')}")
+    else:
+        print(f"❌ Telegram HTTP erro: {response.status_code}")
+        print(f"   Detalhes: {response_data or response.text[:200]}")
+    
+    # "wrong file identifier" em envio por referência = file_id expirado/de outro bot
+    descricao = str(response_data.get('description', '')).lower()
+    resultado['file_id_invalido'] = response.status_code == 400 and not files and 'file' in descricao
+    return resultado
+
+# ============================================================================
+# CACHE file_id (hash_arquivo → file_id do Telegram)
+# ============================================================================
+
+LIMITE_CACHE_FILE_ID = int(os.getenv("TELEGRAM_CACHE_FILE_ID_MAX", "500"))
+
+_cache_file_ids = OrderedDict()
+_lock_cache_file_ids = threading.Lock()
+_estatisticas_file_id = {'uploads': 0, 'envios_por_referencia': 0, 'file_ids_invalidos': 0}
+
+def obter_file_id_cache(chave):
+    """file_id já devolvido pelo Telegram para este arquivo (ou None)."""
+    with _lock_cache_file_ids:
+        file_id = _cache_file_ids.get(chave)
+        if file_id:
+            _cache_file_ids.move_to_end(chave)
+        return file_id
+
+def _guardar_file_id_cache(chave, file_id):
+    with _lock_cache_file_ids:
+        _cache_file_ids[chave] = file_id
+        _cache_file_ids.move_to_end(chave)
+        while len(_cache_file_ids) > LIMITE_CACHE_FILE_ID:
+            _cache_file_ids.popitem(last=False)
+
+def _remover_file_id_cache(chave):
+    with _lock_cache_file_ids:
+        _cache_file_ids.pop(chave, None)
+
+def obter_estatisticas_file_id():
+    """Uploads reais vs. envios por referência (economia de banda)."""
+    with _lock_cache_file_ids:
+        return {**_estatisticas_file_id, 'file_ids_em_cache': len(_cache_file_ids)}
+
+def enviar_telegram_bulk(user_ids, mensagem, delay_segundos=None):
+    """
+    Enviar mensagem para múltiplos usuários em paralelo
+    Rate limiting pelo limitador (token bucket global + intervalo por chat)
     
     Args:
         user_ids (list): Lista de IDs dos usuários
         mensagem (str): Mensagem para envio
-        delay_segundos (int): Delay entre envios (padrão: 1 segundo)
+        delay_segundos: ignorado (mantido por compatibilidade)
     
     Returns:
         dict: Resultado detalhado dos envios
@@ -193,42 +462,10 @@ def enviar_telegram_bulk(user_ids, mensagem, delay_segundos=1):
     try:
         print(f"📱 Enviando Telegram em lote para {len(user_ids)} usuários")
         
-        sucessos = 0
-        falhas = 0
-        detalhes = []
-        
-        for i, user_id in enumerate(user_ids, 1):
-            print(f"📤 Enviando {i}/{len(user_ids)} para user_id: {user_id}")
-            
-            sucesso = enviar_telegram(user_id, mensagem)
-            
-            if sucesso:
-                sucessos += 1
-                detalhes.append({'user_id': user_id, 'status': 'sucesso'})
-                print(f"✅ {i}/{len(user_ids)}: Sucesso")
-            else:
-                falhas += 1
-                detalhes.append({'user_id': user_id, 'status': 'falha'})
-                print(f"❌ {i}/{len(user_ids)}: Falha")
-            
-            # Delay entre envios (exceto no último)
-            if i < len(user_ids) and delay_segundos > 0:
-                print(f"⏱️ Aguardando {delay_segundos}s...")
-                time.sleep(delay_segundos)
-        
-        resultado = {
-            'total_usuarios': len(user_ids),
-            'sucessos': sucessos,
-            'falhas': falhas,
-            'taxa_sucesso': (sucessos / len(user_ids)) * 100 if user_ids else 0,
-            'detalhes': detalhes
-        }
+        resultado = _executar_envio_lote(user_ids, lambda user_id: enviar_telegram(user_id, mensagem))
         
         print(f"📊 RESULTADO BULK TELEGRAM:")
-        print(f"   👥 Total usuários: {resultado['total_usuarios']}")
-        print(f"   ✅ Sucessos: {resultado['sucessos']}")
-        print(f"   ❌ Falhas: {resultado['falhas']}")
-        print(f"   📈 Taxa sucesso: {resultado['taxa_sucesso']:.1f}%")
+        _imprimir_resultado_lote(resultado)
         
         return resultado
         
@@ -242,16 +479,19 @@ def enviar_telegram_bulk(user_ids, mensagem, delay_segundos=1):
             'erro': str(e)
         }
 
-def enviar_telegram_bulk_com_anexo(user_ids, mensagem, pdf_bytes, nome_arquivo, delay_segundos=2):
+def enviar_telegram_bulk_com_anexo(user_ids, mensagem, pdf_bytes, nome_arquivo, delay_segundos=None):
     """
     🆕 FUNÇÃO: Enviar mensagem + PDF para múltiplos usuários
     
+    O primeiro envio faz o upload (e captura o file_id); os demais saem em
+    paralelo por referência.
+    
     Args:
         user_ids (list): Lista de IDs dos usuários
         mensagem (str): Mensagem para envio
         pdf_bytes (bytes): Conteúdo do PDF
         nome_arquivo (str): Nome do arquivo PDF
-        delay_segundos (int): Delay entre envios (padrão: 2 segundos para documentos)
+        delay_segundos: ignorado (mantido por compatibilidade)
     
     Returns:
         dict: Resultado detalhado dos envios
@@ -259,42 +499,17 @@ def enviar_telegram_bulk_com_anexo(user_ids, mensagem, pdf_bytes, nome_arquivo,
     try:
         print(f"📎 Enviando Telegram com anexo em lote para {len(user_ids)} usuários")
         
-        sucessos = 0
-        falhas = 0
-        detalhes = []
+        # Upload uma vez; demais usuários recebem por file_id
+        chave_arquivo = hashlib.sha256(pdf_bytes).hexdigest()
         
-        for i, user_id in enumerate(user_ids, 1):
-            print(f"📤 Enviando {i}/{len(user_ids)} para user_id: {user_id}")
-            
-            sucesso = enviar_telegram_com_anexo(user_id, mensagem, pdf_bytes, nome_arquivo)
-            
-            if sucesso:
-                sucessos += 1
-                detalhes.append({'user_id': user_id, 'status': 'sucesso'})
-                print(f"✅ {i}/{len(user_ids)}: Sucesso")
-            else:
-                falhas += 1
-                detalhes.append({'user_id': user_id, 'status': 'falha'})
-                print(f"❌ {i}/{len(user_ids)}: Falha")
-            
-            # Delay entre envios (mais longo para documentos)
-            if i < len(user_ids) and delay_segundos > 0:
-                print(f"⏱️ Aguardando {delay_segundos}s...")
-                time.sleep(delay_segundos)
-        
-        resultado = {
-            'total_usuarios': len(user_ids),
-            'sucessos': sucessos,
-            'falhas': falhas,
-            'taxa_sucesso': (sucessos / len(user_ids)) * 100 if user_ids else 0,
-            'detalhes': detalhes
-        }
+        resultado = _executar_envio_lote(
+            user_ids,
+            lambda user_id: enviar_telegram_com_anexo(user_id, mensagem, pdf_bytes, nome_arquivo, chave_arquivo),
+            primeiro_sequencial=True
+        )
         
         print(f"📊 RESULTADO BULK TELEGRAM COM ANEXO:")
-        print(f"   👥 Total usuários: {resultado['total_usuarios']}")
-        print(f"   ✅ Sucessos: {resultado['sucessos']}")
-        print(f"   ❌ Falhas: {resultado['falhas']}")
-        print(f"   📈 Taxa sucesso: {resultado['taxa_sucesso']:.1f}%")
+        _imprimir_resultado_lote(resultado)
         
         return resultado
         
@@ -308,6 +523,46 @@ def enviar_telegram_bulk_com_anexo(user_ids, mensagem, pdf_bytes, nome_arquivo,
             'erro': str(e)
         }
 
+def _executar_envio_lote(user_ids, enviar, primeiro_sequencial=False):
+    """
+    Executa `enviar(user_id)` para todos os usuários no pool de workers.
+    primeiro_sequencial: o primeiro envio termina antes dos demais (upload → file_id).
+    """
+    inicio = time.time()
+    status = {}
+    
+    pendentes = list(user_ids)
+    if primeiro_sequencial and pendentes:
+        primeiro = pendentes.pop(0)
+        status[0] = enviar(primeiro)
+    
+    deslocamento = len(status)
+    with ThreadPoolExecutor(max_workers=WORKERS_ENVIO) as executor:
+        for i, sucesso in enumerate(executor.map(enviar, pendentes), deslocamento):
+            status[i] = sucesso
+    
+    detalhes = [
+        {'user_id': user_id, 'status': 'sucesso' if status[i] else 'falha'}
+        for i, user_id in enumerate(user_ids)
+    ]
+    sucessos = sum(1 for d in detalhes if d['status'] == 'sucesso')
+    
+    return {
+        'total_usuarios': len(user_ids),
+        'sucessos': sucessos,
+        'falhas': len(user_ids) - sucessos,
+        'taxa_sucesso': (sucessos / len(user_ids)) * 100 if user_ids else 0,
+        'detalhes': detalhes,
+        'tempo_segundos': round(time.time() - inicio, 2)
+    }
+
+def _imprimir_resultado_lote(resultado):
+    print(f"   👥 Total usuários: {resultado['total_usuarios']}")
+    print(f"   ✅ Sucessos: {resultado['sucessos']}")
+    print(f"   ❌ Falhas: {resultado['falhas']}")
+    print(f"   📈 Taxa sucesso: {resultado['taxa_sucesso']:.1f}%")
+    print(f"   ⏱️ Tempo: {resultado['tempo_segundos']}s")
+
 def testar_telegram_bot():
     """
     Testar funcionamento do bot Telegram
@@ -333,7 +588,7 @@ def testar_telegram_bot():
             return False
         
         # Testar info do bot
-        url = f"https://api.telegram.org/bot{bot_token}/getMe"
+        url = url_api_telegram(bot_token, "getMe")
         response = requests.get(url, timeout=10)
         
         if response.status_code == 200:
@@ -440,7 +695,7 @@ def verificar_configuracao_telegram():
         bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
         if bot_token:
             try:
-                url = f"https://api.telegram.org/bot{bot_token}/getMe"
+                url = url_api_telegram(bot_token, "getMe")
                 response = requests.get(url, timeout=5)
                 if response.status_code == 200 and response.json().get('ok'):
                     configuracao['bot_token_valido'] = True
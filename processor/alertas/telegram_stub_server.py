@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🧪 TELEGRAM STUB SERVER - Bot API local para carga e regressão
+📧 FUNÇÃO: Servidor HTTP local que responde como a Bot API do Telegram
+          (getMe, sendMessage, sendDocument, sendMediaGroup) com latência,
+          respostas 429 (retry_after) e falhas configuráveis
+👨‍💼 RESPONSÁVEL: Sidney Gubitoso - Auxiliar Tesouraria Administrativa Mauá
+📁 SALVAR EM: processor/alertas/telegram_stub_server.py
+
+🔧 USO:
+    # Servidor avulso (outro terminal / testes manuais)
+    python -m processor.alertas.telegram_stub_server --porta 8081 --latencia-ms 50 --taxa-429 0.05
+    TELEGRAM_API_BASE_URL=http://127.0.0.1:8081 python app.py
+
+    # Benchmark de vazão do despacho (10/100/1000 alertas)
+    python -m processor.alertas.telegram_stub_server --benchmark
+"""
+
+import io
+import os
+import json
+import time
+import random
+import argparse
+import threading
+import contextlib
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+
+
+class ConfiguracaoStub:
+    """Comportamento do servidor (pode ser alterado com o servidor rodando)."""
+
+    def __init__(self, latencia_ms=0, taxa_429=0.0, retry_after=1, taxa_falha=0.0, semente=None):
+        self.latencia_ms = latencia_ms
+        self.taxa_429 = taxa_429
+        self.retry_after = retry_after
+        self.taxa_falha = taxa_falha
+        self.aleatorio = random.Random(semente)
+
+        self.lock = threading.Lock()
+        self.contadores = {}
+        self.proximo_message_id = 1
+
+    def contar(self, chave):
+        with self.lock:
+            self.contadores[chave] = self.contadores.get(chave, 0) + 1
+
+    def novo_message_id(self):
+        with self.lock:
+            message_id = self.proximo_message_id
+            self.proximo_message_id += 1
+            return message_id
+
+
+class ManipuladorTelegramStub(BaseHTTPRequestHandler):
+    """Rotas /bot<token>/<metodo> no formato de resposta da Bot API."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, formato, *args):
+        pass  # Sem log por requisição (carga)
+
+    def do_GET(self):
+        self._atender()
+
+    def do_POST(self):
+        self._atender()
+
+    def _atender(self):
+        config = self.server.configuracao
+        partes = self.path.split("?")[0].strip("/").split("/")
+
+        if len(partes) != 2 or not partes[0].startswith("bot"):
+            return self._responder(404, {'ok': False, 'error_code': 404, 'description': 'Not Found'})
+
+        metodo = partes[1]
+        campos, arquivos = self._ler_corpo()
+
+        if config.latencia_ms:
+            time.sleep(config.latencia_ms / 1000)
+
+        config.contar(f"requisicoes_{metodo}")
+
+        sorteio = config.aleatorio.random()
+        if sorteio < config.taxa_429:
+            config.contar("respostas_429")
+            return self._responder(429, {
+                'ok': False, 'error_code': 429,
+                'description': f"Too Many Requests: retry after {config.retry_after}",
+                'parameters': {'retry_after': config.retry_after}
+            }, {'Retry-After': str(config.retry_after)})
+
+        if sorteio < config.taxa_429 + config.taxa_falha:
+            config.contar("respostas_falha")
+            return self._responder(500, {'ok': False, 'error_code': 500, 'description': 'Internal Server Error'})
+
+        if metodo == "getMe":
+            return self._responder(200, {'ok': True, 'result': {
+                'id': 1, 'is_bot': True, 'first_name': 'BRK Stub', 'username': 'brk_stub_bot'
+            }})
+
+        if not campos.get('chat_id'):
+            return self._responder(400, {'ok': False, 'error_code': 400, 'description': 'Bad Request: chat_id is empty'})
+
+        if metodo == "sendMessage":
+            config.contar("mensagens")
+            return self._responder(200, {'ok': True, 'result': self._mensagem(campos, text=campos.get('text', ''))})
+
+        if metodo == "sendDocument":
+            documento = self._documento(campos.get('document'), arquivos.get('document'))
+            if documento is None:
+                return self._responder(400, {'ok': False, 'error_code': 400,
+                                             'description': 'Bad Request: wrong file identifier/HTTP URL specified'})
+            config.contar("documentos")
+            return self._responder(200, {'ok': True, 'result': self._mensagem(campos, document=documento)})
+
+        if metodo == "sendMediaGroup":
+            media = json.loads(campos.get('media') or '[]')
+            resultado = []
+            for item in media:
+                referencia = item.get('media', '')
+                anexo = arquivos.get(referencia[len("attach://"):]) if referencia.startswith("attach://") else None
+                documento = self._documento(None if anexo else referencia, anexo)
+                if documento is None:
+                    return self._responder(400, {'ok': False, 'error_code': 400,
+                                                 'description': 'Bad Request: wrong file identifier/HTTP URL specified'})
+                resultado.append(self._mensagem(campos, document=documento))
+            config.contar("documentos")
+            return self._responder(200, {'ok': True, 'result': resultado})
+
+        return self._responder(404, {'ok': False, 'error_code': 404, 'description': 'Not Found: method not found'})
+
+    def _ler_corpo(self):
+        """Campos de formulário + arquivos (urlencoded ou multipart)."""
+        tamanho = int(self.headers.get('Content-Length') or 0)
+        corpo = self.rfile.read(tamanho) if tamanho else b""
+        tipo = self.headers.get('Content-Type', '')
+
+        campos, arquivos = {}, {}
+
+        if tipo.startswith("multipart/form-data"):
+            mensagem = BytesParser(policy=HTTP).parsebytes(
+                f"Content-Type: {tipo}\r\n\r\n".encode() + corpo
+            )
+            for parte in mensagem.iter_parts():
+                nome = parte.get_param('name', header='content-disposition')
+                if parte.get_filename():
+                    arquivos[nome] = parte.get_payload(decode=True)
+                else:
+                    campos[nome] = parte.get_content()
+        else:
+            campos = {k: v[0] for k, v in parse_qs(corpo.decode('utf-8', 'replace')).items()}
+            if '?' in self.path:
+                campos.update({k: v[0] for k, v in parse_qs(self.path.split('?', 1)[1]).items()})
+
+        return campos, arquivos
+
+    def _documento(self, file_id, conteudo):
+        """Documento devolvido pela API: file_id novo no upload, o mesmo por referência."""
+        if conteudo is not None:
+            return {'file_id': f"stub-{self.server.configuracao.novo_message_id()}", 'file_size': len(conteudo)}
+        if file_id and str(file_id).startswith("stub-"):
+            return {'file_id': file_id}
+        return None
+
+    def _mensagem(self, campos, **conteudo):
+        return {
+            'message_id': self.server.configuracao.novo_message_id(),
+            'chat': {'id': campos.get('chat_id')},
+            'date': int(time.time()),
+            **conteudo
+        }
+
+    def _responder(self, status, corpo, headers=None):
+        dados = json.dumps(corpo).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        for nome, valor in (headers or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(dados)
+
+
+def iniciar_servidor_stub(porta=0, host="127.0.0.1", **configuracao):
+    """
+    Sobe o servidor stub numa thread daemon.
+
+    Returns:
+        ThreadingHTTPServer: com .url_base e .configuracao (shutdown() para parar)
+    """
+    servidor = ThreadingHTTPServer((host, porta), ManipuladorTelegramStub)
+    servidor.daemon_threads = True
+    servidor.configuracao = ConfiguracaoStub(**configuracao)
+    servidor.url_base = f"http://{host}:{servidor.server_address[1]}"
+
+    threading.Thread(target=servidor.serve_forever, name="TelegramStubServer", daemon=True).start()
+    print(f"🧪 Telegram stub em {servidor.url_base} (latência {servidor.configuracao.latencia_ms}ms, "
+          f"429 {servidor.configuracao.taxa_429:.0%}, falhas {servidor.configuracao.taxa_falha:.0%})")
+    return servidor
+
+
+def _total_requisicoes(servidor):
+    with servidor.configuracao.lock:
+        return sum(v for k, v in servidor.configuracao.contadores.items() if k.startswith("requisicoes_"))
+
+
+def benchmark_despacho_telegram(quantidades=(10, 100, 1000), latencia_ms=50, taxa_429=0.0,
+                                taxa_falha=0.0, taxa_global=None):
+    """
+    📊 Vazão do despacho Telegram (envio em lote + anexo) contra o servidor stub.
+
+    Returns:
+        list: [{'alertas', 'modo', 'tempo_segundos', 'alertas_por_segundo', 'sucessos', 'requisicoes'}]
+    """
+    from processor.alertas import telegram_sender
+
+    servidor = iniciar_servidor_stub(latencia_ms=latencia_ms, taxa_429=taxa_429,
+                                     taxa_falha=taxa_falha, retry_after=1, semente=42)
+    ambiente_anterior = {k: os.environ.get(k) for k in ("TELEGRAM_API_BASE_URL", "TELEGRAM_BOT_TOKEN")}
+    os.environ["TELEGRAM_API_BASE_URL"] = servidor.url_base
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "000000:stub-benchmark-token")
+
+    pdf_teste = b"%PDF-1.4\n" + b"0" * 150_000
+    resultados = []
+
+    try:
+        for quantidade in quantidades:
+            for modo in ("mensagem", "anexo"):
+                telegram_sender.configurar_limitador(taxa=taxa_global)
+                antes = _total_requisicoes(servidor)
+                user_ids = list(range(100_000, 100_000 + quantidade))
+
+                inicio = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    if modo == "mensagem":
+                        resultado = telegram_sender.enviar_telegram_bulk(user_ids, "🧪 benchmark")
+                    else:
+                        resultado = telegram_sender.enviar_telegram_bulk_com_anexo(
+                            user_ids, "🧪 benchmark", pdf_teste + str(quantidade).encode(), "benchmark.pdf"
+                        )
+                tempo = time.perf_counter() - inicio
+
+                resultados.append({
+                    'alertas': quantidade,
+                    'modo': modo,
+                    'tempo_segundos': round(tempo, 2),
+                    'alertas_por_segundo': round(quantidade / tempo, 1) if tempo else 0,
+                    'sucessos': resultado['sucessos'],
+                    'requisicoes': _total_requisicoes(servidor) - antes
+                })
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+        telegram_sender.configurar_limitador()
+        for chave, valor in ambiente_anterior.items():
+            if valor is None:
+                os.environ.pop(chave, None)
+            else:
+                os.environ[chave] = valor
+
+    print(f"\n📊 BENCHMARK DESPACHO TELEGRAM (stub, latência {latencia_ms}ms, "
+          f"workers {telegram_sender.WORKERS_ENVIO})")
+    print(f"{'alertas':>8} {'modo':>9} {'tempo(s)':>9} {'alertas/s':>10} {'sucessos':>9} {'requisições':>12}")
+    for r in resultados:
+        print(f"{r['alertas']:>8} {r['modo']:>9} {r['tempo_segundos']:>9} {r['alertas_por_segundo']:>10} "
+              f"{r['sucessos']:>9} {r['requisicoes']:>12}")
+    print(f"   📋 respostas: {servidor.configuracao.contadores}")
+
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor stub da Bot API do Telegram")
+    parser.add_argument("--porta", type=int, default=8081)
+    parser.add_argument("--latencia-ms", type=int, default=0)
+    parser.add_argument("--taxa-429", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--taxa-falha", type=float, default=0.0)
+    parser.add_argument("--benchmark", action="store_true", help="mede vazão para 10/100/1000 alertas e sai")
+    parser.add_argument("--quantidades", default="10,100,1000")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark_despacho_telegram(
+            quantidades=[int(q) for q in args.quantidades.split(",")],
+            latencia_ms=args.latencia_ms or 50,
+            taxa_429=args.taxa_429,
+            taxa_falha=args.taxa_falha
+        )
+    else:
+        servidor = iniciar_servidor_stub(
+            porta=args.porta, host="0.0.0.0", latencia_ms=args.latencia_ms,
+            taxa_429=args.taxa_429, retry_after=args.retry_after, taxa_falha=args.taxa_falha
+        )
+        print(f"💡 TELEGRAM_API_BASE_URL={servidor.url_base.replace('0.0.0.0', '127.0.0.1')}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            servidor.shutdown()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📈 ANÁLISE CONSUMO - Classificação histórica vetorizada (NumPy)
+📁 FUNÇÃO: Carregar todo o histórico (cdc, competência, medido_real, media_6m)
+          em arrays e classificar todas as faturas de uma vez, com as MESMAS
+          faixas de determinar_tipo_alerta → série temporal por casa
+👨‍💼 AUTOR: Sidney Gubitoso, auxiliar tesouraria adm maua
+
+🔧 FAIXAS (variação % sobre a média 6M):
+   < -50% Consumo Baixo | até 25% Normal | até 50% Atenção
+   até 100% Alto Consumo (Crítico se ≥5 m³) | acima Crítico (Emergência se ≥10 m³)
+   média zero ou valores ausentes → Consumo Normal
+
+💡 BENCHMARK (vetorizado vs. determinar_tipo_alerta linha a linha):
+   python -m processor.analise_consumo --benchmark 100000
+"""
+
+import io
+import re
+import sys
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+
+try:
+    import numpy as np
+    NUMPY_DISPONIVEL = True
+except ImportError:
+    np = None
+    NUMPY_DISPONIVEL = False
+
+
+CATEGORIAS_CONSUMO = [
+    "Consumo Normal", "Consumo Baixo", "Atenção", "Alto Consumo", "Crítico", "Emergência"
+]
+
+MESES_COMPETENCIA = {
+    'janeiro': 1, 'jan': 1, 'fevereiro': 2, 'fev': 2,
+    'março': 3, 'mar': 3, 'abril': 4, 'abr': 4,
+    'maio': 5, 'mai': 5, 'junho': 6, 'jun': 6,
+    'julho': 7, 'jul': 7, 'agosto': 8, 'ago': 8,
+    'setembro': 9, 'set': 9, 'outubro': 10, 'out': 10,
+    'novembro': 11, 'nov': 11, 'dezembro': 12, 'dez': 12
+}
+
+
+def competencia_para_ano_mes(competencia):
+    """
+    "Julho/2025", "Jul/2025" ou "07/2025" → 202507 (None se não reconhecida).
+    """
+    match = re.match(r'^\s*([A-Za-zçÇ]+|\d{1,2})\s*/\s*(\d{4})\s*$', str(competencia or ''))
+    if not match:
+        return None
+
+    mes_parte, ano = match.group(1).lower(), int(match.group(2))
+    mes = int(mes_parte) if mes_parte.isdigit() else MESES_COMPETENCIA.get(mes_parte)
+
+    if not mes or not 1 <= mes <= 12:
+        return None
+    return ano * 100 + mes
+
+
+def classificar_consumo_vetorizado(medido_real, media_6m):
+    """
+    Classifica arrays inteiros de consumo (mesma regra de determinar_tipo_alerta).
+
+    Args:
+        medido_real, media_6m: sequências numéricas (None/NaN = ausente)
+
+    Returns:
+        tuple: (variacao_percentual float64 - NaN sem média, categorias array de str)
+    """
+    medido = np.asarray(medido_real, dtype=float)
+    media = np.asarray(media_6m, dtype=float)
+
+    validos = np.isfinite(medido) & np.isfinite(media) & (media != 0)
+
+    variacao_absoluta = medido - media
+    variacao = np.full(medido.shape, np.nan)
+    np.divide(variacao_absoluta * 100, media, out=variacao, where=validos)
+
+    condicoes = [
+        ~validos,
+        variacao < -50,
+        variacao <= 25,
+        variacao <= 50,
+        (variacao <= 100) & (variacao_absoluta >= 5),
+        variacao <= 100,
+        variacao_absoluta >= 10,
+    ]
+    indices = np.select(condicoes, [0, 1, 0, 2, 4, 3, 5], default=4)
+
+    return variacao, np.asarray(CATEGORIAS_CONSUMO, dtype=object)[indices]
+
+
+def carregar_historico_consumo(conn):
+    """
+    Histórico de consumo (faturas NORMAL) direto do SQLite em arrays NumPy.
+
+    Returns:
+        dict de arrays: cdc, casa_oracao, competencia, ano_mes, medido_real, media_6m
+    """
+    linhas = conn.execute("""
+        SELECT cdc, casa_oracao, competencia,
+               CAST(medido_real AS REAL), CAST(media_6m AS REAL)
+        FROM faturas_brk
+        WHERE status_duplicata = 'NORMAL'
+    """).fetchall()
+
+    if linhas:
+        cdc, casa, competencia, medido, media = zip(*linhas)
+    else:
+        cdc = casa = competencia = medido = media = ()
+
+    competencias = np.asarray(competencia, dtype=object)
+
+    # Poucas competências distintas: converte cada uma uma vez só
+    unicas, inverso = np.unique(competencias.astype(str), return_inverse=True)
+    ano_mes_unicas = np.array([competencia_para_ano_mes(c) or 0 for c in unicas], dtype=np.int64)
+
+    return {
+        'cdc': np.asarray(cdc, dtype=object),
+        'casa_oracao': np.asarray(casa, dtype=object),
+        'competencia': competencias,
+        'ano_mes': ano_mes_unicas[inverso] if len(unicas) else np.zeros(0, dtype=np.int64),
+        'medido_real': np.asarray(medido, dtype=float),
+        'media_6m': np.asarray(media, dtype=float),
+    }
+
+
+def analisar_historico_consumo(conn, casa=None, cdc=None):
+    """
+    Classificação de todo o histórico + série temporal por casa.
+
+    Args:
+        conn: conexão SQLite com faturas_brk (DatabaseBRK.conn)
+        casa: filtro opcional (trecho do nome da casa, sem diferenciar maiúsculas)
+        cdc: filtro opcional (CDC exato)
+
+    Returns:
+        dict: {'status', 'total_faturas', 'distribuicao', 'casas': [...], 'tempo_segundos'}
+    """
+    if not NUMPY_DISPONIVEL:
+        return {'status': 'erro', 'mensagem': 'numpy não instalado'}
+
+    try:
+        inicio = time.perf_counter()
+        historico = carregar_historico_consumo(conn)
+
+        filtro = np.ones(len(historico['cdc']), dtype=bool)
+        if cdc:
+            filtro &= historico['cdc'] == cdc
+        if casa:
+            casa_lower = casa.lower()
+            filtro &= np.array([casa_lower in str(c or '').lower() for c in historico['casa_oracao']], dtype=bool)
+        historico = {campo: valores[filtro] for campo, valores in historico.items()}
+
+        variacao, categorias = classificar_consumo_vetorizado(historico['medido_real'], historico['media_6m'])
+
+        nomes, contagens = np.unique(categorias.astype(str), return_counts=True)
+        distribuicao = {categoria: 0 for categoria in CATEGORIAS_CONSUMO}
+        distribuicao.update({str(n): int(c) for n, c in zip(nomes, contagens)})
+
+        casas = _montar_series_por_casa(historico, variacao, categorias)
+
+        tempo = time.perf_counter() - inicio
+        print(f"📈 Análise consumo: {len(categorias)} faturas, {len(casas)} casas em {tempo:.3f}s")
+
+        return {
+            'status': 'sucesso',
+            'total_faturas': int(len(categorias)),
+            'distribuicao': distribuicao,
+            'casas': casas,
+            'tempo_segundos': round(tempo, 3),
+            'timestamp': datetime.now().isoformat()
+        }
+
+    except Exception as e:
+        print(f"❌ Erro na análise de consumo: {e}")
+        return {'status': 'erro', 'mensagem': str(e)}
+
+
+def _montar_series_por_casa(historico, variacao, categorias):
+    """Agrupa por casa (CDC se sem nome) em ordem de competência."""
+    if not len(categorias):
+        return []
+
+    chaves = np.array([
+        str(casa or '') or str(cdc or '') for casa, cdc in zip(historico['casa_oracao'], historico['cdc'])
+    ], dtype=object)
+    ordem = np.lexsort((historico['ano_mes'], chaves))
+    chaves_ordenadas = chaves[ordem]
+    inicios = np.flatnonzero(np.r_[True, chaves_ordenadas[1:] != chaves_ordenadas[:-1]])
+
+    casas = []
+    for indices in np.split(ordem, inicios[1:]):
+        serie = [
+            {
+                'competencia': historico['competencia'][i],
+                'ano_mes': int(historico['ano_mes'][i]) or None,
+                'medido_real': _numero_json(historico['medido_real'][i]),
+                'media_6m': _numero_json(historico['media_6m'][i]),
+                'variacao_percentual': _numero_json(round(float(variacao[i]), 1)),
+                'tipo_alerta': categorias[i],
+            }
+            for i in indices
+        ]
+        casas.append({
+            'casa_oracao': historico['casa_oracao'][indices[0]],
+            'cdc': historico['cdc'][indices[0]],
+            'ultimo_tipo_alerta': serie[-1]['tipo_alerta'],
+            'qtd_alertas': sum(1 for p in serie if p['tipo_alerta'] != "Consumo Normal"),
+            'serie': serie,
+        })
+
+    return casas
+
+
+def _numero_json(valor):
+    """NaN → None (JSON válido)."""
+    valor = float(valor)
+    return None if valor != valor else valor
+
+
+def benchmark_classificacao(quantidade=100000, semente=42):
+    """
+    Vetorizado vs. determinar_tipo_alerta linha a linha em dados sintéticos.
+
+    Returns:
+        dict: tempos, speedup e quantas classificações divergem (esperado 0)
+    """
+    from processor.alertas.message_formatter import determinar_tipo_alerta
+
+    rng = np.random.default_rng(semente)
+    media = rng.integers(0, 60, quantidade).astype(float)
+    medido = np.round(media * rng.lognormal(0.0, 0.6, quantidade))
+
+    inicio = time.perf_counter()
+    _, categorias = classificar_consumo_vetorizado(medido, media)
+    tempo_vetorizado = time.perf_counter() - inicio
+
+    # A função original imprime 3 linhas por fatura: saída descartada
+    inicio = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        por_linha = [
+            determinar_tipo_alerta({'medido_real': m, 'media_6m': md})
+            for m, md in zip(medido.tolist(), media.tolist())
+        ]
+    tempo_por_linha = time.perf_counter() - inicio
+
+    divergencias = int(np.count_nonzero(categorias != np.asarray(por_linha, dtype=object)))
+
+    resultado = {
+        'quantidade': quantidade,
+        'tempo_vetorizado_segundos': round(tempo_vetorizado, 4),
+        'tempo_por_linha_segundos': round(tempo_por_linha, 4),
+        'speedup': round(tempo_por_linha / tempo_vetorizado, 1) if tempo_vetorizado else None,
+        'divergencias': divergencias,
+    }
+
+    print(f"\n📊 BENCHMARK CLASSIFICAÇÃO ({quantidade} faturas)")
+    print(f"   ⚡ Vetorizado: {tempo_vetorizado:.4f}s")
+    print(f"   🐢 Linha a linha: {tempo_por_linha:.4f}s")
+    print(f"   🚀 Speedup: {resultado['speedup']}x")
+    print(f"   {'✅' if divergencias == 0 else '❌'} Divergências: {divergencias}")
+
+    return resultado
+
+
+if __name__ == "__main__":
+    if not NUMPY_DISPONIVEL:
+        print("❌ numpy não instalado")
+        sys.exit(1)
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark":
+        benchmark_classificacao(int(sys.argv[2]) if len(sys.argv) > 2 else 100000)
+    else:
+        print("Uso: python -m processor.analise_consumo --benchmark [quantidade]")
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📚 BASELINE CONSUMO - Linha de base sazonal por CDC a partir do histórico
+📁 FUNÇÃO: Tabela baseline_consumo (uma linha por CDC) atualizada na MESMA
+          transação do INSERT da fatura: janela dos últimos 13 meses de
+          medido_real + média, mediana, MAD e mesmo mês do ano anterior
+👨‍💼 AUTOR: Sidney Gubitoso, auxiliar tesouraria adm maua
+
+🔧 LÓGICA:
+   1. Fatura NORMAL inserida → snapshot da linha de base dos 12 meses ANTERIORES
+      à competência vai para dados_fatura['baseline_consumo'] (e para o outbox)
+   2. Em seguida a competência entra na janela do CDC (no máximo 13 meses)
+   3. ALERTA_MODO_BASELINE=historico → determinar_tipo_alerta usa o snapshot
+      (O(1) por fatura, sem varrer o histórico); com menos de
+      BASELINE_MESES_MINIMOS (6) meses continua valendo a Média 6M da BRK
+
+💡 RECONSTRUIR A PARTIR DO HISTÓRICO:
+   python -m processor.baseline_consumo /caminho/database_brk.db
+"""
+
+import os
+import sys
+import json
+import statistics
+
+JANELA_MESES = 12
+MAD_PARA_DESVIO = 1.4826  # MAD → desvio padrão equivalente (distribuição normal)
+
+
+def modo_baseline_historico():
+    """ALERTA_MODO_BASELINE=historico (padrão media6m: Média 6M impressa na fatura)."""
+    return os.getenv("ALERTA_MODO_BASELINE", "media6m").lower() == "historico"
+
+
+def meses_minimos_baseline():
+    return int(os.getenv("BASELINE_MESES_MINIMOS", "6"))
+
+
+def _indice_mes(ano_mes):
+    """202507 → contador contínuo de meses (diferença entre competências)."""
+    return (ano_mes // 100) * 12 + (ano_mes % 100) - 1
+
+
+def _proximo_ano_mes(ano_mes):
+    ano, mes = divmod(ano_mes, 100)
+    return (ano + 1) * 100 + 1 if mes == 12 else ano_mes + 1
+
+
+def _ano_mes_competencia(competencia):
+    from processor.analise_consumo import competencia_para_ano_mes
+    return competencia_para_ano_mes(competencia)
+
+
+def _consumo(valor):
+    try:
+        return float(valor) if valor not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+def calcular_estatisticas(historico, ano_mes):
+    """
+    Linha de base para a competência ano_mes a partir da janela do CDC.
+
+    Args:
+        historico: [[ano_mes, medido_real], ...] ordenado
+        ano_mes: competência avaliada (só meses anteriores entram)
+
+    Returns:
+        dict: qtd_meses, media, mediana, mad, mesmo_mes_ano_anterior
+    """
+    indice = _indice_mes(ano_mes)
+    valores = [medido for am, medido in historico if 0 < indice - _indice_mes(am) <= JANELA_MESES]
+    mesmo_mes = next((medido for am, medido in historico if am == ano_mes - 100), None)
+
+    if not valores:
+        return {'qtd_meses': 0, 'media': None, 'mediana': None, 'mad': None,
+                'mesmo_mes_ano_anterior': mesmo_mes}
+
+    mediana = statistics.median(valores)
+    return {
+        'qtd_meses': len(valores),
+        'media': round(statistics.fmean(valores), 2),
+        'mediana': mediana,
+        'mad': statistics.median(abs(v - mediana) for v in valores),
+        'mesmo_mes_ano_anterior': mesmo_mes,
+    }
+
+
+def registrar_consumo_baseline(cursor, cdc, competencia, medido_real, casa_oracao=None):
+    """
+    Atualiza a janela do CDC (sem commit - mesma transação do INSERT da fatura).
+
+    Returns:
+        dict: snapshot da linha de base ANTERIOR a esta competência
+              (+ 'ano_mes'), ou None se CDC/competência/consumo inválidos
+    """
+    ano_mes = _ano_mes_competencia(competencia)
+    medido = _consumo(medido_real)
+    if not cdc or not ano_mes or medido is None:
+        return None
+
+    linha = cursor.execute(
+        "SELECT historico_json FROM baseline_consumo WHERE cdc = ?", (cdc,)
+    ).fetchone()
+    historico = json.loads(linha[0]) if linha else []
+
+    snapshot = {'ano_mes': ano_mes, **calcular_estatisticas(historico, ano_mes)}
+
+    # Competência repetida (refaturamento) substitui o valor anterior
+    historico = [[am, v] for am, v in historico if am != ano_mes]
+    historico.append([ano_mes, medido])
+    historico.sort()
+
+    # Mantém 13 meses: 12 da janela + o mesmo mês do ano anterior
+    ultimo = _indice_mes(historico[-1][0])
+    historico = [[am, v] for am, v in historico if ultimo - _indice_mes(am) <= JANELA_MESES]
+
+    # Colunas de consulta: 12 meses até a competência mais recente
+    atual = calcular_estatisticas(historico, _proximo_ano_mes(historico[-1][0]))
+    cursor.execute("""
+        INSERT INTO baseline_consumo
+            (cdc, casa_oracao, historico_json, qtd_meses, media, mediana, mad, ultimo_ano_mes, atualizado_em)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(cdc) DO UPDATE SET
+            casa_oracao = COALESCE(excluded.casa_oracao, casa_oracao),
+            historico_json = excluded.historico_json,
+            qtd_meses = excluded.qtd_meses,
+            media = excluded.media,
+            mediana = excluded.mediana,
+            mad = excluded.mad,
+            ultimo_ano_mes = excluded.ultimo_ano_mes,
+            atualizado_em = CURRENT_TIMESTAMP
+    """, (cdc, casa_oracao or None, json.dumps(historico), atual['qtd_meses'],
+          atual['media'], atual['mediana'], atual['mad'], historico[-1][0]))
+
+    return snapshot
+
+
+def tipo_alerta_historico(dados_fatura):
+    """
+    Tipo de alerta pela linha de base do próprio CDC (mesmas categorias da Média 6M).
+
+    Desvio robusto z = (medido - referência) / (1,4826 × MAD), com a referência
+    sendo a mediana de 12 meses ou, se menos anômalo, o mesmo mês do ano anterior
+    (consumo sazonal não vira alerta).
+
+    Returns:
+        str ou None (histórico insuficiente → usar a regra da Média 6M)
+    """
+    baseline = dados_fatura.get('baseline_consumo') or {}
+    medido = _consumo(dados_fatura.get('medido_real'))
+
+    if medido is None or baseline.get('qtd_meses', 0) < meses_minimos_baseline():
+        return None
+
+    mediana = baseline['mediana']
+    escala = max(MAD_PARA_DESVIO * (baseline.get('mad') or 0), 0.1 * mediana, 1.0)
+
+    referencia = mediana
+    mesmo_mes = baseline.get('mesmo_mes_ano_anterior')
+    if mesmo_mes is not None and abs(medido - mesmo_mes) < abs(medido - mediana):
+        referencia = mesmo_mes
+
+    desvio = (medido - referencia) / escala
+    diferenca = medido - referencia
+
+    if desvio < -3 and medido < 0.5 * referencia:
+        return "Consumo Baixo"
+    if desvio <= 2:
+        return "Consumo Normal"
+    if desvio <= 3:
+        return "Atenção"
+    if desvio <= 5:
+        return "Crítico" if diferenca >= 5 else "Alto Consumo"
+    return "Emergência" if diferenca >= 10 else "Crítico"
+
+
+def reconstruir_baselines(conn):
+    """
+    Recalcula baseline_consumo do zero a partir de faturas_brk (NORMAL),
+    na ordem das competências. Usado quando a tabela é criada em database existente.
+
+    Returns:
+        int: quantidade de CDCs com linha de base
+    """
+    linhas = conn.execute("""
+        SELECT cdc, competencia, medido_real, casa_oracao
+        FROM faturas_brk
+        WHERE status_duplicata = 'NORMAL' AND cdc IS NOT NULL AND cdc != ''
+    """).fetchall()
+
+    linhas.sort(key=lambda l: (l[0], _ano_mes_competencia(l[1]) or 0))
+
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM baseline_consumo")
+    for cdc, competencia, medido_real, casa_oracao in linhas:
+        registrar_consumo_baseline(cursor, cdc, competencia, medido_real, casa_oracao)
+    conn.commit()
+
+    total = cursor.execute("SELECT COUNT(*) FROM baseline_consumo").fetchone()[0]
+    print(f"📚 Baseline consumo reconstruída: {total} CDC(s) a partir de {len(linhas)} fatura(s)")
+    return total
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python -m processor.baseline_consumo /caminho/database_brk.db")
+        sys.exit(1)
+
+    import sqlite3
+    from processor.database_brk import SQL_TABELAS_AUXILIARES
+
+    conexao = sqlite3.connect(sys.argv[1])
+    conexao.executescript(SQL_TABELAS_AUXILIARES)
+    reconstruir_baselines(conexao)
+    conexao.close()
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⏱️ BENCHMARK PLANILHA BRK - Geração Excel medida sem OneDrive
+📁 FUNÇÃO: Database faturas_brk sintético + CDC_BRK_CCB.xlsx sintético do
+          tamanho pedido; roda gerar_planilha_mensal (mês a mês) e o caminho
+          em lote do monitor (gerar_planilhas_multiplos_meses) com as chamadas
+          OneDrive respondidas localmente
+👨‍💼 AUTOR: Sidney Gubitoso, auxiliar tesouraria adm maua
+
+🔧 MEDIÇÕES (por cenário):
+   - tempo (melhor de N repetições)
+   - pico de memória Python (tracemalloc, numa execução separada)
+   - tamanho das planilhas geradas
+   - mensal vs. lote: planilha do 1º mês equivalente nos dois caminhos
+
+💡 USO:
+   python -m processor.benchmark_planilha --casas 500 --meses 12
+   python -m processor.benchmark_planilha --salvar referencia.json
+   python -m processor.benchmark_planilha --comparar referencia.json --tolerancia 0.3
+   (com --comparar: código de saída 1 se tempo/memória/tamanho piorarem além da tolerância)
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import tracemalloc
+from contextlib import ExitStack, redirect_stdout
+from unittest import mock
+
+import openpyxl
+
+NOMES_MESES = ["Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", "Julho",
+               "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"]
+DIAS_VENCIMENTO = (10, 15, 20, 25)
+METRICAS_COMPARADAS = ('tempo_segundos', 'pico_memoria_mb', 'tamanho_kb')
+
+# Abaixo disso a variação é ruído de medição, não regressão
+MINIMO_COMPARAVEL = {'tempo_segundos': 0.05, 'pico_memoria_mb': 1.0, 'tamanho_kb': 1.0}
+
+
+# ============================================================================
+# DADOS SINTÉTICOS
+# ============================================================================
+
+def gerar_relacionamento_sintetico(casas):
+    """
+    CDC_BRK_CCB.xlsx sintético (layout lido por _processar_excel_base:
+    A=Casa, B=CDC, E=dia de vencimento). Uma PIA a cada 50 casas.
+
+    Returns:
+        tuple: (bytes do xlsx, [{'cdc', 'casa', 'dia_vencimento'}])
+    """
+    base = [
+        {
+            "cdc": f"{100000 + i}-{i % 10}",
+            "casa": "PIA" if i % 50 == 0 else f"BR 21-{i:04d} - CASA SINTÉTICA {i}",
+            "dia_vencimento": DIAS_VENCIMENTO[i % len(DIAS_VENCIMENTO)],
+        }
+        for i in range(casas)
+    ]
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("CDC_BRK_CCB")
+    ws.append(["Casa", "CDC", "", "", "Dia Vencimento"])
+    for casa in base:
+        ws.append([casa["casa"], casa["cdc"], None, None, casa["dia_vencimento"]])
+
+    saida = io.BytesIO()
+    wb.save(saida)
+    return saida.getvalue(), base
+
+
+def popular_faturas_sinteticas(conn, base, meses, ano, taxa_faltantes=0.05, taxa_duplicatas=0.02,
+                               pdf_kb=10, semente=42):
+    """
+    Faturas de cada casa do relacionamento em cada mês: algumas faltam
+    (taxa_faltantes), algumas chegam de novo como DUPLICATA; content_bytes
+    com pdf_kb KB para o peso real das linhas (SELECT * da planilha mensal).
+
+    Returns:
+        int: faturas inseridas
+    """
+    aleatorio = random.Random(semente)
+    pdf = "J" * (pdf_kb * 1024)
+
+    colunas = ("email_id", "nome_arquivo_original", "nome_arquivo", "hash_arquivo", "status_duplicata",
+               "cdc", "nota_fiscal", "casa_oracao", "data_emissao", "vencimento", "competencia", "valor",
+               "medido_real", "faturado", "media_6m", "porcentagem_consumo", "alerta_consumo", "content_bytes")
+
+    def linhas():
+        for mes in meses:
+            for i, casa in enumerate(base):
+                if aleatorio.random() < taxa_faltantes:
+                    continue
+
+                media = aleatorio.randint(5, 60)
+                medido = max(0, int(media * aleatorio.uniform(0.4, 2.2)))
+                vencimento = f"{casa['dia_vencimento']:02d}/{mes:02d}/{ano}"
+                fatura = [
+                    f"email-{ano}{mes:02d}-{i}", f"fatura_{i}.pdf", f"{mes:02d}-BRK {i}.pdf", None, "NORMAL",
+                    casa["cdc"], str(900000 + i), casa["casa"], f"05/{mes:02d}/{ano}", vencimento,
+                    f"{NOMES_MESES[mes - 1]}/{ano}", f"R$ {aleatorio.uniform(20, 900):.2f}".replace(".", ","),
+                    medido, medido, media, f"{(medido - media) * 100 / media:.1f}%", "Consumo Normal", pdf
+                ]
+                yield fatura
+
+                if aleatorio.random() < taxa_duplicatas:
+                    duplicata = list(fatura)
+                    duplicata[0] += "-dup"
+                    duplicata[4] = "DUPLICATA"
+                    yield duplicata
+
+    cursor = conn.executemany(
+        f"INSERT INTO faturas_brk ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})", linhas()
+    )
+    conn.commit()
+    return cursor.rowcount
+
+
+def criar_database_sintetico(caminho):
+    """DatabaseBRK offline (sem OneDrive) sobre um arquivo SQLite local, com schema completo."""
+    from processor.database_brk import DatabaseBRK
+
+    database = DatabaseBRK.__new__(DatabaseBRK)
+    database.auth = None
+    database.onedrive_brk_id = None
+    database.db_filename = os.path.basename(caminho)
+    database.db_onedrive_id = None
+    database.db_local_cache = caminho
+    database.db_fallback_render = None
+    database.lock_conexao = threading.RLock()
+    database.usando_onedrive = False
+    database.usando_fallback = False
+
+    database.conn = sqlite3.connect(caminho, check_same_thread=False)
+    database.conn.execute("PRAGMA journal_mode=WAL")
+    with redirect_stdout(io.StringIO()):
+        database.verificar_e_corrigir_schema_database()
+
+    return database
+
+
+# ============================================================================
+# ONEDRIVE LOCAL
+# ============================================================================
+
+class _AuthSintetico:
+    """Auth sem token: o ExcelGeneratorBRK só pede headers"""
+
+    def obter_headers_autenticados(self):
+        return {"Authorization": "Bearer benchmark"}
+
+    def tentar_renovar_se_necessario(self, status_code):
+        return False
+
+    def atualizar_token(self):
+        return False
+
+
+class _RespostaOneDrive:
+    """Resposta HTTP mínima (status_code, content, json) para requests.get"""
+
+    def __init__(self, status_code, content=b"", dados=None):
+        self.status_code = status_code
+        self.content = content
+        self._dados = dados or {}
+
+    def json(self):
+        return self._dados
+
+
+def _onedrive_local(relacionamento_xlsx):
+    """requests.get do excel_brk: CDC_BRK_CCB.xlsx (conteúdo ou eTag) servido da memória"""
+
+    def get(url, headers=None, timeout=None, **kwargs):
+        if "CDC_BRK_CCB.xlsx" not in url:
+            return _RespostaOneDrive(404)
+        if "$select=eTag" in url:
+            return _RespostaOneDrive(200, dados={"eTag": '"{benchmark},1"'})
+        return _RespostaOneDrive(200, content=relacionamento_xlsx)
+
+    return get
+
+
+# ============================================================================
+# MEDIÇÃO
+# ============================================================================
+
+def _medir(funcao, repeticoes):
+    """(resultado, melhor tempo, pico tracemalloc) - pico numa execução à parte (tracemalloc distorce o tempo)"""
+    melhor = None
+    resultado = None
+    for _ in range(max(1, repeticoes)):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempo = time.perf_counter() - inicio
+        melhor = tempo if melhor is None else min(melhor, tempo)
+
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return resultado, melhor, pico
+
+
+def benchmark_planilha(casas=500, meses=12, ano=2025, pdf_kb=10, repeticoes=1,
+                       taxa_faltantes=0.05, taxa_duplicatas=0.02, pasta=None):
+    """
+    Mede gerar_planilha_mensal (um mês por chamada) e o lote do monitor
+    (gerar_planilhas_multiplos_meses) sobre dados sintéticos.
+
+    Args:
+        casas: casas no CDC_BRK_CCB.xlsx (≈ faturas por mês)
+        meses: meses de faturas (1..meses do ano)
+        pdf_kb: tamanho do content_bytes de cada fatura
+        repeticoes: execuções cronometradas por cenário (vale a melhor)
+        pasta: onde criar o database (None → pasta temporária removida no fim)
+
+    Returns:
+        dict: {'parametros', 'dados', 'cenarios': {'mensal', 'lote'}, 'equivalente'}
+    """
+    from processor.excel_brk import ExcelGeneratorBRK, _assinatura_planilha
+    from processor.consolidado_anual import consolidado_ativo
+    import processor.database_brk as database_brk
+    import processor.excel_brk as excel_brk
+
+    parametros = {'casas': casas, 'meses': meses, 'ano': ano, 'pdf_kb': pdf_kb, 'repeticoes': repeticoes,
+                  'taxa_faltantes': taxa_faltantes, 'taxa_duplicatas': taxa_duplicatas,
+                  'modo_escrita': os.getenv("EXCEL_MODO_ESCRITA", "streaming").lower(),
+                  'processos': int(os.getenv("EXCEL_PROCESSOS", "0") or 0)}
+    lista_meses = [(mes, ano) for mes in range(1, meses + 1)]
+
+    print(f"\n⏱️ BENCHMARK PLANILHA BRK")
+    print(f"   🏠 {casas} casas | 📅 {meses} mês(es) de {ano} | 📎 PDF {pdf_kb} KB | 🔁 {repeticoes}x")
+
+    pasta_temporaria = pasta is None
+    pasta = pasta or tempfile.mkdtemp(prefix="benchmark_planilha_")
+    caminho_db = os.path.join(pasta, "database_brk_benchmark.db")
+    if os.path.exists(caminho_db):
+        os.remove(caminho_db)
+
+    database = None
+    try:
+        # 1. DADOS SINTÉTICOS
+        inicio = time.perf_counter()
+        relacionamento_xlsx, base = gerar_relacionamento_sintetico(casas)
+        database = criar_database_sintetico(caminho_db)
+        qtd_faturas = popular_faturas_sinteticas(
+            database.conn, base, range(1, meses + 1), ano, taxa_faltantes, taxa_duplicatas, pdf_kb
+        )
+        # WAL: as páginas ficam no -wal até o checkpoint (o .db mediria ~0 MB)
+        with database.lock_conexao:
+            database.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        dados = {
+            'faturas': qtd_faturas,
+            'database_mb': round(os.path.getsize(caminho_db) / 1024 / 1024, 1),
+            'relacionamento_kb': round(len(relacionamento_xlsx) / 1024, 1),
+            'preparo_segundos': round(time.perf_counter() - inicio, 3),
+        }
+        print(f"   🗃️ {qtd_faturas} faturas | database {dados['database_mb']} MB | preparo {dados['preparo_segundos']}s")
+
+        generator = ExcelGeneratorBRK()
+        generator.auth = _AuthSintetico()
+
+        # 2. ONEDRIVE LOCAL: download do relacionamento e DatabaseBRK do processo
+        with ExitStack() as pilha:
+            pilha.enter_context(mock.patch.object(excel_brk.requests, "get", _onedrive_local(relacionamento_xlsx)))
+            pilha.enter_context(mock.patch.object(database_brk, "DatabaseBRK", lambda *args: database))
+            pilha.enter_context(mock.patch.dict(os.environ, {"ONEDRIVE_BRK_ID": "benchmark"}))
+            pilha.enter_context(mock.patch.object(excel_brk.logger, "disabled", True))
+            pilha.enter_context(redirect_stdout(io.StringIO()))
+
+            mensal, tempo_mensal, pico_mensal = _medir(
+                lambda: {(mes, ano): generator.gerar_planilha_mensal(mes, ano) for mes, ano in lista_meses},
+                repeticoes
+            )
+            lote, tempo_lote, pico_lote = _medir(
+                lambda: generator.gerar_planilhas_multiplos_meses(
+                    lista_meses, database=database, com_consolidado=consolidado_ativo()
+                ),
+                repeticoes
+            )
+
+        cenarios = {
+            'mensal': {
+                'tempo_segundos': round(tempo_mensal, 3),
+                'pico_memoria_mb': round(pico_mensal / 1024 / 1024, 1),
+                'tamanho_kb': round(sum(len(p) for p in mensal.values()) / 1024, 1),
+                'planilhas': len(mensal),
+            },
+            'lote': {
+                'tempo_segundos': round(tempo_lote, 3),
+                'pico_memoria_mb': round(pico_lote / 1024 / 1024, 1),
+                'tamanho_kb': round(sum(len(p) for p in lote['planilhas'].values()) / 1024, 1),
+                'planilhas': len(lote['planilhas']),
+                'erros': len(lote['erros']),
+                'tempos': lote['tempos'],
+            },
+        }
+
+        primeiro = lista_meses[0]
+        equivalente = (primeiro in lote['planilhas'] and
+                       _assinatura_planilha(mensal[primeiro]) == _assinatura_planilha(lote['planilhas'][primeiro]))
+
+        for nome, icone in (('mensal', '🐢'), ('lote', '⚡')):
+            c = cenarios[nome]
+            print(f"   {icone} {nome:<6}: {c['tempo_segundos']}s | pico {c['pico_memoria_mb']} MB | "
+                  f"{c['planilhas']} planilha(s), {c['tamanho_kb']} KB")
+        print(f"   ⏱️ Lote por etapa: {lote['tempos']}")
+        print(f"   {'✅' if equivalente else '❌'} {NOMES_MESES[primeiro[0] - 1]}/{ano}: "
+              f"mensal e lote {'equivalentes' if equivalente else 'DIFERENTES'}")
+
+        return {'parametros': parametros, 'dados': dados, 'cenarios': cenarios, 'equivalente': equivalente}
+
+    finally:
+        if database and database.conn:
+            database.conn.close()
+            database.conn = None
+        if pasta_temporaria:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+
+def comparar_com_referencia(resultado, referencia, tolerancia=0.25):
+    """
+    Regressões em relação a um resultado salvo (mesmos parâmetros).
+
+    Returns:
+        list: mensagens de regressão (vazia = ok)
+    """
+    regressoes = []
+
+    if not resultado['equivalente']:
+        regressoes.append("planilha mensal e lote diferentes")
+
+    if referencia.get('parametros') != resultado['parametros']:
+        print(f"⚠️ Parâmetros diferentes da referência - métricas não comparadas")
+        return regressoes
+
+    for cenario, atual in resultado['cenarios'].items():
+        anterior = referencia['cenarios'].get(cenario, {})
+        for metrica in METRICAS_COMPARADAS:
+            if metrica not in anterior:
+                continue
+            limite = max(anterior[metrica], MINIMO_COMPARAVEL[metrica]) * (1 + tolerancia)
+            if atual[metrica] > limite:
+                regressoes.append(f"{cenario}.{metrica}: {anterior[metrica]} → {atual[metrica]} (limite {limite:.3f})")
+
+    return regressoes
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark da geração de planilhas BRK (dados sintéticos)")
+    parser.add_argument("--casas", type=int, default=500, help="Casas no relacionamento (faturas por mês)")
+    parser.add_argument("--meses", type=int, default=12, help="Meses de faturas")
+    parser.add_argument("--ano", type=int, default=2025)
+    parser.add_argument("--pdf-kb", type=int, default=10, help="Tamanho do content_bytes por fatura")
+    parser.add_argument("--repeticoes", type=int, default=1, help="Execuções cronometradas (vale a melhor)")
+    parser.add_argument("--salvar", help="Gravar resultado em JSON (referência)")
+    parser.add_argument("--comparar", help="JSON de referência para detectar regressão")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Piora aceita (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    resultado = benchmark_planilha(args.casas, args.meses, args.ano, args.pdf_kb, args.repeticoes)
+
+    if args.salvar:
+        with open(args.salvar, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+        print(f"💾 Resultado salvo em {args.salvar}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            regressoes = comparar_com_referencia(resultado, json.load(arquivo), args.tolerancia)
+        if regressoes:
+            print(f"❌ {len(regressoes)} regressão(ões):")
+            for regressao in regressoes:
+                print(f"   - {regressao}")
+            sys.exit(1)
+        print(f"✅ Sem regressão (tolerância {args.tolerancia:.0%})")
+
+    sys.exit(0 if resultado['equivalente'] else 1)
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📚 CONSOLIDADO ANUAL - BRK-Consolidado-YYYY.xlsx (resumo + uma aba por mês)
+📁 FUNÇÃO: Cada mês gerado pelo monitor guarda a FOLHA pronta (XML da aba no
+          layout streaming) e seus totais em consolidado_mensal; o workbook do
+          ano só junta as folhas guardadas + aba "Resumo YYYY"
+👨‍💼 AUTOR: Sidney Gubitoso, auxiliar tesouraria adm maua
+
+🔧 LÓGICA:
+   1. Mês gerado → substitui só a sua linha em consolidado_mensal
+   2. Hash do ano (hash de cada mês) igual ao do último envio → nada a fazer
+   3. Senão: workbook com abas vazias e as folhas guardadas trocadas no zip
+      (nenhum mês é regerado) → /BRK/Faturas/YYYY/BRK-Consolidado-YYYY.xlsx,
+      com If-Match no eTag do último envio
+   4. HTTP 412 (editado por outra pessoa) → ALTERADO + aviso ao admin: sem
+      reenvio automático até o arquivo ser apagado/renomeado no OneDrive
+      (409/423 = em uso → PENDENTE, tenta no próximo ciclo)
+
+💡 GERAR LOCALMENTE / BENCHMARK:
+   python -m processor.consolidado_anual /caminho/database_brk.db 2025 saida.xlsx
+   python -m processor.consolidado_anual --benchmark
+"""
+
+import io
+import os
+import sys
+import time
+import zlib
+import hashlib
+import zipfile
+
+FOLHA_MENSAL = "xl/worksheets/sheet1.xml"
+LARGURAS_RESUMO = {'A': 16, 'B': 18, 'C': 12, 'D': 14, 'E': 16, 'F': 16, 'G': 16}
+CABECALHOS_RESUMO = ["Mês", "Faturas recebidas", "Faltantes", "Outros status", "Total PIA", "Total Casas", "Total Geral"]
+CAMPOS_RESUMO = ('qtd_faturas', 'qtd_faltantes', 'qtd_outros', 'total_pia', 'total_casas', 'total_geral')
+
+# 412 no envio: edição de outra pessoa preservada, sem novas tentativas
+STATUS_CONSOLIDADO_ALTERADO = 'ALTERADO'
+
+
+def consolidado_ativo():
+    """PLANILHA_CONSOLIDADA (padrão true)."""
+    return os.getenv("PLANILHA_CONSOLIDADA", "true").lower() in ("1", "true", "sim")
+
+
+def extrair_folha(excel_bytes):
+    """XML da aba de uma planilha mensal gerada em modo streaming."""
+    with zipfile.ZipFile(io.BytesIO(excel_bytes)) as planilha:
+        return planilha.read(FOLHA_MENSAL)
+
+
+def registrar_mes_consolidado(database, mes, ano, folha_xml, resumo):
+    """
+    Substitui a folha e os totais do mês (a folha guardada vai comprimida).
+
+    Returns:
+        bool: True se o conteúdo do mês mudou
+    """
+    hash_folha = hashlib.sha256(folha_xml).hexdigest()
+
+    with database.lock_conexao:
+        anterior = database.conn.execute(
+            "SELECT hash_conteudo FROM consolidado_mensal WHERE ano = ? AND mes = ?", (ano, mes)
+        ).fetchone()
+        if anterior and anterior[0] == hash_folha:
+            return False
+
+        database.conn.execute("""
+            INSERT OR REPLACE INTO consolidado_mensal
+                (ano, mes, folha_xml, hash_conteudo, qtd_faturas, qtd_faltantes, qtd_outros,
+                 total_pia, total_casas, total_geral, atualizado_em)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """, (ano, mes, zlib.compress(folha_xml), hash_folha, *(resumo[campo] for campo in CAMPOS_RESUMO)))
+        database.conn.commit()
+
+    return True
+
+
+def meses_consolidados(database):
+    """{(mes, ano)} com folha guardada."""
+    with database.lock_conexao:
+        return {(mes, ano) for ano, mes in database.conn.execute("SELECT ano, mes FROM consolidado_mensal")}
+
+
+def _hash_ano(meses):
+    """Hash do consolidado a partir do hash de cada mês (sem descomprimir folhas)."""
+    hash_ano = hashlib.sha256()
+    for mes in meses:
+        hash_ano.update(f"{mes['mes']}:{mes['hash_conteudo']}|".encode('utf-8'))
+    return hash_ano.hexdigest()
+
+
+def _meses_do_ano(database, ano, com_folhas=True):
+    colunas = ['mes', 'hash_conteudo', *CAMPOS_RESUMO] + (['folha_xml'] if com_folhas else [])
+
+    with database.lock_conexao:
+        linhas = database.conn.execute(f"""
+            SELECT {', '.join(colunas)} FROM consolidado_mensal
+            WHERE ano = ? ORDER BY mes
+        """, (ano,)).fetchall()
+
+    return [dict(zip(colunas, linha)) for linha in linhas]
+
+
+def montar_workbook_consolidado(ano, meses):
+    """
+    Workbook do ano: aba "Resumo YYYY" gerada agora + abas vazias cujo XML é
+    trocado pelas folhas guardadas (mesmo styles.xml em todas as planilhas streaming).
+
+    Args:
+        meses: [{'mes', 'folha_xml' (zlib), 'qtd_faturas', ..., 'total_geral'}] em ordem
+
+    Returns:
+        bytes: xlsx determinístico
+    """
+    import openpyxl
+    from processor.excel_brk import (
+        ExcelGeneratorBRK, _EscritorLinhasBRK, _criar_estilos_brk, _salvar_xlsx_deterministico
+    )
+
+    nomes_meses = ExcelGeneratorBRK().mes_nomes
+
+    wb = openpyxl.Workbook(write_only=True)
+    for estilo in _criar_estilos_brk():
+        wb.add_named_style(estilo)
+
+    ws = wb.create_sheet(f"Resumo {ano}")
+    for coluna, largura in LARGURAS_RESUMO.items():
+        ws.column_dimensions[coluna].width = largura
+
+    escritor = _EscritorLinhasBRK(ws)
+    escritor.linha_mesclada(f"📊 CONSOLIDADO BRK - {ano}", "brk_titulo", ultima_coluna="G")
+    escritor.vazias(1)
+    escritor.linha(CABECALHOS_RESUMO, "brk_cabecalho")
+
+    totais = dict.fromkeys(CAMPOS_RESUMO, 0)
+    for mes in meses:
+        escritor.linha([nomes_meses[mes['mes']], *_valores_resumo(mes)], "brk_dado", estilo_vazio="brk_dado")
+        for campo in CAMPOS_RESUMO:
+            totais[campo] += mes[campo]
+
+    escritor.linha([f"TOTAL {ano}", *_valores_resumo(totais)], "brk_total", estilo_vazio="brk_total")
+
+    # Abas dos meses: vazias aqui, conteúdo vem pronto do database
+    substituicoes = {}
+    for posicao, mes in enumerate(meses, start=2):
+        wb.create_sheet(nomes_meses[mes['mes']])
+        substituicoes[f"xl/worksheets/sheet{posicao}.xml"] = zlib.decompress(mes['folha_xml'])
+
+    return _salvar_xlsx_deterministico(wb, 1, ano, substituicoes)
+
+
+def _valores_resumo(linha):
+    return [
+        linha['qtd_faturas'], linha['qtd_faltantes'], linha['qtd_outros'],
+        *(f"R$ {linha[campo]:.2f}".replace(".", ",") for campo in ('total_pia', 'total_casas', 'total_geral'))
+    ]
+
+
+def montar_consolidado_anual(database, ano):
+    """
+    Returns:
+        tuple: (xlsx bytes, hash do ano, qtd_meses) - (None, None, 0) sem meses guardados
+    """
+    meses = _meses_do_ano(database, ano)
+    if not meses:
+        return None, None, 0
+    return montar_workbook_consolidado(ano, meses), _hash_ano(meses), len(meses)
+
+
+def atualizar_consolidados(auth_manager, database):
+    """
+    Reenvia o consolidado dos anos cujo hash mudou (ou cujo último envio falhou).
+    Ano ALTERADO (412) só volta a ser enviado quando o arquivo some do OneDrive.
+
+    Returns:
+        dict: {'enviados', 'sem_alteracao', 'com_erro', 'alterados', 'tempo_segundos'}
+    """
+    from processor.planilha_backup import (
+        tentar_salvar_principal, obter_etag_planilha, notificar_planilha_bloqueada, STATUS_ALTERADA
+    )
+
+    inicio = time.perf_counter()
+    relatorio = {'enviados': 0, 'sem_alteracao': 0, 'com_erro': 0, 'alterados': 0}
+
+    with database.lock_conexao:
+        anos = [linha[0] for linha in database.conn.execute(
+            "SELECT DISTINCT ano FROM consolidado_mensal ORDER BY ano"
+        )]
+
+    for ano in anos:
+        pasta_destino = f"/BRK/Faturas/{ano}/"
+        nome_arquivo = f"BRK-Consolidado-{ano}.xlsx"
+        try:
+            with database.lock_conexao:
+                estado = database.conn.execute(
+                    "SELECT hash_conteudo, status, etag FROM consolidado_anual WHERE ano = ?", (ano,)
+                ).fetchone()
+
+            if estado and estado[1] == 'OK' and estado[0] == _hash_ano(_meses_do_ano(database, ano, com_folhas=False)):
+                relatorio['sem_alteracao'] += 1
+                continue
+
+            # Editado por outra pessoa: só metadados até o arquivo ser apagado/renomeado
+            alterado_antes = bool(estado) and estado[1] == STATUS_CONSOLIDADO_ALTERADO
+            if alterado_antes:
+                if obter_etag_planilha(auth_manager, f"{pasta_destino}{nome_arquivo}") is not None:
+                    relatorio['alterados'] += 1
+                    print(f"✋ {nome_arquivo} editado por outra pessoa - não sobrescrito")
+                    continue
+                print(f"♻️ {nome_arquivo} removido do OneDrive - recriando")
+
+            dados, hash_ano, qtd_meses = montar_consolidado_anual(database, ano)
+            print(f"📚 Consolidado {ano}: {qtd_meses} mês(es), {len(dados)} bytes")
+
+            resultado = tentar_salvar_principal(
+                auth_manager, dados, pasta_destino, nome_arquivo, estado[2] if estado else None
+            )
+            alterado = resultado['status_http'] == STATUS_ALTERADA
+            if resultado['sucesso']:
+                status = 'OK'
+            elif alterado:
+                status = STATUS_CONSOLIDADO_ALTERADO
+            else:
+                status = 'PENDENTE'
+
+            with database.lock_conexao:
+                database.conn.execute("""
+                    INSERT INTO consolidado_anual
+                        (ano, hash_conteudo, status, etag, tamanho_bytes, qtd_meses, ultimo_erro, atualizado_em)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT(ano) DO UPDATE SET
+                        hash_conteudo = excluded.hash_conteudo,
+                        status = excluded.status,
+                        etag = COALESCE(excluded.etag, etag),
+                        tamanho_bytes = excluded.tamanho_bytes,
+                        qtd_meses = excluded.qtd_meses,
+                        ultimo_erro = excluded.ultimo_erro,
+                        atualizado_em = CURRENT_TIMESTAMP
+                """, (ano, hash_ano, status, resultado['etag'],
+                      len(dados), qtd_meses, resultado['erro']))
+                database.conn.commit()
+
+            if resultado['sucesso']:
+                relatorio['enviados'] += 1
+                print(f"✅ {nome_arquivo} atualizado")
+            elif alterado:
+                relatorio['alterados'] += 1
+                print(f"✋ {nome_arquivo} editado por outra pessoa - sem reenvio automático")
+                if not alterado_antes:
+                    notificar_planilha_bloqueada(pasta_destino, None, ano, alterada=True, nome_arquivo=nome_arquivo)
+            else:
+                relatorio['com_erro'] += 1
+                print(f"🔁 {nome_arquivo} não atualizado (HTTP {resultado['status_http']}) - próximo ciclo")
+
+        except Exception as e:
+            relatorio['com_erro'] += 1
+            print(f"❌ Erro consolidado {ano}: {e}")
+
+    relatorio['tempo_segundos'] = round(time.perf_counter() - inicio, 3)
+    return relatorio
+
+
+def benchmark_consolidado(faturas_por_mes=300):
+    """
+    Mês N entrando no ano: só a folha nova + montagem (incremental) vs.
+    regerar as N planilhas e montar (tempo que cresceria com o ano).
+    """
+    from processor.excel_brk import ExcelGeneratorBRK, _faturas_sinteticas
+
+    generator = ExcelGeneratorBRK()
+    dados = [_faturas_sinteticas(faturas_por_mes, semente=mes) for mes in range(1, 13)]
+    resumo_vazio = dict.fromkeys(CAMPOS_RESUMO, 0)
+
+    def folha_do_mes(mes):
+        folha = extrair_folha(generator._gerar_excel_streaming(*dados[mes - 1], mes, 2025))
+        return {'mes': mes, 'folha_xml': zlib.compress(folha), **resumo_vazio}
+
+    print(f"\n📊 BENCHMARK CONSOLIDADO ({faturas_por_mes} faturas/mês)")
+    print(f"   {'meses':>5} | {'incremental':>11} | {'regerando tudo':>14}")
+
+    guardadas, resultados = [], []
+    for mes in range(1, 13):
+        inicio = time.perf_counter()
+        guardadas.append(folha_do_mes(mes))
+        montar_workbook_consolidado(2025, guardadas)
+        tempo_incremental = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        montar_workbook_consolidado(2025, [folha_do_mes(m) for m in range(1, mes + 1)])
+        tempo_completo = time.perf_counter() - inicio
+
+        resultados.append({'meses': mes, 'incremental_segundos': round(tempo_incremental, 3),
+                           'completo_segundos': round(tempo_completo, 3)})
+        print(f"   {mes:>5} | {tempo_incremental:>10.3f}s | {tempo_completo:>13.3f}s")
+
+    return resultados
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark":
+        benchmark_consolidado(int(sys.argv[2]) if len(sys.argv) > 2 else 300)
+    elif len(sys.argv) == 4:
+        import sqlite3
+        import threading
+        from types import SimpleNamespace
+
+        database = SimpleNamespace(conn=sqlite3.connect(sys.argv[1]), lock_conexao=threading.RLock())
+        dados, _, qtd_meses = montar_consolidado_anual(database, int(sys.argv[2]))
+        if not dados:
+            print(f"❌ Nenhum mês consolidado em {sys.argv[2]}")
+            sys.exit(1)
+        with open(sys.argv[3], "wb") as arquivo:
+            arquivo.write(dados)
+        print(f"✅ {sys.argv[3]}: {qtd_meses} mês(es), {len(dados)} bytes")
+    else:
+        print("Uso: python -m processor.consolidado_anual /caminho/database_brk.db ANO saida.xlsx")
+        print("     python -m processor.consolidado_anual --benchmark [faturas_por_mes]")
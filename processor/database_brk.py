@@ -19,10 +19,268 @@ import requests
 import hashlib
 import tempfile
 import base64
+import json
+import threading
 from datetime import datetime
 from pathlib import Path
 
 
+# Colunas adicionadas após a v2.1: criadas via ALTER TABLE em databases antigos
+# e incluídas no INSERT somente quando presentes no schema real.
+COLUNAS_OPCIONAIS = {
+    'fontes_extracao': 'TEXT',
+    'confianca_extracao': 'REAL',
+    'onedrive_item_id': 'TEXT',
+    'onedrive_etag': 'TEXT',
+    'onedrive_tamanho': 'INTEGER',
+}
+
+# Tabelas auxiliares (CREATE IF NOT EXISTS): garantidas tanto em databases
+# novos quanto nos já existentes baixados do OneDrive.
+SQL_TABELAS_AUXILIARES = """
+CREATE TABLE IF NOT EXISTS alertas_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fatura_id INTEGER NOT NULL,
+    dados_json TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'PENDENTE',
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    proxima_tentativa DATETIME DEFAULT CURRENT_TIMESTAMP,
+    ultimo_erro TEXT,
+    criado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+    atualizado_em DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_outbox_status ON alertas_outbox(status, proxima_tentativa);
+
+CREATE TABLE IF NOT EXISTS alertas_entregas (
+    outbox_id INTEGER NOT NULL,
+    user_id TEXT NOT NULL,
+    nome TEXT,
+    status TEXT NOT NULL,
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    ultimo_erro TEXT,
+    atualizado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (outbox_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS baseline_consumo (
+    cdc TEXT PRIMARY KEY,
+    casa_oracao TEXT,
+    historico_json TEXT NOT NULL,
+    qtd_meses INTEGER NOT NULL DEFAULT 0,
+    media REAL,
+    mediana REAL,
+    mad REAL,
+    ultimo_ano_mes INTEGER,
+    atualizado_em DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS planilhas_geradas (
+    ano INTEGER NOT NULL,
+    mes INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    etag_relacionamento TEXT,
+    qtd_faturas INTEGER NOT NULL DEFAULT 0,
+    tamanho_bytes INTEGER,
+    hash_conteudo TEXT,
+    gerada_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (ano, mes)
+);
+
+CREATE TABLE IF NOT EXISTS planilhas_upload (
+    ano INTEGER NOT NULL,
+    mes INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'OK',
+    etag TEXT,
+    tamanho_bytes INTEGER,
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    ultimo_status_http INTEGER,
+    ultimo_erro TEXT,
+    atualizado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (ano, mes)
+);
+
+CREATE TABLE IF NOT EXISTS consolidado_mensal (
+    ano INTEGER NOT NULL,
+    mes INTEGER NOT NULL,
+    folha_xml BLOB NOT NULL,
+    hash_conteudo TEXT NOT NULL,
+    qtd_faturas INTEGER NOT NULL DEFAULT 0,
+    qtd_faltantes INTEGER NOT NULL DEFAULT 0,
+    qtd_outros INTEGER NOT NULL DEFAULT 0,
+    total_pia REAL NOT NULL DEFAULT 0,
+    total_casas REAL NOT NULL DEFAULT 0,
+    total_geral REAL NOT NULL DEFAULT 0,
+    atualizado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (ano, mes)
+);
+
+CREATE TABLE IF NOT EXISTS consolidado_anual (
+    ano INTEGER PRIMARY KEY,
+    hash_conteudo TEXT,
+    status TEXT NOT NULL DEFAULT 'PENDENTE',
+    etag TEXT,
+    tamanho_bytes INTEGER,
+    qtd_meses INTEGER NOT NULL DEFAULT 0,
+    ultimo_erro TEXT,
+    atualizado_em DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS resumo_mensal (
+    ano INTEGER NOT NULL,
+    mes INTEGER NOT NULL,
+    vencimento TEXT NOT NULL,
+    qtd_faturas INTEGER NOT NULL DEFAULT 0,
+    qtd_normais INTEGER NOT NULL DEFAULT 0,
+    qtd_duplicatas INTEGER NOT NULL DEFAULT 0,
+    qtd_pia INTEGER NOT NULL DEFAULT 0,
+    qtd_casas INTEGER NOT NULL DEFAULT 0,
+    total_pia_centavos INTEGER NOT NULL DEFAULT 0,
+    total_casas_centavos INTEGER NOT NULL DEFAULT 0,
+    qtd_com_dados INTEGER NOT NULL DEFAULT 0,
+    qtd_com_pdf INTEGER NOT NULL DEFAULT 0,
+    qtd_faltantes INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (ano, mes, vencimento)
+);
+
+CREATE TABLE IF NOT EXISTS relacionamento_cdc (
+    ordem INTEGER PRIMARY KEY,
+    cdc TEXT NOT NULL,
+    casa_oracao TEXT NOT NULL,
+    dia_vencimento INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS relacionamento_versao (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    etag TEXT,
+    hash_conteudo TEXT NOT NULL,
+    qtd_casas INTEGER NOT NULL DEFAULT 0,
+    atualizado_em DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_periodo_planilha
+    ON faturas_brk(substr(competencia, -5), substr(vencimento, 3, 4));
+
+CREATE INDEX IF NOT EXISTS idx_cdc_periodo
+    ON faturas_brk(cdc, substr(competencia, -5), substr(vencimento, 3, 4), status_duplicata);
+"""
+
+# Período da planilha: mesmo filtro dos LIKE '%/AAAA' (competência) e
+# '__/MM/%' (vencimento), escrito com as expressões do idx_periodo_planilha
+SQL_ANO_COMPETENCIA = "substr(competencia, -5)"
+SQL_MES_VENCIMENTO = "substr(vencimento, 3, 4)"
+
+
+
+def _sql_colunas_resumo(ref):
+    """
+    Valores de uma fatura (ref = NEW/OLD ou a própria tabela) nas colunas de
+    resumo_mensal. Período = mesmo da planilha (ano da competência, mês do
+    vencimento; fora do padrão → 0). Valor em centavos com a regra da planilha
+    (_valor_somavel): sem "R$", vírgula → ponto, "-" opcional na frente e só
+    dígitos/um ponto, senão 0.
+    """
+    valor = f"trim(replace(replace({ref}valor, 'R$', ''), ',', '.'))"
+    sem_sinal = f"(CASE WHEN substr({valor}, 1, 1) = '-' THEN substr({valor}, 2) ELSE {valor} END)"
+    centavos = (
+        f"CASE WHEN {sem_sinal} GLOB '*[0-9]*' AND {sem_sinal} NOT GLOB '*[^0-9.]*' AND {sem_sinal} NOT LIKE '%.%.%' "
+        f"THEN CAST(round(CAST({valor} AS REAL) * 100) AS INTEGER) ELSE 0 END"
+    )
+    normal = f"({ref}status_duplicata = 'NORMAL')"
+    pia = f"(upper(COALESCE({ref}casa_oracao, '')) = 'PIA')"
+    return [
+        f"COALESCE(CASE WHEN substr({ref}competencia, -5, 1) = '/' THEN CAST(substr({ref}competencia, -4) AS INTEGER) END, 0)",
+        f"COALESCE(CASE WHEN substr({ref}vencimento, 3, 1) = '/' AND substr({ref}vencimento, 6, 1) = '/' "
+        f"THEN CAST(substr({ref}vencimento, 4, 2) AS INTEGER) END, 0)",
+        f"COALESCE({ref}vencimento, '')",
+        "1",
+        f"{normal}",
+        f"({ref}status_duplicata = 'DUPLICATA')",
+        f"({normal} AND {pia})",
+        f"({normal} AND NOT {pia})",
+        f"CASE WHEN {normal} AND {pia} THEN {centavos} ELSE 0 END",
+        f"CASE WHEN {normal} AND NOT {pia} THEN {centavos} ELSE 0 END",
+        f"({ref}dados_extraidos_ok = 1)",
+        f"({ref}content_bytes IS NOT NULL AND {ref}content_bytes != '')",
+    ]
+
+
+COLUNAS_RESUMO_MENSAL = [
+    'ano', 'mes', 'vencimento', 'qtd_faturas', 'qtd_normais', 'qtd_duplicatas', 'qtd_pia', 'qtd_casas',
+    'total_pia_centavos', 'total_casas_centavos', 'qtd_com_dados', 'qtd_com_pdf'
+]
+
+
+def _sql_acumular_resumo(ref, sinal):
+    """UPSERT somando (sinal '') ou subtraindo (sinal '-') uma fatura do resumo."""
+    valores = _sql_colunas_resumo(ref)
+    valores = valores[:3] + [f"{sinal}({v})" for v in valores[3:]]
+    contadores = COLUNAS_RESUMO_MENSAL[3:]
+    return f"""
+        INSERT INTO resumo_mensal ({', '.join(COLUNAS_RESUMO_MENSAL)})
+        VALUES ({', '.join(valores)})
+        ON CONFLICT(ano, mes, vencimento) DO UPDATE SET
+            {', '.join(f'{c} = {c} + excluded.{c}' for c in contadores)};"""
+
+
+# resumo_mensal mantido pelo próprio SQLite a cada INSERT/UPDATE/DELETE em
+# faturas_brk (qualquer caminho de escrita, inclusive scripts manuais).
+# Mudou a regra dos triggers? Suba a versão: database existente troca os
+# triggers antigos e reconstrói o resumo uma vez (_garantir_tabelas_auxiliares)
+VERSAO_TRIGGERS_RESUMO = 2
+TRIGGERS_RESUMO = [
+    f"trg_resumo_{evento}_v{VERSAO_TRIGGERS_RESUMO}" for evento in ("insert", "delete", "update")
+]
+
+SQL_TRIGGERS_RESUMO = f"""
+CREATE TRIGGER IF NOT EXISTS {TRIGGERS_RESUMO[0]} AFTER INSERT ON faturas_brk
+BEGIN{_sql_acumular_resumo('NEW.', '')}
+END;
+
+CREATE TRIGGER IF NOT EXISTS {TRIGGERS_RESUMO[1]} AFTER DELETE ON faturas_brk
+BEGIN{_sql_acumular_resumo('OLD.', '-')}
+END;
+
+CREATE TRIGGER IF NOT EXISTS {TRIGGERS_RESUMO[2]}
+AFTER UPDATE OF status_duplicata, casa_oracao, valor, competencia, vencimento, dados_extraidos_ok, content_bytes
+ON faturas_brk
+BEGIN{_sql_acumular_resumo('OLD.', '-')}{_sql_acumular_resumo('NEW.', '')}
+END;
+"""
+
+
+def reconstruir_resumo_mensal(conn):
+    """Recalcula resumo_mensal inteiro a partir de faturas_brk (database antigo ou verificação)."""
+    contadores = COLUNAS_RESUMO_MENSAL[3:]
+    valores = _sql_colunas_resumo("")
+    
+    faltantes = conn.execute(
+        "SELECT ano, mes, vencimento, qtd_faltantes FROM resumo_mensal WHERE qtd_faltantes > 0"
+    ).fetchall()
+    
+    conn.execute("DELETE FROM resumo_mensal")
+    conn.execute(f"""
+        INSERT INTO resumo_mensal ({', '.join(COLUNAS_RESUMO_MENSAL)})
+        SELECT ano, mes, vencimento, {', '.join(f'SUM({c})' for c in contadores)}
+        FROM (SELECT {', '.join(f'{v} AS {c}' for v, c in zip(valores, COLUNAS_RESUMO_MENSAL))} FROM faturas_brk)
+        GROUP BY ano, mes, vencimento
+    """)
+    conn.executemany("""
+        INSERT INTO resumo_mensal (ano, mes, vencimento, qtd_faltantes) VALUES (?, ?, ?, ?)
+        ON CONFLICT(ano, mes, vencimento) DO UPDATE SET qtd_faltantes = excluded.qtd_faltantes
+    """, faltantes)
+    conn.commit()
+
+
+# Colunas que não aparecem na planilha: fora do fingerprint do mês
+COLUNAS_FORA_FINGERPRINT = {'content_bytes', 'onedrive_item_id', 'onedrive_etag', 'onedrive_tamanho'}
+
+
+def alertas_outbox_ativo():
+    """Outbox de alertas ligado (ALERTAS_OUTBOX, padrão true)."""
+    return os.getenv("ALERTAS_OUTBOX", "true").lower() in ("1", "true", "sim")
+
+
 class DatabaseBRK:
     """
     Database BRK com SQLite no OneDrive + cache local + anexos PDF.
@@ -41,8 +299,9 @@ class DatabaseBRK:
         self.db_local_cache = None
         self.db_fallback_render = '/opt/render/project/storage/database_brk.db'
         
-        # Conexão SQLite
+        # Conexão SQLite (compartilhada com o despachante de alertas)
         self.conn = None
+        self.lock_conexao = threading.RLock()
         self.usando_onedrive = False
         self.usando_fallback = False
         
@@ -123,6 +382,17 @@ class DatabaseBRK:
             else:
                 print("✅ Campo content_bytes já existe")
             
+            # Colunas opcionais de versões posteriores
+            for coluna, tipo in COLUNAS_OPCIONAIS.items():
+                if coluna not in campos:
+                    print(f"🔧 Campo {coluna} ausente - adicionando...")
+                    cursor.execute(f"ALTER TABLE faturas_brk ADD COLUMN {coluna} {tipo}")
+                    self.conn.commit()
+                    campos.append(coluna)
+            
+            # Tabelas auxiliares e triggers depois das colunas (resumo_mensal usa content_bytes)
+            self._garantir_tabelas_auxiliares(self.conn)
+            
             # Verificar outros campos críticos
             campos_obrigatorios = ['cdc', 'competencia', 'casa_oracao', 'valor', 'vencimento']
             faltantes = [campo for campo in campos_obrigatorios if campo not in campos]
@@ -252,7 +522,14 @@ class DatabaseBRK:
             
             dados_extraidos_ok BOOLEAN DEFAULT TRUE,
             relacionamento_usado BOOLEAN DEFAULT FALSE,
-            content_bytes TEXT
+            content_bytes TEXT,
+            
+            fontes_extracao TEXT,
+            confianca_extracao REAL,
+            
+            onedrive_item_id TEXT,
+            onedrive_etag TEXT,
+            onedrive_tamanho INTEGER
         );
         
         CREATE INDEX IF NOT EXISTS idx_cdc_competencia ON faturas_brk(cdc, competencia);
@@ -263,9 +540,51 @@ class DatabaseBRK:
         """
         
         conn.executescript(sql_create)
+        self._garantir_tabelas_auxiliares(conn)
         conn.commit()
         print(f"✅ Estrutura SQLite criada (tabelas + índices + content_bytes)")
     
+    def _garantir_tabelas_auxiliares(self, conn):
+        """Cria tabelas auxiliares (outbox de alertas etc.) se ainda não existirem."""
+        baseline_existia = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='baseline_consumo'"
+        ).fetchone()
+        resumo_existia = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='resumo_mensal'"
+        ).fetchone()
+        
+        # Triggers de versão anterior: removidos (regra antiga não soma igual)
+        triggers_antigos = [
+            row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='trigger' AND name LIKE 'trg_resumo_%'"
+            ) if row[0] not in TRIGGERS_RESUMO
+        ]
+        for nome in triggers_antigos:
+            conn.execute(f"DROP TRIGGER IF EXISTS {nome}")
+        
+        conn.executescript(SQL_TABELAS_AUXILIARES)
+        conn.executescript(SQL_TRIGGERS_RESUMO)
+        
+        # Database antigo ou triggers trocados: resumo preenchido uma vez, depois só pelos triggers
+        if not resumo_existia or triggers_antigos:
+            if triggers_antigos:
+                print(f"🔄 Triggers resumo_mensal atualizados para v{VERSAO_TRIGGERS_RESUMO} - reconstruindo resumo")
+            reconstruir_resumo_mensal(conn)
+        
+        # planilhas_geradas criada antes do hash de conteúdo
+        colunas_planilhas = [row[1] for row in conn.execute("PRAGMA table_info(planilhas_geradas)")]
+        if 'hash_conteudo' not in colunas_planilhas:
+            conn.execute("ALTER TABLE planilhas_geradas ADD COLUMN hash_conteudo TEXT")
+            conn.commit()
+        
+        # Database antigo: linha de base montada uma vez a partir do histórico
+        if not baseline_existia:
+            try:
+                from processor.baseline_consumo import reconstruir_baselines
+                reconstruir_baselines(conn)
+            except Exception as e:
+                print(f"⚠️ Baseline consumo não reconstruída: {e}")
+    
     def _conectar_cache_local(self):
         """Conecta SQLite no cache local baixado."""
         try:
@@ -306,43 +625,50 @@ class DatabaseBRK:
             raise
 
     def sincronizar_onedrive(self):
-        """Sincroniza database local com OneDrive (backup)."""
-        try:
-            if not self.usando_onedrive:
-                print(f"⚠️ Sincronização ignorada - usando fallback Render")
-                return False
-            
-            if not self.db_local_cache or not os.path.exists(self.db_local_cache):
-                print(f"⚠️ Cache local não disponível para sincronização")
-                return False
-            
-            # Fechar conexão temporariamente para sync
-            if self.conn:
-                self.conn.close()
-            
-            # Upload para OneDrive
-            sucesso = self._upload_database_onedrive()
-            
-            # Reconectar
-            self.conn = sqlite3.connect(self.db_local_cache, check_same_thread=False)
-            self.conn.execute("PRAGMA journal_mode=WAL")
-            
-            if sucesso:
-                print(f"🔄 Database sincronizado com OneDrive")
-                return True
-            else:
-                print(f"⚠️ Falha na sincronização OneDrive")
-                return False
-                
-        except Exception as e:
-            print(f"❌ Erro sincronização: {e}")
+        """
+        Sincroniza database local com OneDrive (backup).
+        
+        Fecha/reabre a conexão compartilhada: tudo sob lock_conexao, para que
+        monitor, rotas web e despachante de alertas nunca usem a conexão fechada
+        nem percam uma transação no meio.
+        """
+        with self.lock_conexao:
             try:
-                if self.db_local_cache:
-                    self.conn = sqlite3.connect(self.db_local_cache, check_same_thread=False)
-                    self.conn.execute("PRAGMA journal_mode=WAL")
-            except:
-                pass
-            return False
+                if not self.usando_onedrive:
+                    print(f"⚠️ Sincronização ignorada - usando fallback Render")
+                    return False
+                
+                if not self.db_local_cache or not os.path.exists(self.db_local_cache):
+                    print(f"⚠️ Cache local não disponível para sincronização")
+                    return False
+                
+                # Fechar conexão temporariamente para sync
+                if self.conn:
+                    self.conn.close()
+                
+                # Upload para OneDrive
+                sucesso = self._upload_database_onedrive()
+                
+                # Reconectar
+                self.conn = sqlite3.connect(self.db_local_cache, check_same_thread=False)
+                self.conn.execute("PRAGMA journal_mode=WAL")
+                
+                if sucesso:
+                    print(f"🔄 Database sincronizado com OneDrive")
+                    return True
+                else:
+                    print(f"⚠️ Falha na sincronização OneDrive")
+                    return False
+                    
+            except Exception as e:
+                print(f"❌ Erro sincronização: {e}")
+                try:
+                    if self.db_local_cache:
+                        self.conn = sqlite3.connect(self.db_local_cache, check_same_thread=False)
+                        self.conn.execute("PRAGMA journal_mode=WAL")
+                except:
+                    pass
+                return False
     
     def _upload_database_onedrive(self):
         """Faz upload do database local para OneDrive /BRK/."""
@@ -393,12 +719,17 @@ class DatabaseBRK:
             nome_padronizado = self._gerar_nome_padronizado(dados_fatura)
             
             # 3. Inserir no SQLite
-            id_salvo = self._inserir_fatura_sqlite(dados_fatura, status_duplicata, nome_padronizado)
+            id_salvo, outbox_id = self._inserir_fatura_sqlite(dados_fatura, status_duplicata, nome_padronizado)
             
-            # 4. Integração alertas
+            # 4. Integração alertas: outbox + despachante em background;
+            #    inline só se o enfileiramento não aconteceu
             try:
-                from processor.alertas.alert_processor import processar_alerta_fatura
-                processar_alerta_fatura(dados_fatura)
+                if id_salvo and outbox_id:
+                    from processor.alertas.alert_outbox import iniciar_despachante_alertas
+                    iniciar_despachante_alertas(self)
+                else:
+                    from processor.alertas.alert_processor import processar_alerta_fatura
+                    processar_alerta_fatura(dados_fatura)
             except ImportError:
                 pass  # Alertas opcionais
             
@@ -410,6 +741,7 @@ class DatabaseBRK:
                 'status': 'sucesso',
                 'mensagem': f'Fatura salva - Status: {status_duplicata}',
                 'id_salvo': id_salvo,
+                'outbox_id': outbox_id,
                 'status_duplicata': status_duplicata,
                 'nome_arquivo': nome_padronizado,
                 'usando_onedrive': self.usando_onedrive
@@ -599,34 +931,20 @@ class DatabaseBRK:
             # STEP 1: Verificar e corrigir schema primeiro
             self.verificar_e_corrigir_schema_database()
             
-            cursor = self.conn.cursor()
-            
             # STEP 2: Verificar novamente se content_bytes existe
-            cursor.execute("PRAGMA table_info(faturas_brk)")
-            campos = [row[1] for row in cursor.fetchall()]
+            # (conexão compartilhada: sincronizar_onedrive troca self.conn com o lock)
+            with self.lock_conexao:
+                campos = [row[1] for row in self.conn.execute("PRAGMA table_info(faturas_brk)").fetchall()]
             tem_content_bytes = 'content_bytes' in campos
             
-            # STEP 3: SQL adaptativo baseado no schema real
-            if tem_content_bytes:
-                sql_insert = """
-                INSERT INTO faturas_brk (
-                    email_id, nome_arquivo_original, nome_arquivo, hash_arquivo,
-                    cdc, nota_fiscal, casa_oracao, data_emissao, vencimento, 
-                    competencia, valor, medido_real, faturado, media_6m,
-                    porcentagem_consumo, alerta_consumo, dados_extraidos_ok, 
-                    relacionamento_usado, status_duplicata, observacao, content_bytes
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """
-            else:
-                sql_insert = """
-                INSERT INTO faturas_brk (
-                    email_id, nome_arquivo_original, nome_arquivo, hash_arquivo,
-                    cdc, nota_fiscal, casa_oracao, data_emissao, vencimento, 
-                    competencia, valor, medido_real, faturado, media_6m,
-                    porcentagem_consumo, alerta_consumo, dados_extraidos_ok, 
-                    relacionamento_usado, status_duplicata, observacao
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """
+            # STEP 3: Colunas adaptativas baseadas no schema real
+            colunas = [
+                'email_id', 'nome_arquivo_original', 'nome_arquivo', 'hash_arquivo',
+                'cdc', 'nota_fiscal', 'casa_oracao', 'data_emissao', 'vencimento',
+                'competencia', 'valor', 'medido_real', 'faturado', 'media_6m',
+                'porcentagem_consumo', 'alerta_consumo', 'dados_extraidos_ok',
+                'relacionamento_usado', 'status_duplicata', 'observacao'
+            ]
             
             # STEP 4: Preparar valores baseado no schema
             content_bytes = dados_fatura.get('content_bytes', '')
@@ -635,7 +953,7 @@ class DatabaseBRK:
             else:
                 print(f"📎 content_bytes: ❌ Não disponível")
             
-            valores_base = (
+            valores = [
                 dados_fatura.get('email_id', ''),
                 dados_fatura.get('nome_arquivo_original', ''),
                 nome_padronizado,
@@ -656,29 +974,169 @@ class DatabaseBRK:
                 dados_fatura.get('relacionamento_usado', False),
                 status_duplicata,
                 f'Processado - Schema: {"COM" if tem_content_bytes else "SEM"} content_bytes'
-            )
+            ]
             
             # Adicionar content_bytes se campo existe
             if tem_content_bytes:
-                valores = valores_base + (content_bytes,)
-            else:
-                valores = valores_base
+                colunas.append('content_bytes')
+                valores.append(content_bytes)
             
-            # STEP 5: Inserir no banco
-            cursor.execute(sql_insert, valores)
-            self.conn.commit()
+            # Colunas opcionais presentes no schema
+            for coluna in COLUNAS_OPCIONAIS:
+                if coluna in campos:
+                    colunas.append(coluna)
+                    valores.append(dados_fatura.get(coluna))
+            
+            sql_insert = f"""
+                INSERT INTO faturas_brk ({', '.join(colunas)})
+                VALUES ({', '.join('?' for _ in colunas)})
+            """
+            
+            # STEP 5: Inserir no banco (fatura + alerta na mesma transação)
+            outbox_id = None
+            
+            with self.lock_conexao:
+                cursor = self.conn.cursor()
+                cursor.execute(sql_insert, valores)
+                id_inserido = cursor.lastrowid
+                
+                if status_duplicata == 'NORMAL':
+                    self._atualizar_baseline(cursor, dados_fatura)
+                
+                if alertas_outbox_ativo():
+                    outbox_id = self._enfileirar_alerta(cursor, id_inserido, dados_fatura)
+                
+                self.conn.commit()
             
-            id_inserido = cursor.lastrowid
             print(f"✅ Fatura salva - ID: {id_inserido} - Status: {status_duplicata}")
             
-            return id_inserido
+            return id_inserido, outbox_id
             
         except Exception as e:
             print(f"❌ Erro inserindo SQLite: {e}")
             print(f"   📊 Schema: {tem_content_bytes if 'tem_content_bytes' in locals() else 'desconhecido'}")
             print(f"   📝 Dados: {len(dados_fatura)} campos")
+            return None, None
+
+    def _atualizar_baseline(self, cursor, dados_fatura):
+        """
+        Atualiza baseline_consumo do CDC (sem commit - mesma transação do INSERT)
+        e guarda em dados_fatura['baseline_consumo'] a linha de base anterior,
+        usada pelo alerta no modo ALERTA_MODO_BASELINE=historico.
+        """
+        try:
+            from processor.baseline_consumo import registrar_consumo_baseline
+            
+            cursor.execute("SAVEPOINT atualizar_baseline")
+            snapshot = registrar_consumo_baseline(
+                cursor,
+                dados_fatura.get('cdc'),
+                dados_fatura.get('competencia'),
+                dados_fatura.get('medido_real'),
+                dados_fatura.get('casa_oracao')
+            )
+            cursor.execute("RELEASE SAVEPOINT atualizar_baseline")
+            
+            if snapshot:
+                dados_fatura['baseline_consumo'] = snapshot
+                print(f"📚 Baseline CDC {dados_fatura.get('cdc')}: {snapshot['qtd_meses']} mês(es) anteriores")
+            
+        except Exception as e:
+            print(f"⚠️ Falha atualizando baseline consumo: {e}")
+            try:
+                cursor.execute("ROLLBACK TO SAVEPOINT atualizar_baseline")
+                cursor.execute("RELEASE SAVEPOINT atualizar_baseline")
+            except Exception:
+                pass
+
+    def _enfileirar_alerta(self, cursor, fatura_id, dados_fatura):
+        """
+        Grava o alerta da fatura em alertas_outbox (sem commit - mesma transação do INSERT).
+        content_bytes fica fora do JSON: o despachante lê o PDF de faturas_brk pelo id.
+        
+        Returns:
+            int: id do outbox, ou None se falhar (salvar_fatura envia inline)
+        """
+        try:
+            dados_alerta = {k: v for k, v in dados_fatura.items() if k != 'content_bytes'}
+            
+            cursor.execute("SAVEPOINT enfileirar_alerta")
+            cursor.execute("""
+                INSERT INTO alertas_outbox (fatura_id, dados_json)
+                VALUES (?, ?)
+            """, (fatura_id, json.dumps(dados_alerta, ensure_ascii=False, default=str)))
+            outbox_id = cursor.lastrowid
+            cursor.execute("RELEASE SAVEPOINT enfileirar_alerta")
+            
+            print(f"📬 Alerta enfileirado - outbox ID: {outbox_id}")
+            return outbox_id
+            
+        except Exception as e:
+            print(f"⚠️ Falha enfileirando alerta (será enviado inline): {e}")
+            try:
+                cursor.execute("ROLLBACK TO SAVEPOINT enfileirar_alerta")
+                cursor.execute("RELEASE SAVEPOINT enfileirar_alerta")
+            except Exception:
+                pass
             return None
 
+    def registrar_upload_onedrive(self, fatura_id, item_id, etag=None, tamanho=None):
+        """
+        Grava o item do PDF no OneDrive (id, eTag, tamanho) na fatura.
+        O alerta passa a baixar o PDF por /items/{id} em vez de remontar o caminho.
+        Sem sincronização própria: segue para o OneDrive no próximo salvar_fatura.
+        """
+        try:
+            if not fatura_id or not item_id:
+                return False
+
+            with self.lock_conexao:
+                campos = [row[1] for row in self.conn.execute("PRAGMA table_info(faturas_brk)")]
+                if 'onedrive_item_id' not in campos:
+                    self.verificar_e_corrigir_schema_database()
+
+                self.conn.execute("""
+                    UPDATE faturas_brk
+                    SET onedrive_item_id = ?, onedrive_etag = ?, onedrive_tamanho = ?
+                    WHERE id = ?
+                """, (item_id, etag, tamanho, fatura_id))
+                self.conn.commit()
+
+            print(f"☁️ Item OneDrive registrado - fatura ID: {fatura_id}")
+            return True
+
+        except Exception as e:
+            print(f"⚠️ Erro registrando item OneDrive: {e}")
+            return False
+
+    def obter_pdf_fatura(self, fatura_id):
+        """
+        Referências do PDF de uma fatura para o alerta.
+
+        Returns:
+            dict: {'content_bytes', 'onedrive_item_id'} (valores None se ausentes)
+        """
+        referencias = {'content_bytes': None, 'onedrive_item_id': None}
+        try:
+            with self.lock_conexao:
+                try:
+                    linha = self.conn.execute(
+                        "SELECT content_bytes, onedrive_item_id FROM faturas_brk WHERE id = ?",
+                        (fatura_id,)
+                    ).fetchone()
+                except sqlite3.OperationalError:
+                    # Database antigo ainda sem onedrive_item_id
+                    linha = self.conn.execute(
+                        "SELECT content_bytes, NULL FROM faturas_brk WHERE id = ?", (fatura_id,)
+                    ).fetchone()
+
+            if linha:
+                referencias['content_bytes'], referencias['onedrive_item_id'] = linha
+        except Exception as e:
+            print(f"⚠️ Erro obtendo PDF da fatura {fatura_id}: {e}")
+
+        return referencias
+
     def buscar_faturas(self, filtros=None):
         """Busca faturas com filtros opcionais."""
         try:
@@ -792,36 +1250,325 @@ class DatabaseBRK:
             print(f"❌ Erro detectando meses com faturas: {e}")
             return []
 
+    def calcular_fingerprint_mes(self, mes, ano):
+        """
+        Fingerprint (SHA-256) das faturas que entram na planilha do mês
+        (mesmo filtro competência/vencimento do ExcelGeneratorBRK, todos os status).
+        Fatura nova, alterada ou removida → fingerprint diferente.
+        
+        Returns:
+            tuple: (fingerprint, qtd_faturas)
+        """
+        with self.lock_conexao:
+            colunas = [
+                row[1] for row in self.conn.execute("PRAGMA table_info(faturas_brk)")
+                if row[1] not in COLUNAS_FORA_FINGERPRINT
+            ]
+            linhas = self.conn.execute(f"""
+                SELECT {', '.join(colunas)} FROM faturas_brk
+                WHERE competencia LIKE ? AND vencimento LIKE ?
+                ORDER BY id
+            """, (f"%/{ano}", f"__/{mes:02d}/%")).fetchall()
+        
+        hash_mes = hashlib.sha256('|'.join(colunas).encode('utf-8'))
+        for linha in linhas:
+            hash_mes.update(repr(linha).encode('utf-8'))
+        
+        return hash_mes.hexdigest(), len(linhas)
+    
+    def obter_faturas_meses(self, meses):
+        """
+        Faturas (todos os status, sem content_bytes) de vários meses de planilha
+        numa única consulta indexada, agrupadas por (mes, ano).
+        
+        Args:
+            meses: [(mes, ano), ...]
+        
+        Returns:
+            dict: {(mes, ano): [dict da fatura, ...]} em ordem de vencimento, casa_oracao
+        """
+        meses = {(int(mes), int(ano)) for mes, ano in meses}
+        faturas_por_mes = {chave: [] for chave in meses}
+        if not meses:
+            return faturas_por_mes
+        
+        anos = sorted({f"/{ano}" for _, ano in meses})
+        meses_vencimento = sorted({f"/{mes:02d}/" for mes, _ in meses})
+        
+        with self.lock_conexao:
+            colunas = [
+                row[1] for row in self.conn.execute("PRAGMA table_info(faturas_brk)")
+                if row[1] != 'content_bytes'
+            ]
+            cursor = self.conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            linhas = cursor.execute(f"""
+                SELECT {', '.join(colunas)} FROM faturas_brk
+                WHERE {SQL_ANO_COMPETENCIA} IN ({', '.join('?' * len(anos))})
+                AND {SQL_MES_VENCIMENTO} IN ({', '.join('?' * len(meses_vencimento))})
+                ORDER BY vencimento, casa_oracao
+            """, anos + meses_vencimento).fetchall()
+        
+        # Anos × meses pode trazer combinações não pedidas: descartadas aqui
+        for linha in linhas:
+            chave = (int(linha['vencimento'][3:5]), int(linha['competencia'][-4:]))
+            if chave in faturas_por_mes:
+                faturas_por_mes[chave].append(dict(linha))
+        
+        return faturas_por_mes
+    
+    def obter_planilha_gerada(self, mes, ano):
+        """Último registro de geração da planilha do mês (dict) ou None."""
+        with self.lock_conexao:
+            linha = self.conn.execute("""
+                SELECT fingerprint, etag_relacionamento, qtd_faturas, tamanho_bytes, hash_conteudo, gerada_em
+                FROM planilhas_geradas WHERE ano = ? AND mes = ?
+            """, (ano, mes)).fetchone()
+        
+        if not linha:
+            return None
+        
+        return dict(zip(
+            ('fingerprint', 'etag_relacionamento', 'qtd_faturas', 'tamanho_bytes', 'hash_conteudo', 'gerada_em'),
+            linha
+        ))
+    
+    def registrar_planilha_gerada(self, mes, ano, fingerprint, etag_relacionamento, qtd_faturas, tamanho_bytes,
+                                  hash_conteudo=None):
+        """Grava o fingerprint e o hash de conteúdo da planilha enviada com sucesso."""
+        with self.lock_conexao:
+            self.conn.execute("""
+                INSERT INTO planilhas_geradas
+                    (ano, mes, fingerprint, etag_relacionamento, qtd_faturas, tamanho_bytes, hash_conteudo, gerada_em)
+                VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(ano, mes) DO UPDATE SET
+                    fingerprint = excluded.fingerprint,
+                    etag_relacionamento = excluded.etag_relacionamento,
+                    qtd_faturas = excluded.qtd_faturas,
+                    tamanho_bytes = excluded.tamanho_bytes,
+                    hash_conteudo = excluded.hash_conteudo,
+                    gerada_em = CURRENT_TIMESTAMP
+            """, (ano, mes, fingerprint, etag_relacionamento, qtd_faturas, tamanho_bytes, hash_conteudo))
+            self.conn.commit()
+    
+    def obter_upload_planilha(self, mes, ano):
+        """Estado do upload da planilha principal do mês (eTag, fila) ou None."""
+        with self.lock_conexao:
+            linha = self.conn.execute("""
+                SELECT status, etag, tamanho_bytes, tentativas, ultimo_status_http, ultimo_erro, atualizado_em
+                FROM planilhas_upload WHERE ano = ? AND mes = ?
+            """, (ano, mes)).fetchone()
+        
+        if not linha:
+            return None
+        
+        return dict(zip(
+            ('status', 'etag', 'tamanho_bytes', 'tentativas', 'ultimo_status_http', 'ultimo_erro', 'atualizado_em'),
+            linha
+        ))
+    
+    def registrar_upload_planilha(self, mes, ano, etag, tamanho_bytes):
+        """Upload da principal concluído: guarda o eTag (If-Match do próximo) e sai da fila."""
+        with self.lock_conexao:
+            self.conn.execute("""
+                INSERT INTO planilhas_upload (ano, mes, status, etag, tamanho_bytes, tentativas, atualizado_em)
+                VALUES (?, ?, 'OK', ?, ?, 0, CURRENT_TIMESTAMP)
+                ON CONFLICT(ano, mes) DO UPDATE SET
+                    status = 'OK',
+                    etag = excluded.etag,
+                    tamanho_bytes = excluded.tamanho_bytes,
+                    tentativas = 0,
+                    ultimo_status_http = NULL,
+                    ultimo_erro = NULL,
+                    atualizado_em = CURRENT_TIMESTAMP
+            """, (ano, mes, etag, tamanho_bytes))
+            self.conn.commit()
+    
+    def enfileirar_upload_planilha(self, mes, ano, status_http, erro):
+        """
+        Principal não atualizada (bloqueada/erro): fica PENDENTE para o próximo ciclo.
+        
+        Returns:
+            int: tentativas acumuladas
+        """
+        with self.lock_conexao:
+            self.conn.execute("""
+                INSERT INTO planilhas_upload (ano, mes, status, tentativas, ultimo_status_http, ultimo_erro, atualizado_em)
+                VALUES (?, ?, 'PENDENTE', 1, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(ano, mes) DO UPDATE SET
+                    status = 'PENDENTE',
+                    tentativas = tentativas + 1,
+                    ultimo_status_http = excluded.ultimo_status_http,
+                    ultimo_erro = excluded.ultimo_erro,
+                    atualizado_em = CURRENT_TIMESTAMP
+            """, (ano, mes, status_http, erro))
+            self.conn.commit()
+            
+            return self.conn.execute(
+                "SELECT tentativas FROM planilhas_upload WHERE ano = ? AND mes = ?", (ano, mes)
+            ).fetchone()[0]
+    
+    def obter_planilhas_pendentes(self):
+        """Fila de planilhas a reenviar: [{'mes', 'ano', 'tentativas', 'ultimo_status_http', ...}]."""
+        with self.lock_conexao:
+            linhas = self.conn.execute("""
+                SELECT mes, ano, tentativas, ultimo_status_http, ultimo_erro, atualizado_em
+                FROM planilhas_upload WHERE status = 'PENDENTE'
+                ORDER BY ano, mes
+            """).fetchall()
+        
+        return [
+            dict(zip(('mes', 'ano', 'tentativas', 'ultimo_status_http', 'ultimo_erro', 'atualizado_em'), linha))
+            for linha in linhas
+        ]
+    
+    def obter_resumo_meses(self, meses):
+        """
+        Totais de cada mês direto de resumo_mensal (sem ler faturas_brk).
+        
+        Returns:
+            dict: {(mes, ano): {'qtd_pia', 'qtd_casas', 'total_pia_centavos',
+                   'total_casas_centavos', 'qtd_faltantes', ...,
+                   'vencimentos': {vencimento: {mesmas chaves}}}}
+        """
+        meses = {(int(mes), int(ano)) for mes, ano in meses}
+        resumos = {chave: {'vencimentos': {}} for chave in meses}
+        if not meses:
+            return resumos
+        
+        contadores = COLUNAS_RESUMO_MENSAL[3:] + ['qtd_faltantes']
+        with self.lock_conexao:
+            linhas = self.conn.execute(f"""
+                SELECT mes, ano, vencimento, {', '.join(contadores)} FROM resumo_mensal
+                WHERE (mes, ano) IN (VALUES {', '.join('(?, ?)' for _ in meses)})
+            """, [valor for chave in meses for valor in chave]).fetchall()
+        
+        for mes, ano, vencimento, *valores in linhas:
+            resumo = resumos[(mes, ano)]
+            resumo['vencimentos'][vencimento] = dict(zip(contadores, valores))
+            for coluna, valor in zip(contadores, valores):
+                resumo[coluna] = resumo.get(coluna, 0) + valor
+        
+        for resumo in resumos.values():
+            for coluna in contadores:
+                resumo.setdefault(coluna, 0)
+        
+        return resumos
+    
+    def registrar_faltantes_resumo(self, mes, ano, faltantes_por_vencimento):
+        """Casas sem fatura no mês (detectadas pelo gerador da planilha): {vencimento: qtd}."""
+        with self.lock_conexao:
+            self.conn.execute(
+                "UPDATE resumo_mensal SET qtd_faltantes = 0 WHERE ano = ? AND mes = ?", (ano, mes)
+            )
+            self.conn.executemany("""
+                INSERT INTO resumo_mensal (ano, mes, vencimento, qtd_faltantes) VALUES (?, ?, ?, ?)
+                ON CONFLICT(ano, mes, vencimento) DO UPDATE SET qtd_faltantes = excluded.qtd_faltantes
+            """, [(ano, mes, vencimento, qtd) for vencimento, qtd in faltantes_por_vencimento.items()])
+            self.conn.commit()
+    
+    def salvar_relacionamento(self, base_completa, etag=None):
+        """
+        Guarda o CDC_BRK_CCB.xlsx ([{'cdc', 'casa', 'dia_vencimento'}], na ordem
+        da planilha) em relacionamento_cdc. Conteúdo igual ao guardado: só o eTag
+        é atualizado (se informado).
+        
+        Returns:
+            bool: True se as linhas mudaram
+        """
+        linhas = [(casa["cdc"], casa["casa"], int(casa["dia_vencimento"])) for casa in base_completa]
+        hash_base = hashlib.sha256(json.dumps(linhas, ensure_ascii=False).encode('utf-8')).hexdigest()
+        
+        with self.lock_conexao:
+            atual = self.conn.execute(
+                "SELECT hash_conteudo, etag FROM relacionamento_versao WHERE id = 1"
+            ).fetchone()
+            
+            if atual and atual[0] == hash_base:
+                if etag and etag != atual[1]:
+                    self.conn.execute(
+                        "UPDATE relacionamento_versao SET etag = ?, atualizado_em = CURRENT_TIMESTAMP WHERE id = 1",
+                        (etag,)
+                    )
+                    self.conn.commit()
+                return False
+            
+            self.conn.execute("DELETE FROM relacionamento_cdc")
+            self.conn.executemany(
+                "INSERT INTO relacionamento_cdc (cdc, casa_oracao, dia_vencimento) VALUES (?, ?, ?)", linhas
+            )
+            self.conn.execute("""
+                INSERT OR REPLACE INTO relacionamento_versao (id, etag, hash_conteudo, qtd_casas, atualizado_em)
+                VALUES (1, ?, ?, ?, CURRENT_TIMESTAMP)
+            """, (etag, hash_base, len(linhas)))
+            self.conn.commit()
+        
+        print(f"🔗 Relacionamento CDC atualizado no database: {len(linhas)} casas")
+        return True
+    
+    def obter_versao_relacionamento(self):
+        """{'etag', 'qtd_casas', 'atualizado_em'} do relacionamento guardado ou None."""
+        with self.lock_conexao:
+            linha = self.conn.execute(
+                "SELECT etag, qtd_casas, atualizado_em FROM relacionamento_versao WHERE id = 1"
+            ).fetchone()
+        
+        return dict(zip(('etag', 'qtd_casas', 'atualizado_em'), linha)) if linha else None
+    
+    def casas_faltantes(self, mes, ano):
+        """
+        Casas do relacionamento sem fatura NORMAL no período da planilha (anti-join
+        em idx_cdc_periodo: uma busca por casa, sem carregar as faturas do mês).
+        
+        Returns:
+            list: [{'cdc', 'casa_oracao', 'dia_vencimento', 'vencimento'}] na ordem do CDC_BRK_CCB.xlsx
+        """
+        mes, ano = int(mes), int(ano)
+        
+        with self.lock_conexao:
+            linhas = self.conn.execute(f"""
+                SELECT r.cdc, r.casa_oracao, r.dia_vencimento
+                FROM relacionamento_cdc r
+                LEFT JOIN faturas_brk f
+                    ON f.cdc = r.cdc
+                    AND {SQL_ANO_COMPETENCIA.replace('competencia', 'f.competencia')} = ?
+                    AND {SQL_MES_VENCIMENTO.replace('vencimento', 'f.vencimento')} = ?
+                    AND f.status_duplicata = 'NORMAL'
+                WHERE f.id IS NULL
+                ORDER BY r.ordem
+            """, (f"/{ano}", f"/{mes:02d}/")).fetchall()
+        
+        return [
+            {
+                'cdc': cdc,
+                'casa_oracao': casa,
+                'dia_vencimento': dia,
+                'vencimento': f"{dia:02d}/{mes:02d}/{ano}",
+            }
+            for cdc, casa, dia in linhas
+        ]
+    
     def obter_estatisticas(self):
         """Retorna estatísticas do database com informações OneDrive."""
         try:
             if not self.conn:
                 return {'erro': 'Conexão não disponível'}
             
-            cursor = self.conn.cursor()
-            
-            # Estatísticas básicas
-            cursor.execute("SELECT COUNT(*) FROM faturas_brk")
-            total_registros = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM faturas_brk WHERE status_duplicata = 'DUPLICATA'")
-            duplicatas = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM faturas_brk WHERE dados_extraidos_ok = 1")
-            com_dados = cursor.fetchone()[0]
-            
-            # Verificar content_bytes
-            cursor.execute("PRAGMA table_info(faturas_brk)")
-            campos = [row[1] for row in cursor.fetchall()]
-            tem_content_bytes = 'content_bytes' in campos
+            # Contagens de resumo_mensal (poucas linhas por mês, sem varrer faturas_brk)
+            with self.lock_conexao:
+                total_registros, duplicatas, com_dados, com_pdf, normais_centavos = self.conn.execute("""
+                    SELECT COALESCE(SUM(qtd_faturas), 0), COALESCE(SUM(qtd_duplicatas), 0),
+                           COALESCE(SUM(qtd_com_dados), 0), COALESCE(SUM(qtd_com_pdf), 0),
+                           COALESCE(SUM(total_pia_centavos + total_casas_centavos), 0)
+                    FROM resumo_mensal
+                """).fetchone()
+                
+                # Verificar content_bytes
+                campos = [row[1] for row in self.conn.execute("PRAGMA table_info(faturas_brk)")]
+                tem_content_bytes = 'content_bytes' in campos
             
-            if tem_content_bytes:
-                cursor.execute("SELECT COUNT(*) FROM faturas_brk WHERE content_bytes IS NOT NULL AND content_bytes != ''")
-                com_pdf = cursor.fetchone()[0]
-                sem_pdf = total_registros - com_pdf
-            else:
+            if not tem_content_bytes:
                 com_pdf = 0
-                sem_pdf = total_registros
             
             return {
                 'total_registros': total_registros,
@@ -830,7 +1577,8 @@ class DatabaseBRK:
                 'com_dados_extraidos': com_dados,
                 'sem_dados_extraidos': total_registros - com_dados,
                 'com_pdf': com_pdf,
-                'sem_pdf': sem_pdf,
+                'sem_pdf': total_registros - com_pdf,
+                'valor_total_normais': round(normais_centavos / 100, 2),
                 'usando_onedrive': self.usando_onedrive,
                 'usando_fallback': self.usando_fallback,
                 'content_bytes_suportado': tem_content_bytes
@@ -12,7 +12,9 @@ import io
 import re
 import os
 import hashlib
+import json
 import base64
+import time
 import zipfile
 import xml.etree.ElementTree as ET
 from datetime import datetime, timedelta
@@ -36,6 +38,7 @@ class EmailProcessor:
         self.casa_oracao_vetor = []  # Vetor com nomes das casas (índice correspondente)
         
         # CONTROLE DE ESTADO
+        self.ultimo_erro_extracao = None
         self.relacionamento_carregado = False
         self.tentativas_carregamento = 0
         self.max_tentativas = 3
@@ -570,6 +573,10 @@ class EmailProcessor:
         Extrai dados completos de uma fatura BRK em PDF.
         Adaptação da função extract_info_from_pdf() do script desktop para cloud.
         
+        🆕 Texto extraído por backends plugáveis (processor/pdf_backends.py):
+        caminho rápido primeiro, pdfplumber só quando os campos essenciais
+        não validam no texto do backend anterior.
+        
         Args:
             pdf_bytes (bytes): Conteúdo do PDF em bytes (do email)
             nome_arquivo (str): Nome do arquivo PDF para logs
@@ -578,77 +585,187 @@ class EmailProcessor:
             dict: Dados extraídos da fatura ou None se erro
         """
         try:
-            # Importar pdfplumber apenas quando necessário
-            try:
-                import pdfplumber
-            except ImportError:
-                print(f"❌ pdfplumber não instalado - usando extração básica")
+            from processor.pdf_backends import (
+                obter_backends_ativos, validar_campos_essenciais, registrar_resultado_backend,
+                executar_backend, mesclar_por_confianca, calcular_confianca,
+                registrar_backend_campos
+            )
+            
+            self.ultimo_erro_extracao = None
+            backends = obter_backends_ativos()
+            if not backends:
+                print(f"❌ Nenhum backend PDF instalado - usando extração básica")
                 return self._extrair_dados_basico_pdf(pdf_bytes, nome_arquivo)
             
             print(f"🔍 Processando fatura: {nome_arquivo}")
             
-            # Converter bytes para objeto de arquivo
-            pdf_buffer = io.BytesIO(pdf_bytes)
-            
-            # Abrir PDF com pdfplumber (igual ao desktop)
-            with pdfplumber.open(pdf_buffer) as pdf:
-                if not pdf.pages:
-                    print(f"❌ PDF vazio: {nome_arquivo}")
-                    return None
+            info = None
+            for posicao, backend in enumerate(backends):
+                ultimo_backend = posicao == len(backends) - 1
+                inicio = time.perf_counter()
                 
-                # Extrair texto da primeira página (igual ao desktop)
-                first_page = pdf.pages[0]
-                text = first_page.extract_text() or ""
+                # Parsing isolado em subprocesso (timeout + limite de memória)
+                resultado = executar_backend(backend, pdf_bytes)
+                tempo_ms = (time.perf_counter() - inicio) * 1000
                 
-                if not text.strip():
-                    print(f"❌ Não foi possível extrair texto: {nome_arquivo}")
-                    return None
+                if resultado.get('status') != 'sucesso':
+                    registrar_resultado_backend(backend.nome, tempo_ms, False, erro=True)
+                    
+                    if resultado.get('limite_excedido'):
+                        # Arquivo patológico: não insistir com backends mais pesados
+                        self.ultimo_erro_extracao = resultado.get('mensagem')
+                        print(f"❌ PDF abandonado: {nome_arquivo} - {self.ultimo_erro_extracao}")
+                        return None
+                    
+                    print(f"⚠️ Backend {backend.nome} falhou: {resultado.get('mensagem')}")
+                    continue
                 
-                print(f"📄 Texto extraído: {len(text)} caracteres")
+                text = resultado.get('texto') or ""
                 
-                # Inicializar estrutura de dados (exatamente igual ao desktop)
-                info = {
-                    "Data_Emissao": "Não encontrado",
-                    "Nota_Fiscal": "Não encontrado", 
-                    "Valor": "Não encontrado",
-                    "Codigo_Cliente": "Não encontrado",
-                    "Vencimento": "Não encontrado",
-                    "Competencia": "Não encontrado",
-                    "Casa de Oração": "Não encontrado",
-                    "Medido_Real": None,
-                    "Faturado": None,
-                    "Média 6M": None,
-                    "Porcentagem Consumo": "",
-                    "Alerta de Consumo": "",
-                    "nome_arquivo": nome_arquivo,
-                    "tamanho_bytes": len(pdf_bytes)
-                }
+                if not text.strip():
+                    registrar_resultado_backend(backend.nome, tempo_ms, False)
+                    print(f"⚠️ Backend {backend.nome}: nenhum texto extraído")
+                    continue
                 
-                # EXTRAIR DADOS USANDO PATTERNS DO SCRIPT DESKTOP
-                self._extrair_codigo_cliente(text, info)
-                self._extrair_nota_fiscal(text, info)
-                self._extrair_data_emissao(text, info)
-                self._extrair_valor_total(text, info)
-                self._extrair_data_vencimento(text, info)
-                self._extrair_competencia(text, info)
-                self._extrair_dados_consumo(text, info)
+                print(f"📄 Texto extraído ({backend.nome}, {tempo_ms:.0f}ms): {len(text)} caracteres")
                 
-                # Buscar Casa de Oração usando relacionamento OneDrive (nova funcionalidade)
-                if info["Codigo_Cliente"] != "Não encontrado":
-                    info["Casa de Oração"] = self.buscar_casa_de_oracao(info["Codigo_Cliente"])
+                # EXTRAIR DADOS USANDO PATTERNS DO SCRIPT DESKTOP
+                candidato = self._extrair_campos_texto(text, nome_arquivo, len(pdf_bytes))
+                registrar_backend_campos(candidato, backend.nome)
+                faltando = validar_campos_essenciais(candidato)
+                registrar_resultado_backend(backend.nome, tempo_ms, not faltando)
                 
-                # Calcular análise de consumo (igual ao desktop)
-                self._calcular_analise_consumo(info)
+                # Primeiro resultado vira base; backends seguintes só melhoram campos fracos
+                if info is None:
+                    info = candidato
+                else:
+                    mesclar_por_confianca(info, candidato)
+                    info["backend_pdf"] = f"{info['backend_pdf']}+{backend.nome}"
+                    faltando = validar_campos_essenciais(info)
                 
-                # Log dos dados extraídos
-                self._log_dados_extraidos(info)
+                if not faltando or ultimo_backend:
+                    break
                 
-                return info
+                print(f"🔁 {backend.nome}: campos inválidos/baixa confiança {faltando} → tentando próximo backend")
+            
+            if info is None:
+                print(f"❌ Não foi possível extrair texto: {nome_arquivo}")
+                return None
+            
+            # Buscar Casa de Oração usando relacionamento OneDrive (nova funcionalidade)
+            if info["Codigo_Cliente"] != "Não encontrado":
+                info["Casa de Oração"] = self.buscar_casa_de_oracao(info["Codigo_Cliente"])
+                if info["Casa de Oração"] != "Não encontrado":
+                    # CDC confirmado no relacionamento = confiança máxima
+                    self._marcar_fonte(info, "Codigo_Cliente", "relacionamento")
+                    self._marcar_fonte(info, "Casa de Oração", "relacionamento")
+            
+            # Calcular análise de consumo (igual ao desktop)
+            self._calcular_analise_consumo(info)
+            
+            # Score de confiança + estatísticas do ciclo
+            info["confianca_extracao"] = calcular_confianca(info)
+            self._registrar_confianca(info, escalonou="+" in info["backend_pdf"])
+            
+            # Log dos dados extraídos
+            self._log_dados_extraidos(info)
+            
+            return info
                 
         except Exception as e:
             print(f"❌ Erro processando PDF {nome_arquivo}: {e}")
             return None
 
+    def _extrair_campos_texto(self, text, nome_arquivo, tamanho_bytes):
+        """
+        Aplica os patterns do desktop sobre o texto da 1ª página.
+        Separado da leitura do PDF para poder validar o texto de cada backend.
+        
+        Returns:
+            dict: Estrutura info com os campos encontrados
+        """
+        # Inicializar estrutura de dados (exatamente igual ao desktop)
+        info = {
+            "Data_Emissao": "Não encontrado",
+            "Nota_Fiscal": "Não encontrado", 
+            "Valor": "Não encontrado",
+            "Codigo_Cliente": "Não encontrado",
+            "Vencimento": "Não encontrado",
+            "Competencia": "Não encontrado",
+            "Casa de Oração": "Não encontrado",
+            "Medido_Real": None,
+            "Faturado": None,
+            "Média 6M": None,
+            "Porcentagem Consumo": "",
+            "Alerta de Consumo": "",
+            "nome_arquivo": nome_arquivo,
+            "tamanho_bytes": tamanho_bytes,
+            "fontes_extracao": {}
+        }
+        
+        self._extrair_codigo_cliente(text, info)
+        self._extrair_nota_fiscal(text, info)
+        self._extrair_data_emissao(text, info)
+        self._extrair_valor_total(text, info)
+        self._extrair_data_vencimento(text, info)
+        self._extrair_competencia(text, info)
+        self._extrair_dados_consumo(text, info)
+        
+        return info
+
+    def _marcar_fonte(self, info, campo, fonte):
+        """Registra de onde veio o valor do campo (primario/alternativo/linha/relacionamento/candidato)."""
+        info.setdefault("fontes_extracao", {})[campo] = fonte
+
+    def _registrar_confianca(self, info, escalonou=False):
+        """Acumula fontes e confiança das faturas extraídas no ciclo atual."""
+        stats = getattr(self, 'estatisticas_confianca', None)
+        if stats is None:
+            stats = self.resetar_estatisticas_confianca()
+        
+        stats["faturas"] += 1
+        stats["soma_confianca"] += info.get("confianca_extracao") or 0.0
+        if escalonou:
+            stats["escalonadas_backend_lento"] += 1
+        
+        from processor.pdf_backends import CAMPOS_CONFIANCA, confianca_campo
+        fontes = info.get("fontes_extracao") or {}
+        for campo in CAMPOS_CONFIANCA:
+            fonte = fontes.get(campo, "ausente")
+            stats["por_fonte"][fonte] = stats["por_fonte"].get(fonte, 0) + 1
+            if confianca_campo(info, campo) < 0.6:
+                stats["campos_baixa_confianca"][campo] = stats["campos_baixa_confianca"].get(campo, 0) + 1
+
+    def resetar_estatisticas_confianca(self):
+        """Zera as estatísticas de confiança (início de ciclo do monitor)."""
+        self.estatisticas_confianca = {
+            "faturas": 0,
+            "soma_confianca": 0.0,
+            "escalonadas_backend_lento": 0,
+            "por_fonte": {},
+            "campos_baixa_confianca": {},
+            "inicio": datetime.now().isoformat()
+        }
+        return self.estatisticas_confianca
+
+    def obter_estatisticas_confianca(self):
+        """
+        Estatísticas agregadas de confiança desde o último reset.
+        
+        Returns:
+            dict: faturas, confiança média, contagem por fonte e campos fracos
+        """
+        stats = getattr(self, 'estatisticas_confianca', None) or self.resetar_estatisticas_confianca()
+        faturas = stats["faturas"]
+        return {
+            "faturas": faturas,
+            "confianca_media": round(stats["soma_confianca"] / faturas, 2) if faturas else None,
+            "escalonadas_backend_lento": stats["escalonadas_backend_lento"],
+            "por_fonte": dict(stats["por_fonte"]),
+            "campos_baixa_confianca": dict(stats["campos_baixa_confianca"]),
+            "inicio": stats["inicio"]
+        }
+
     def _extrair_dados_basico_pdf(self, pdf_bytes, nome_arquivo):
         """
         Extração básica quando pdfplumber não disponível.
@@ -676,6 +793,7 @@ class EmailProcessor:
         cdc_match = re.search(r'CDC.*?(\d+-\d+)', text)
         if cdc_match:
             info["Codigo_Cliente"] = cdc_match.group(1).strip()
+            self._marcar_fonte(info, "Codigo_Cliente", "primario")
             print(f"  ✓ CDC encontrado (padrão principal): {info['Codigo_Cliente']}")
             return
         
@@ -686,6 +804,7 @@ class EmailProcessor:
                 matches = re.findall(pattern, text, re.IGNORECASE)
                 if matches:
                     info["Codigo_Cliente"] = matches[0].strip()
+                    self._marcar_fonte(info, "Codigo_Cliente", "alternativo")
                     print(f"  ✓ CDC encontrado (padrão alternativo): {info['Codigo_Cliente']}")
                     return
         
@@ -704,6 +823,7 @@ class EmailProcessor:
                 for potential_cdc in all_potential_cdcs:
                     if potential_cdc in self.cdc_brk_vetor:
                         info["Codigo_Cliente"] = potential_cdc
+                        self._marcar_fonte(info, "Codigo_Cliente", "relacionamento")
                         print(f"  ✓ CDC encontrado (verificado no relacionamento): {potential_cdc}")
                         return
                 
@@ -712,6 +832,7 @@ class EmailProcessor:
                     valid_cdcs = [cdc for cdc in all_potential_cdcs if not re.match(r'\d{2}/\d{2}-', cdc)]
                     if valid_cdcs:
                         info["Codigo_Cliente"] = valid_cdcs[0]
+                        self._marcar_fonte(info, "Codigo_Cliente", "candidato")
                         print(f"  ⚠️ CDC candidato (não verificado): {valid_cdcs[0]}")
 
     def _extrair_nota_fiscal(self, text, info):
@@ -720,6 +841,7 @@ class EmailProcessor:
         conta_match = re.search(r'N° DA CONTA\s+(\d+)', text)
         if conta_match:
             info["Nota_Fiscal"] = conta_match.group(1).strip()
+            self._marcar_fonte(info, "Nota_Fiscal", "primario")
             print(f"  ✓ Nota Fiscal: {info['Nota_Fiscal']}")
 
     def _extrair_data_emissao(self, text, info):
@@ -728,6 +850,7 @@ class EmailProcessor:
         data_emissao_match = re.search(r'DATA EMISSÃO\s+(\d{2}/\d{2}/\d{4})', text)
         if data_emissao_match:
             info["Data_Emissao"] = data_emissao_match.group(1)
+            self._marcar_fonte(info, "Data_Emissao", "primario")
             print(f"  ✓ Data Emissão: {info['Data_Emissao']}")
             return
         
@@ -741,6 +864,7 @@ class EmailProcessor:
                 match = re.search(pattern, text)
                 if match:
                     info["Data_Emissao"] = match.group(1)
+                    self._marcar_fonte(info, "Data_Emissao", "alternativo")
                     print(f"  ✓ Data Emissão (alternativo): {info['Data_Emissao']}")
                     break
 
@@ -748,11 +872,14 @@ class EmailProcessor:
         """Extrai valor total (padrão simplificado do desktop)"""
         # Padrão principal do desktop
         valor_match = re.search(r'VALOR TOTAL - R\$\s*\n?\s*([\d.,]+)', text)
+        fonte = "primario"
         if not valor_match:
             valor_match = re.search(r'VALOR R\$\s*\n?.*?([\d.,]+)', text)
+            fonte = "alternativo"
         
         if valor_match:
             info["Valor"] = valor_match.group(1).strip()
+            self._marcar_fonte(info, "Valor", fonte)
             print(f"  ✓ Valor: R$ {info['Valor']}")
 
     def _extrair_data_vencimento(self, text, info):
@@ -761,6 +888,7 @@ class EmailProcessor:
         vencimento_match = re.search(r'DATA DE VENCIMENTO\s+(\d{2}/\d{2}/\d{4})', text)
         if vencimento_match:
             info["Vencimento"] = vencimento_match.group(1)
+            self._marcar_fonte(info, "Vencimento", "primario")
             print(f"  ✓ Vencimento: {info['Vencimento']}")
             return
         
@@ -776,6 +904,7 @@ class EmailProcessor:
                 match = re.search(pattern, text)
                 if match:
                     info["Vencimento"] = match.group(1)
+                    self._marcar_fonte(info, "Vencimento", "alternativo")
                     print(f"  ✓ Vencimento (alternativo): {info['Vencimento']}")
                     break
 
@@ -785,6 +914,7 @@ class EmailProcessor:
         competencia_match = re.search(r'(?:Jan|Fev|Mar|Abr|Mai|Jun|Jul|Ago|Set|Out|Nov|Dez)[a-z]*\/\d{4}', text, re.IGNORECASE)
         if competencia_match:
             info["Competencia"] = competencia_match.group(0)
+            self._marcar_fonte(info, "Competencia", "primario")
             print(f"  ✓ Competência: {info['Competencia']}")
             return
         
@@ -800,6 +930,7 @@ class EmailProcessor:
                 match = re.search(pattern, text, re.IGNORECASE)
                 if match:
                     info["Competencia"] = match.group(1)
+                    self._marcar_fonte(info, "Competencia", "alternativo")
                     print(f"  ✓ Competência (alternativo): {info['Competencia']}")
                     break
 
@@ -810,6 +941,7 @@ class EmailProcessor:
         medido_real_match = re.search(r'MEDIDO REAL\s+(\d+)', text)
         if medido_real_match:
             info["Medido_Real"] = int(medido_real_match.group(1))
+            self._marcar_fonte(info, "Medido_Real", "primario")
             print(f"  ✓ Medido Real: {info['Medido_Real']}m³")
         else:
             # Busca alternativa por linhas (igual ao desktop)
@@ -819,6 +951,7 @@ class EmailProcessor:
                     digits = re.findall(r'\d+', lines[i])
                     if digits:
                         info["Medido_Real"] = int(digits[-1])
+                        self._marcar_fonte(info, "Medido_Real", "linha")
                         print(f"  ✓ Medido Real (linha): {info['Medido_Real']}m³")
                         break
         
@@ -826,6 +959,7 @@ class EmailProcessor:
         faturado_match = re.search(r'FATURADO\s+(\d+)', text)
         if faturado_match:
             info["Faturado"] = int(faturado_match.group(1))
+            self._marcar_fonte(info, "Faturado", "primario")
             print(f"  ✓ Faturado: {info['Faturado']}m³")
         else:
             # Busca alternativa por linhas (igual ao desktop)
@@ -835,10 +969,12 @@ class EmailProcessor:
                     digits = re.findall(r'\d+', lines[i])
                     if digits:
                         info["Faturado"] = int(digits[-1])
+                        self._marcar_fonte(info, "Faturado", "linha")
                         print(f"  ✓ Faturado (linha): {info['Faturado']}m³")
                         break
                     elif i + 1 < len(lines) and lines[i + 1].strip().isdigit():
                         info["Faturado"] = int(lines[i + 1].strip())
+                        self._marcar_fonte(info, "Faturado", "linha")
                         print(f"  ✓ Faturado (linha seguinte): {info['Faturado']}m³")
                         break
         
@@ -846,12 +982,14 @@ class EmailProcessor:
         media_match = re.search(r'Média dos últimos 6 meses:\s*(\d+)', text)
         if media_match:
             info["Média 6M"] = int(media_match.group(1))
+            self._marcar_fonte(info, "Média 6M", "primario")
             print(f"  ✓ Média 6M: {info['Média 6M']}m³")
         else:
             # Buscas alternativas (igual ao desktop)
             media_match = re.search(r'Média dos últimos 6 meses:?\s*(\d+)', text)
             if media_match:
                 info["Média 6M"] = int(media_match.group(1))
+                self._marcar_fonte(info, "Média 6M", "alternativo")
                 print(f"  ✓ Média 6M (alternativo): {info['Média 6M']}m³")
             else:
                 lines = text.split('\n')
@@ -860,10 +998,12 @@ class EmailProcessor:
                         digits = re.findall(r'\d+', lines[i])
                         if digits:
                             info["Média 6M"] = int(digits[-1])
+                            self._marcar_fonte(info, "Média 6M", "linha")
                             print(f"  ✓ Média 6M (linha): {info['Média 6M']}m³")
                             break
                         elif i + 1 < len(lines) and lines[i + 1].strip().isdigit():
                             info["Média 6M"] = int(lines[i + 1].strip())
+                            self._marcar_fonte(info, "Média 6M", "linha")
                             print(f"  ✓ Média 6M (linha seguinte): {info['Média 6M']}m³")
                             break
 
@@ -1103,6 +1243,8 @@ class EmailProcessor:
                                                         pdf_completo['onedrive_url'] = resultado_upload.get('url_arquivo')
                                                         pdf_completo['onedrive_pasta'] = resultado_upload.get('pasta_path')
                                                         pdf_completo['nome_onedrive'] = resultado_upload.get('nome_arquivo')
+                                                        pdf_completo['onedrive_item_id'] = resultado_upload.get('onedrive_item_id')
+                                                        self._registrar_item_onedrive(pdf_completo['database_id'], resultado_upload, pdf_bytes)
                                                         print(f"📁 OneDrive: {resultado_upload.get('pasta_path')}{resultado_upload.get('nome_arquivo')}")
                                                     else:
                                                         pdf_completo['onedrive_upload'] = False
@@ -1127,7 +1269,7 @@ class EmailProcessor:
                                     pdf_completo = {
                                         **pdf_info_basico,
                                         'dados_extraidos_ok': False,
-                                        'erro_extracao': 'Falha na extração de dados',
+                                        'erro_extracao': getattr(self, 'ultimo_erro_extracao', None) or 'Falha na extração de dados',
                                         'relacionamento_usado': False
                                     }
                                     pdfs_com_dados.append(pdf_completo)
@@ -1297,7 +1439,11 @@ class EmailProcessor:
                 
                 # ==================== FLAGS DE CONTROLE ====================
                 'dados_extraidos_ok': pdf_data.get('dados_extraidos_ok', False),
-                'relacionamento_usado': pdf_data.get('relacionamento_usado', False)
+                'relacionamento_usado': pdf_data.get('relacionamento_usado', False),
+                
+                # ==================== CONFIANÇA DA EXTRAÇÃO ====================
+                'fontes_extracao': json.dumps(pdf_data.get('fontes_extracao') or {}, ensure_ascii=False),
+                'confianca_extracao': pdf_data.get('confianca_extracao')
             }
             
             # 🔍 LOG DE VERIFICAÇÃO - Para auditoria
@@ -1350,6 +1496,8 @@ class EmailProcessor:
             # Status expandido (NOVAS funcionalidades)
             status_relacionamento = self.status_relacionamento()
             
+            from processor.pdf_backends import obter_estatisticas_backends
+            
             # Status integrado
             status_completo = {
                 **status_basico,
@@ -1361,6 +1509,7 @@ class EmailProcessor:
                     "logs_estruturados": True,
                     "compatibilidade_total": True
                 },
+                "backends_pdf": obter_estatisticas_backends(),
                 "tentativas_carregamento": self.tentativas_carregamento,
                 "max_tentativas": self.max_tentativas,
                 "versao": "SEM_PANDAS_v1.0"
@@ -2183,7 +2332,8 @@ class EmailProcessor:
             dados_fatura (dict): Dados extraídos da fatura (já mapeados pelo preparar_dados_para_database)
             
         Returns:
-            dict: Resultado do upload {'status': 'sucesso/erro', 'mensagem': '...', 'url_arquivo': '...'}
+            dict: Resultado do upload {'status': 'sucesso/erro', 'mensagem': '...', 'url_arquivo': '...',
+                  'onedrive_item_id': '...', 'onedrive_etag': '...', 'tamanho': N}
         """
         try:
             if not self.onedrive_brk_id:
@@ -2237,7 +2387,10 @@ class EmailProcessor:
                     'mensagem': f'PDF enviado para /BRK/Faturas/{ano}/{mes:02d}/',
                     'url_arquivo': resultado_upload.get('url_arquivo'),
                     'nome_arquivo': nome_padronizado,
-                    'pasta_path': f'/BRK/Faturas/{ano}/{mes:02d}/'
+                    'pasta_path': f'/BRK/Faturas/{ano}/{mes:02d}/',
+                    'onedrive_item_id': resultado_upload.get('arquivo_id'),
+                    'onedrive_etag': resultado_upload.get('etag'),
+                    'tamanho': resultado_upload.get('tamanho')
                 }
             else:
                 return {
@@ -2254,6 +2407,25 @@ class EmailProcessor:
                 'url_arquivo': None
             }
 
+    def _registrar_item_onedrive(self, fatura_id, resultado_upload, pdf_bytes):
+        """
+        Persiste item id/eTag/tamanho do PDF em faturas_brk e guarda os bytes
+        no cache do alerta: o PDF passa a ser baixado por id, sem remontar caminho.
+        """
+        item_id = resultado_upload.get('onedrive_item_id')
+        if not item_id:
+            return
+        
+        self.database_brk.registrar_upload_onedrive(
+            fatura_id, item_id, resultado_upload.get('onedrive_etag'), resultado_upload.get('tamanho')
+        )
+        
+        try:
+            from processor.alertas.alert_processor import guardar_pdf_recente
+            guardar_pdf_recente(item_id, pdf_bytes)
+        except ImportError:
+            pass  # Alertas opcionais
+
     def _garantir_estrutura_pastas_onedrive(self, ano, mes):
         """
         🆕 FUNCIONALIDADE NOVA: Garante estrutura /BRK/Faturas/YYYY/MM/ no OneDrive.
@@ -2441,7 +2613,8 @@ class EmailProcessor:
             pasta_id (str): ID da pasta de destino no OneDrive
             
         Returns:
-            dict: {'status': 'sucesso/erro', 'mensagem': '...', 'url_arquivo': '...'}
+            dict: {'status': 'sucesso/erro', 'mensagem': '...', 'url_arquivo': '...',
+                   'arquivo_id': '...', 'etag': '...', 'tamanho': N}
         """
         try:
             headers = self.auth.obter_headers_autenticados()
@@ -2465,6 +2638,7 @@ class EmailProcessor:
                     'mensagem': 'Upload OneDrive realizado com sucesso',
                     'url_arquivo': arquivo_info.get('webUrl', ''),
                     'arquivo_id': arquivo_info['id'],
+                    'etag': arquivo_info.get('eTag'),
                     'tamanho': arquivo_info.get('size', 0)
                 }
             else:
@@ -12,6 +12,11 @@ from collections import defaultdict
 from datetime import datetime
 import os
 import io
+import re
+import time
+import hashlib
+import zipfile
+from copy import copy
 import requests
 from flask import jsonify, request, send_file
 import logging
@@ -32,6 +37,8 @@ class ExcelGeneratorBRK:
             5: "Maio", 6: "Junho", 7: "Julho", 8: "Agosto", 
             9: "Setembro", 10: "Outubro", 11: "Novembro", 12: "Dezembro"
         }
+        # streaming: write_only + NamedStyles | padrao: Workbook célula a célula
+        self.modo_escrita = os.getenv("EXCEL_MODO_ESCRITA", "streaming").lower()
     
     def handle_request(self):
         """Handle HTTP request para geração Excel"""
@@ -286,6 +293,202 @@ class ExcelGeneratorBRK:
             logger.error(f"Erro gerar_planilha_mensal: {e}")
             raise
     
+    def gerar_planilhas_multiplos_meses(self, meses, database=None, com_consolidado=False):
+        """
+        Gerar várias planilhas com UMA consulta ao database e UM download do
+        CDC_BRK_CCB.xlsx (o loop de gerar_planilha_mensal faz 2 consultas
+        SELECT * e 1 download por mês).
+        
+        Args:
+            meses: [(mes, ano), ...]
+            database: DatabaseBRK já conectado (None → cria um único para o lote)
+            com_consolidado: incluir 'folhas' (XML da folha streaming) e 'resumos'
+                             de cada mês para o consolidado anual
+        
+        EXCEL_PROCESSOS=N (>1) monta os workbooks em N processos.
+        
+        Returns:
+            dict: {'planilhas': {(mes, ano): bytes}, 'erros': {(mes, ano): str}, 'tempos': {...}}
+        """
+        inicio = time.perf_counter()
+        meses = list(dict.fromkeys((int(mes), int(ano)) for mes, ano in meses))
+        logger.info(f"Iniciando geração Excel em lote: {len(meses)} mês(es)")
+        
+        # 1. TODAS AS FATURAS DOS MESES (uma consulta indexada)
+        if database is None:
+            from processor.database_brk import DatabaseBRK
+            
+            onedrive_brk_id = os.getenv("ONEDRIVE_BRK_ID")
+            if not onedrive_brk_id:
+                raise ValueError("ONEDRIVE_BRK_ID não configurado")
+            database = DatabaseBRK(self.auth, onedrive_brk_id)
+        
+        if not database.conn:
+            raise ValueError("Conexão database não disponível")
+        
+        faturas_por_mes = database.obter_faturas_meses(meses)
+        resumos_mes = database.obter_resumo_meses(meses)
+        tempo_consulta = time.perf_counter() - inicio
+        
+        # 2. BASE COMPLETA OneDrive (uma vez para todos os meses), guardada no
+        #    database para a detecção de faltantes por anti-join
+        marco = time.perf_counter()
+        base_completa = self._carregar_base_onedrive()
+        if base_completa:
+            database.salvar_relacionamento(base_completa)
+        tempo_base = time.perf_counter() - marco
+        logger.info(f"Casas na base OneDrive: {len(base_completa)}")
+        
+        # 3. DADOS DE CADA MÊS (mesmas etapas de gerar_planilha_mensal)
+        tarefas = []
+        for mes, ano in meses:
+            faturas_mes = faturas_por_mes.get((mes, ano), [])
+            faturas_normais = [f for f in faturas_mes if f.get("status_duplicata") == "NORMAL"]
+            faturas_outros = sorted(
+                (f for f in faturas_mes if f.get("status_duplicata") not in (None, "NORMAL")),
+                key=lambda f: (f["status_duplicata"], f.get("casa_oracao") is not None, f.get("casa_oracao") or "", f.get("id") or 0)
+            )
+            
+            casas_faltantes = [
+                self._registro_faltante(casa["cdc"], casa["casa_oracao"], casa["vencimento"], mes, ano)
+                for casa in database.casas_faltantes(mes, ano)
+            ] if base_completa else []
+            dados_pia, dados_casas = self._separar_pia_casas(faturas_normais + casas_faltantes)
+            
+            # Faltantes só o gerador conhece (base OneDrive): gravados no resumo
+            faltantes_por_vencimento = defaultdict(int)
+            for casa in casas_faltantes:
+                faltantes_por_vencimento[casa["vencimento"]] += 1
+            database.registrar_faltantes_resumo(mes, ano, faltantes_por_vencimento)
+            
+            totais = _totais_resumo(resumos_mes.get((mes, ano)), dados_pia, dados_casas)
+            tarefas.append((dados_pia, dados_casas, faturas_outros, mes, ano, totais))
+        
+        # 4. WORKBOOKS (sequencial ou pool de processos)
+        marco = time.perf_counter()
+        planilhas, erros = self._gerar_workbooks_lote(tarefas)
+        tempo_geracao = time.perf_counter() - marco
+        
+        resultado = {'planilhas': planilhas, 'erros': erros}
+        if com_consolidado:
+            resultado['folhas'], resultado['resumos'] = self._folhas_consolidado(tarefas, planilhas)
+        
+        tempos = {
+            'consulta_segundos': round(tempo_consulta, 3),
+            'base_onedrive_segundos': round(tempo_base, 3),
+            'geracao_segundos': round(tempo_geracao, 3),
+            'total_segundos': round(time.perf_counter() - inicio, 3),
+        }
+        logger.info(f"Lote Excel: {len(planilhas)} planilha(s), {len(erros)} erro(s) em {tempos['total_segundos']}s")
+        
+        resultado['tempos'] = tempos
+        return resultado
+    
+    def _folhas_consolidado(self, tarefas, planilhas):
+        """XML da folha (layout streaming) e totais de cada mês gerado, para o consolidado anual"""
+        from processor.consolidado_anual import extrair_folha
+        
+        folhas, resumos = {}, {}
+        for dados_pia, dados_casas, faturas_outros, mes, ano, totais in tarefas:
+            if (mes, ano) not in planilhas:
+                continue
+            
+            # Modo padrão tem outro styles.xml: folha refeita em streaming
+            excel_bytes = planilhas[(mes, ano)]
+            if self.modo_escrita != "streaming":
+                excel_bytes = self._gerar_excel_streaming(dados_pia, dados_casas, faturas_outros, mes, ano, totais)
+            folhas[(mes, ano)] = extrair_folha(excel_bytes)
+            
+            if totais:
+                total_pia, total_geral = totais['pia'], totais['geral']
+            else:
+                total_pia = sum(_valor_somavel(r.get("valor")) for r in dados_pia)
+                total_geral = total_pia + sum(_valor_somavel(r.get("valor")) for r in dados_casas)
+            faltantes = sum(1 for r in dados_pia + dados_casas if r.get("status_duplicata") == "FALTANTE")
+            resumos[(mes, ano)] = {
+                'qtd_faturas': len(dados_pia) + len(dados_casas) - faltantes,
+                'qtd_faltantes': faltantes,
+                'qtd_outros': len(faturas_outros),
+                'total_pia': round(total_pia, 2),
+                'total_casas': round(total_geral - total_pia, 2),
+                'total_geral': round(total_geral, 2),
+            }
+        
+        return folhas, resumos
+    
+    def _gerar_workbooks_lote(self, tarefas):
+        """Workbooks do lote: em processo (padrão) ou em EXCEL_PROCESSOS processos"""
+        planilhas, erros = {}, {}
+        
+        processos = int(os.getenv("EXCEL_PROCESSOS", "0") or 0)
+        if processos > 1 and len(tarefas) > 1:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            
+            # spawn: o monitor roda em thread, fork herdaria locks/conexões
+            with ProcessPoolExecutor(
+                max_workers=min(processos, len(tarefas)),
+                mp_context=multiprocessing.get_context("spawn")
+            ) as pool:
+                futuros = {
+                    (tarefa[3], tarefa[4]): pool.submit(_gerar_excel_em_processo, self.modo_escrita, *tarefa)
+                    for tarefa in tarefas
+                }
+                for chave, futuro in futuros.items():
+                    try:
+                        planilhas[chave] = futuro.result()
+                    except Exception as e:
+                        logger.error(f"Erro gerando planilha {chave[0]:02d}/{chave[1]}: {e}")
+                        erros[chave] = str(e)
+            return planilhas, erros
+        
+        for tarefa in tarefas:
+            chave = (tarefa[3], tarefa[4])
+            try:
+                planilhas[chave] = self._gerar_excel_com_controle(*tarefa)
+            except Exception as e:
+                logger.error(f"Erro gerando planilha {chave[0]:02d}/{chave[1]}: {e}")
+                erros[chave] = str(e)
+        
+        return planilhas, erros
+    
+    def comparar_geracao_multiplos_meses(self, meses, database=None):
+        """
+        Tempo total: loop atual (gerar_planilha_mensal por mês) vs. lote.
+        
+        Returns:
+            dict: tempos dos dois caminhos, speedup e meses com bytes diferentes
+        """
+        inicio = time.perf_counter()
+        por_mes = {(mes, ano): self.gerar_planilha_mensal(mes, ano) for mes, ano in meses}
+        tempo_loop = time.perf_counter() - inicio
+        
+        lote = self.gerar_planilhas_multiplos_meses(meses, database)
+        tempo_lote = lote['tempos']['total_segundos']
+        
+        # Planilhas comparadas pelo conteúdo (o zip do xlsx carrega data/hora)
+        diferentes = [
+            f"{mes:02d}/{ano}" for (mes, ano), excel_bytes in por_mes.items()
+            if _assinatura_planilha(excel_bytes) != _assinatura_planilha(lote['planilhas'].get((mes, ano), b""))
+        ]
+        
+        resultado = {
+            'meses': len(por_mes),
+            'loop_segundos': round(tempo_loop, 3),
+            'lote_segundos': tempo_lote,
+            'lote_tempos': lote['tempos'],
+            'speedup': round(tempo_loop / tempo_lote, 1) if tempo_lote else None,
+            'meses_diferentes': diferentes,
+        }
+        
+        print(f"\n📊 GERAÇÃO {len(por_mes)} MÊS(ES): loop vs. lote")
+        print(f"   🐢 Loop por mês: {resultado['loop_segundos']}s")
+        print(f"   ⚡ Lote: {tempo_lote}s {lote['tempos']}")
+        print(f"   🚀 Speedup: {resultado['speedup']}x")
+        print(f"   {'✅' if not diferentes else '❌'} Planilhas diferentes: {diferentes or 'nenhuma'}")
+        
+        return resultado
+    
     def _buscar_faturas_prontas(self, mes, ano):
         """BUSCAR DADOS NORMAIS da tabela faturas_brk"""
         try:
@@ -408,6 +611,28 @@ class ExcelGeneratorBRK:
             logger.error(f"Erro _carregar_base_onedrive: {e}")
             return []
     
+    def obter_etag_base_onedrive(self):
+        """eTag atual do CDC_BRK_CCB.xlsx (só metadados, sem baixar) ou None"""
+        try:
+            headers = self.auth.obter_headers_autenticados()
+            url = "https://graph.microsoft.com/v1.0/me/drive/root:/BRK/CDC_BRK_CCB.xlsx?$select=eTag"
+            
+            response = requests.get(url, headers=headers, timeout=15)
+            
+            if response.status_code == 401 and self.auth.atualizar_token():
+                headers = self.auth.obter_headers_autenticados()
+                response = requests.get(url, headers=headers, timeout=15)
+            
+            if response.status_code == 200:
+                return response.json().get('eTag')
+            
+            logger.warning(f"eTag CDC_BRK_CCB.xlsx indisponível: HTTP {response.status_code}")
+            return None
+            
+        except Exception as e:
+            logger.warning(f"Erro consultando eTag CDC_BRK_CCB.xlsx: {e}")
+            return None
+    
     def _processar_excel_base(self, excel_content):
         """Processar Excel CDC_BRK_CCB.xlsx"""
         try:
@@ -454,30 +679,13 @@ class ExcelGeneratorBRK:
             cdcs_faltantes = cdcs_base - cdcs_processados
             
             casas_faltantes = []
-            mes_nome = self.mes_nomes[mes]
             
             for casa in base_completa:
                 if casa["cdc"] in cdcs_faltantes:
                     dia_venc = casa["dia_vencimento"]
                     vencimento = f"{dia_venc:02d}/{mes:02d}/{ano}"
                     
-                    casa_faltante = {
-                        "cdc": casa["cdc"],
-                        "casa_oracao": casa["casa"],
-                        "competencia": f"{mes_nome}/{ano}",
-                        "vencimento": vencimento,
-                        "valor": "",
-                        "nota_fiscal": "",
-                        "data_emissao": "",
-                        "medido_real": None,
-                        "faturado": None,
-                        "media_6m": None,
-                        "porcentagem_consumo": "",
-                        "alerta_consumo": "Não recebido",
-                        "status_duplicata": "FALTANTE"
-                    }
-                    
-                    casas_faltantes.append(casa_faltante)
+                    casas_faltantes.append(self._registro_faltante(casa["cdc"], casa["casa"], vencimento, mes, ano))
             
             return casas_faltantes
             
@@ -485,6 +693,51 @@ class ExcelGeneratorBRK:
             logger.error(f"Erro _detectar_casas_faltantes: {e}")
             return []
     
+    def _registro_faltante(self, cdc, casa_oracao, vencimento, mes, ano):
+        """Linha da planilha para casa sem fatura no mês"""
+        return {
+            "cdc": cdc,
+            "casa_oracao": casa_oracao,
+            "competencia": f"{self.mes_nomes[mes]}/{ano}",
+            "vencimento": vencimento,
+            "valor": "",
+            "nota_fiscal": "",
+            "data_emissao": "",
+            "medido_real": None,
+            "faturado": None,
+            "media_6m": None,
+            "porcentagem_consumo": "",
+            "alerta_consumo": "Não recebido",
+            "status_duplicata": "FALTANTE"
+        }
+    
+    def sincronizar_relacionamento(self, database, etag=None):
+        """
+        Relacionamento do database em dia com o CDC_BRK_CCB.xlsx: só baixa a
+        planilha quando o eTag mudou (ou ainda não há relacionamento guardado).
+        
+        Returns:
+            dict: {'status': 'sucesso'/'erro', 'baixado': bool, 'alterado': bool, 'qtd_casas': int}
+        """
+        etag = etag or self.obter_etag_base_onedrive()
+        versao = database.obter_versao_relacionamento()
+        
+        if etag and versao and versao['etag'] == etag:
+            return {'status': 'sucesso', 'baixado': False, 'alterado': False, 'qtd_casas': versao['qtd_casas']}
+        
+        base_completa = self._carregar_base_onedrive()
+        if not base_completa:
+            return {
+                'status': 'erro',
+                'mensagem': 'CDC_BRK_CCB.xlsx indisponível',
+                'baixado': False,
+                'alterado': False,
+                'qtd_casas': versao['qtd_casas'] if versao else 0
+            }
+        
+        alterado = database.salvar_relacionamento(base_completa, etag)
+        return {'status': 'sucesso', 'baixado': True, 'alterado': alterado, 'qtd_casas': len(base_completa)}
+    
     def _separar_pia_casas(self, dados_completos):
         """Separar PIA das demais casas"""
         dados_pia = []
@@ -503,8 +756,17 @@ class ExcelGeneratorBRK:
         casa = registro.get("casa_oracao", "").upper()
         return casa == "PIA"
     
-    def _gerar_excel_com_controle(self, dados_pia, dados_casas, faturas_outros, mes, ano):
-        """Gerar Excel formatado com seção de controle no final"""
+    def _gerar_excel_com_controle(self, dados_pia, dados_casas, faturas_outros, mes, ano, totais=None):
+        """
+        Gerar Excel formatado com seção de controle no final.
+        totais: subtotais prontos de resumo_mensal (_totais_resumo); None → soma das linhas
+        """
+        if self.modo_escrita == "streaming":
+            return self._gerar_excel_streaming(dados_pia, dados_casas, faturas_outros, mes, ano, totais)
+        return self._gerar_excel_padrao(dados_pia, dados_casas, faturas_outros, mes, ano, totais)
+    
+    def _gerar_excel_padrao(self, dados_pia, dados_casas, faturas_outros, mes, ano, totais=None):
+        """Modo padrão: Workbook completo em memória, célula a célula"""
         try:
             wb = openpyxl.Workbook()
             ws = wb.active
@@ -517,13 +779,13 @@ class ExcelGeneratorBRK:
             linha_atual = self._adicionar_titulo_principal(ws, linha_atual, mes, ano)
             
             # Seção PIA (NORMAIS)
-            linha_atual = self._adicionar_secao_pia(ws, linha_atual, dados_pia)
+            linha_atual = self._adicionar_secao_pia(ws, linha_atual, dados_pia, totais)
             
             # Seção Casas agrupadas por vencimento (NORMAIS)
-            linha_atual = self._adicionar_secao_casas(ws, linha_atual, dados_casas)
+            linha_atual = self._adicionar_secao_casas(ws, linha_atual, dados_casas, totais)
             
             # Totais finais (NORMAIS)
-            linha_atual = self._adicionar_totais_finais(ws, linha_atual, dados_pia, dados_casas)
+            linha_atual = self._adicionar_totais_finais(ws, linha_atual, dados_pia, dados_casas, totais)
             
             # SEÇÃO ADICIONAL: OUTROS STATUS (se existirem)
             if faturas_outros:
@@ -532,12 +794,8 @@ class ExcelGeneratorBRK:
             # Formatação geral
             self._aplicar_formatacao_geral(ws)
             
-            # Salvar em bytes
-            excel_buffer = io.BytesIO()
-            wb.save(excel_buffer)
-            excel_buffer.seek(0)
-            
-            return excel_buffer.read()
+            # Salvar em bytes (determinístico: mesmos dados = mesmos bytes)
+            return _salvar_xlsx_deterministico(wb, mes, ano)
             
         except Exception as e:
             logger.error(f"Erro _gerar_excel_com_controle: {e}")
@@ -555,7 +813,7 @@ class ExcelGeneratorBRK:
         
         return linha + 2
     
-    def _adicionar_secao_pia(self, ws, linha_inicial, dados_pia):
+    def _adicionar_secao_pia(self, ws, linha_inicial, dados_pia, totais=None):
         """Seção PIA"""
         linha = linha_inicial
         
@@ -591,7 +849,7 @@ class ExcelGeneratorBRK:
             ws[f"L{linha}"] = pia.get("alerta_consumo", "")
             
             # Somar valor se numérico (coluna G agora)
-            if pia.get("valor"):
+            if totais is None and pia.get("valor"):
                 try:
                     valor_num = float(pia["valor"].replace("R$", "").replace(",", ".").strip())
                     subtotal_pia += valor_num
@@ -600,6 +858,9 @@ class ExcelGeneratorBRK:
             
             linha += 1
         
+        if totais:
+            subtotal_pia = totais['pia']
+        
         # Subtotal PIA (ajustar para coluna G)
         ws.merge_cells(f"A{linha}:F{linha}")
         ws[f"A{linha}"] = "SUBTOTAL PIA:"
@@ -609,7 +870,7 @@ class ExcelGeneratorBRK:
         
         return linha + 2
     
-    def _adicionar_secao_casas(self, ws, linha_inicial, dados_casas):
+    def _adicionar_secao_casas(self, ws, linha_inicial, dados_casas, totais=None):
         """Seção Casas agrupadas por vencimento"""
         linha = linha_inicial
         
@@ -665,7 +926,7 @@ class ExcelGeneratorBRK:
                 ws[f"L{linha}"] = casa.get("alerta_consumo", "")
                 
                 # Somar valor (coluna G agora)
-                if casa.get("valor"):
+                if totais is None and casa.get("valor"):
                     try:
                         valor_num = float(casa["valor"].replace("R$", "").replace(",", ".").strip())
                         subtotal_vencimento += valor_num
@@ -675,6 +936,9 @@ class ExcelGeneratorBRK:
                 
                 linha += 1
             
+            if totais:
+                subtotal_vencimento = totais['vencimentos'].get(vencimento, 0)
+            
             # Subtotal do vencimento (ajustar para coluna G)
             ws.merge_cells(f"A{linha}:F{linha}")
             ws[f"A{linha}"] = f"SUBTOTAL {vencimento}:"
@@ -683,6 +947,9 @@ class ExcelGeneratorBRK:
             ws[f"G{linha}"].font = Font(bold=True, size=9)
             linha += 2
         
+        if totais:
+            subtotal_casas = _subtotal_casas(totais, casas_por_vencimento)
+        
         # Subtotal todas as casas (ajustar para coluna G)
         ws.merge_cells(f"A{linha}:F{linha}")
         ws[f"A{linha}"] = "SUBTOTAL CASAS:"
@@ -692,9 +959,12 @@ class ExcelGeneratorBRK:
         
         return linha + 1
     
-    def _adicionar_totais_finais(self, ws, linha, dados_pia, dados_casas):
+    def _adicionar_totais_finais(self, ws, linha, dados_pia, dados_casas, totais=None):
         """Totais finais"""
         total_geral = 0
+        if totais:
+            total_geral = totais['geral']
+            dados_pia = dados_casas = []
         
         # Somar PIAs
         for pia in dados_pia:
@@ -798,32 +1068,340 @@ class ExcelGeneratorBRK:
         
         return linha
     
-    def _salvar_onedrive_background(self, excel_bytes, mes, ano):
-        """Salvar no OneDrive de forma síncrona"""
+    # ========================================================================
+    # MODO STREAMING (write_only): mesmo layout do modo padrão, linha a linha
+    # ========================================================================
+    
+    def _gerar_excel_streaming(self, dados_pia, dados_casas, faturas_outros, mes, ano, totais=None):
+        """
+        Mesmo layout de _gerar_excel_padrao com Workbook(write_only=True):
+        linhas anexadas em ordem, estilos NamedStyle criados uma vez por
+        planilha (sem Font/PatternFill por célula) e bordas já no estilo.
+        """
         try:
-            nome_arquivo = f"BRK-Planilha-{ano}-{mes:02d}.xlsx"
-            pasta_destino = f"/BRK/Faturas/{ano}/{mes:02d}/"
+            wb = openpyxl.Workbook(write_only=True)
+            for estilo in _criar_estilos_brk():
+                wb.add_named_style(estilo)
             
-            logger.info(f"Salvando no OneDrive: {nome_arquivo}")
+            ws = wb.create_sheet(f"BRK {self.mes_nomes[mes]} {ano}")
+            for coluna, largura in LARGURAS_COLUNAS.items():
+                ws.column_dimensions[coluna].width = largura
             
-            headers = self.auth.obter_headers_autenticados()
-            url = f"https://graph.microsoft.com/v1.0/me/drive/root:{pasta_destino}{nome_arquivo}:/content"
+            escritor = _EscritorLinhasBRK(ws)
             
-            upload_headers = headers.copy()
-            upload_headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            # Título principal
+            escritor.linha_mesclada(f"📋 RELATÓRIO BRK - {self.mes_nomes[mes].upper()}/{ano}", "brk_titulo")
+            escritor.vazias(1)
+            
+            # Seção PIA
+            escritor.linha_mesclada("=== PIA (Conta Bancária A) ===", "brk_secao_pia")
+            escritor.linha(CABECALHOS_FATURA, "brk_cabecalho")
+            subtotal_pia = 0
+            for pia in dados_pia:
+                escritor.linha([pia.get(campo, "") for campo in CAMPOS_FATURA], "brk_dado")
+                if totais is None:
+                    subtotal_pia += _valor_somavel(pia.get("valor"))
+            if totais:
+                subtotal_pia = totais['pia']
+            escritor.linha_subtotal("SUBTOTAL PIA:", subtotal_pia, "brk_subtotal")
+            escritor.vazias(1)
+            
+            # Seção Casas agrupadas por vencimento
+            escritor.linha_mesclada("=== CASAS DE ORAÇÃO (Conta Bancária B) ===", "brk_secao_casas")
+            casas_por_vencimento = defaultdict(list)
+            for casa in dados_casas:
+                casas_por_vencimento[casa.get("vencimento", "")].append(casa)
+            
+            subtotal_casas = 0
+            for vencimento in sorted(casas_por_vencimento.keys()):
+                if not vencimento:
+                    continue
+                
+                escritor.linha_mesclada(f"Vencimento {vencimento}:", "brk_vencimento")
+                escritor.linha(CABECALHOS_FATURA, "brk_cabecalho_9")
+                
+                subtotal_vencimento = 0
+                for casa in casas_por_vencimento[vencimento]:
+                    escritor.linha([casa.get(campo, "") for campo in CAMPOS_FATURA], "brk_dado")
+                    if totais is None:
+                        subtotal_vencimento += _valor_somavel(casa.get("valor"))
+                if totais:
+                    subtotal_vencimento = totais['vencimentos'].get(vencimento, 0)
+                subtotal_casas += subtotal_vencimento
+                
+                escritor.linha_subtotal(f"SUBTOTAL {vencimento}:", subtotal_vencimento, "brk_subtotal_9")
+                escritor.vazias(1)
             
-            response = requests.put(url, headers=upload_headers, data=excel_bytes, timeout=60)
+            if totais:
+                subtotal_casas = _subtotal_casas(totais, casas_por_vencimento)
+            escritor.linha_subtotal("SUBTOTAL CASAS:", subtotal_casas, "brk_subtotal")
             
-            if response.status_code in [200, 201]:
-                logger.info(f"✅ Planilha salva no OneDrive: {pasta_destino}{nome_arquivo}")
-                return True
+            # Total geral (todas as PIAs e casas, inclusive sem vencimento)
+            if totais:
+                total_geral = totais['geral']
             else:
-                logger.error(f"❌ Erro salvando no OneDrive: HTTP {response.status_code}")
-                raise Exception(f"Erro HTTP {response.status_code}")
-                
+                total_geral = sum(_valor_somavel(r.get("valor")) for r in dados_pia + dados_casas)
+            escritor.linha_subtotal("TOTAL GERAL:", total_geral, "brk_total")
+            
+            # Seção de controle: outros status
+            if faturas_outros:
+                escritor.vazias(3)
+                escritor.linha_mesclada(
+                    f"=== CONTROLE: {len(faturas_outros)} FATURAS COM STATUS ESPECIAL ===", "brk_controle_secao"
+                )
+                escritor.linha_mesclada("⚠️ Faturas abaixo NÃO estão incluídas nos totais acima", "brk_controle_aviso")
+                escritor.vazias(1)
+                escritor.linha(CABECALHOS_CONTROLE, "brk_controle_cabecalho")
+                for fatura in faturas_outros:
+                    escritor.linha([
+                        fatura.get("cdc", ""), fatura.get("casa_oracao", ""), fatura.get("competencia", ""),
+                        fatura.get("vencimento", ""), fatura.get("valor", ""), fatura.get("status_duplicata", ""),
+                        "Verificar manualmente"
+                    ], "brk_controle_dado", estilo_vazio="brk_controle_vazio")
+            
+            return _salvar_xlsx_deterministico(wb, mes, ano)
+            
         except Exception as e:
-            logger.error(f"Erro salvando OneDrive: {e}")
+            logger.error(f"Erro _gerar_excel_streaming: {e}")
             raise
+    
+    def _salvar_onedrive_background(self, excel_bytes, mes, ano, database=None):
+        """
+        Salvar no OneDrive de forma síncrona pelo upload condicional
+        (salvar_planilha_inteligente): If-Match no eTag do último envio,
+        eTag novo registrado em planilhas_upload. Planilha editada pela
+        tesouraria (412) ou em uso não é sobrescrita - fica na fila.
+        """
+        from processor.planilha_backup import salvar_planilha_inteligente
+        
+        nome_arquivo = f"BRK-Planilha-{ano}-{mes:02d}.xlsx"
+        logger.info(f"Salvando no OneDrive: {nome_arquivo}")
+        
+        if database is None:
+            database = _database_planilhas(self.auth)
+        
+        if not salvar_planilha_inteligente(self.auth, excel_bytes, mes, ano, database=database):
+            raise Exception(f"{nome_arquivo} não atualizada (em uso ou alterada no OneDrive) - na fila de reenvio")
+        
+        logger.info(f"✅ Planilha salva no OneDrive: /BRK/Faturas/{ano}/{mes:02d}/{nome_arquivo}")
+        return True
+
+
+def _database_planilhas(auth):
+    """
+    DatabaseBRK do monitor (mesma conexão e lock_conexao) ou, sem monitor
+    ativo, um novo - None se indisponível (upload sem If-Match, como antes).
+    """
+    try:
+        from processor.monitor_brk import MonitorBRK
+        
+        monitor = MonitorBRK._monitor_instance
+        database = getattr(getattr(monitor, 'processor', None), 'database_brk', None)
+        if database is not None:
+            return database
+        
+        from processor.database_brk import DatabaseBRK
+        
+        onedrive_brk_id = os.getenv("ONEDRIVE_BRK_ID")
+        if not onedrive_brk_id:
+            raise ValueError("ONEDRIVE_BRK_ID não configurado")
+        return DatabaseBRK(auth, onedrive_brk_id)
+    
+    except Exception as e:
+        logger.error(f"DatabaseBRK indisponível para o controle de eTag: {e}")
+        return None
+
+
+def _salvar_xlsx_deterministico(wb, mes, ano, substituicoes=None):
+    """
+    Bytes do xlsx sem depender do horário de geração: datas do docProps/core.xml
+    e das entradas do zip fixadas no dia 1º do mês da planilha.
+    Mesmos dados → mesmos bytes (hash de conteúdo estável entre ciclos).
+    
+    substituicoes: {nome no zip: bytes} trocados na cópia (folhas já prontas)
+    """
+    substituicoes = substituicoes or {}
+    data_fixa = datetime(ano, mes, 1)
+    wb.properties.created = data_fixa
+    
+    excel_buffer = io.BytesIO()
+    wb.save(excel_buffer)
+    
+    # wb.save() sempre grava modified = utcnow() e a hora atual em cada entrada do zip
+    carimbo = data_fixa.strftime("%Y-%m-%dT%H:%M:%SZ").encode()
+    saida = io.BytesIO()
+    with zipfile.ZipFile(excel_buffer) as origem, zipfile.ZipFile(saida, "w", zipfile.ZIP_DEFLATED) as destino:
+        for info in origem.infolist():
+            conteudo = substituicoes.get(info.filename) or origem.read(info.filename)
+            if info.filename == "docProps/core.xml":
+                conteudo = re.sub(rb"(<dcterms:modified[^>]*>)[^<]*(</dcterms:modified>)",
+                                  rb"\g<1>" + carimbo + rb"\g<2>", conteudo)
+            
+            info_fixa = zipfile.ZipInfo(info.filename, date_time=data_fixa.timetuple()[:6])
+            info_fixa.compress_type = zipfile.ZIP_DEFLATED
+            info_fixa.external_attr = info.external_attr
+            destino.writestr(info_fixa, conteudo)
+    
+    return saida.getvalue()
+
+
+def hash_conteudo(excel_bytes):
+    """SHA-256 dos bytes da planilha (estável graças a _salvar_xlsx_deterministico)"""
+    return hashlib.sha256(excel_bytes).hexdigest()
+
+
+def _gerar_excel_em_processo(modo_escrita, dados_pia, dados_casas, faturas_outros, mes, ano, totais=None):
+    """Worker do pool de processos: gerador novo (sem auth), mesmo layout"""
+    generator = ExcelGeneratorBRK()
+    generator.modo_escrita = modo_escrita
+    return generator._gerar_excel_com_controle(dados_pia, dados_casas, faturas_outros, mes, ano, totais)
+
+
+# ============================================================================
+# LAYOUT COMPARTILHADO DO MODO STREAMING
+# ============================================================================
+
+CABECALHOS_FATURA = ["CDC", "Casa de Oração", "Competência", "Data Emissão", "Vencimento", "Nota Fiscal", "Valor", "Medido Real", "Faturado", "Média 6M", "% Consumo", "Alerta Consumo"]
+CAMPOS_FATURA = ["cdc", "casa_oracao", "competencia", "data_emissao", "vencimento", "nota_fiscal", "valor", "medido_real", "faturado", "media_6m", "porcentagem_consumo", "alerta_consumo"]
+CABECALHOS_CONTROLE = ["CDC", "Casa de Oração", "Competência", "Vencimento", "Valor", "Status", "Observação"]
+LARGURAS_COLUNAS = {'A': 12, 'B': 35, 'C': 15, 'D': 12, 'E': 12, 'F': 15, 'G': 15, 'H': 12, 'I': 12, 'J': 12, 'K': 15, 'L': 20}
+
+
+def _criar_estilos_brk():
+    """NamedStyles do relatório (uma instância por workbook, compartilhada pelas células)"""
+    from openpyxl.styles import NamedStyle
+    from openpyxl.styles.fonts import DEFAULT_FONT
+    
+    borda = Border(
+        left=Side(style='thin'), right=Side(style='thin'),
+        top=Side(style='thin'), bottom=Side(style='thin')
+    )
+    
+    def preenchimento(cor):
+        return PatternFill(start_color=cor, end_color=cor, fill_type="solid")
+    
+    centro = Alignment(horizontal="center")
+    
+    return [
+        NamedStyle("brk_titulo", font=Font(bold=True, size=14, color="FFFFFF"), fill=preenchimento("2C5282"),
+                   alignment=Alignment(horizontal="center", vertical="center"), border=borda),
+        NamedStyle("brk_secao_pia", font=Font(bold=True, color="FFFFFF"), fill=preenchimento("C53030"),
+                   alignment=centro, border=borda),
+        NamedStyle("brk_secao_casas", font=Font(bold=True, color="FFFFFF"), fill=preenchimento("2D7D32"),
+                   alignment=centro, border=borda),
+        NamedStyle("brk_cabecalho", font=Font(bold=True), border=borda),
+        NamedStyle("brk_cabecalho_9", font=Font(bold=True, size=9), border=borda),
+        NamedStyle("brk_vencimento", font=Font(bold=True, color="2D7D32"), border=borda),
+        NamedStyle("brk_subtotal", font=Font(bold=True), border=borda),
+        NamedStyle("brk_subtotal_9", font=Font(bold=True, size=9), border=borda),
+        NamedStyle("brk_total", font=Font(bold=True, size=12, color="FFFFFF"), fill=preenchimento("1A365D"),
+                   border=borda),
+        NamedStyle("brk_dado", font=DEFAULT_FONT, border=borda),
+        NamedStyle("brk_controle_secao", font=Font(bold=True, color="FFFFFF"), fill=preenchimento("FF6600"),
+                   alignment=centro, border=borda),
+        NamedStyle("brk_controle_aviso", font=Font(bold=True, italic=True, color="FF6600"), alignment=centro,
+                   border=borda),
+        NamedStyle("brk_controle_cabecalho", font=Font(bold=True, size=9), fill=preenchimento("E0E0E0"),
+                   border=borda),
+        NamedStyle("brk_controle_dado", font=DEFAULT_FONT, fill=preenchimento("FFF8DC"), border=borda),
+        NamedStyle("brk_controle_vazio", font=DEFAULT_FONT, fill=preenchimento("FFF8DC")),
+    ]
+
+
+def _valor_somavel(valor):
+    """Mesma regra de soma do modo padrão: "R$ 12,34" → 12.34; inválido → 0"""
+    if not valor:
+        return 0
+    try:
+        return float(valor.replace("R$", "").replace(",", ".").strip())
+    except:
+        return 0
+
+
+def _totais_resumo(resumo, dados_pia, dados_casas):
+    """
+    Subtotais da planilha a partir de resumo_mensal (centavos → reais), sem
+    converter o valor de cada linha. None quando o resumo não confere com as
+    linhas do mês (quantidade de PIAs/casas NORMAL) → soma linha a linha.
+    """
+    if not resumo:
+        return None
+    
+    qtd_pia = sum(1 for r in dados_pia if r.get("status_duplicata") == "NORMAL")
+    qtd_casas = sum(1 for r in dados_casas if r.get("status_duplicata") == "NORMAL")
+    if resumo['qtd_pia'] != qtd_pia or resumo['qtd_casas'] != qtd_casas:
+        logger.warning("resumo_mensal diverge das faturas do mês - totais somados linha a linha")
+        return None
+    
+    return {
+        'pia': resumo['total_pia_centavos'] / 100,
+        'vencimentos': {
+            vencimento: totais['total_casas_centavos'] / 100
+            for vencimento, totais in resumo['vencimentos'].items()
+        },
+        'centavos_vencimentos': {
+            vencimento: totais['total_casas_centavos']
+            for vencimento, totais in resumo['vencimentos'].items()
+        },
+        'geral': (resumo['total_pia_centavos'] + resumo['total_casas_centavos']) / 100,
+    }
+
+
+def _subtotal_casas(totais, casas_por_vencimento):
+    """SUBTOTAL CASAS: só vencimentos com seção na planilha (vazio fica só no total geral)"""
+    return sum(
+        totais['centavos_vencimentos'].get(vencimento, 0) for vencimento in casas_por_vencimento if vencimento
+    ) / 100
+
+
+class _EscritorLinhasBRK:
+    """Anexa linhas num worksheet write_only controlando o número da linha (para mesclagens)"""
+    
+    def __init__(self, ws):
+        self.ws = ws
+        self.numero = 0
+        self._estilos = {}
+        
+        # Índices de estilo (cellXfs) fixos na ordem dos NamedStyles, usados ou não:
+        # toda planilha streaming tem o mesmo styles.xml (folhas intercambiáveis)
+        for nome in ws.parent.style_names:
+            if nome.startswith("brk_"):
+                ws.parent._cell_styles.add(self._celula(None, nome)._style)
+    
+    def _celula(self, valor, estilo):
+        from openpyxl.cell import WriteOnlyCell
+        celula = WriteOnlyCell(self.ws, value=valor)
+        if estilo:
+            # Resolve o NamedStyle uma vez; depois só copia o StyleArray (índices)
+            if estilo not in self._estilos:
+                celula.style = estilo
+                self._estilos[estilo] = celula._style
+            celula._style = copy(self._estilos[estilo])
+        return celula
+    
+    def linha(self, valores, estilo, estilo_vazio=None):
+        # Borda só em células com valor (igual _aplicar_formatacao_geral)
+        self.ws.append([
+            self._celula(valor, estilo if valor else estilo_vazio) if (valor or estilo_vazio) else valor
+            for valor in valores
+        ])
+        self.numero += 1
+    
+    def linha_mesclada(self, texto, estilo, ultima_coluna="L"):
+        self.ws.append([self._celula(texto, estilo)])
+        self.numero += 1
+        self.ws.merged_cells.add(f"A{self.numero}:{ultima_coluna}{self.numero}")
+    
+    def linha_subtotal(self, rotulo, valor, estilo):
+        texto_valor = f"R$ {valor:.2f}".replace(".", ",")
+        self.ws.append([self._celula(rotulo, estilo)] + [None] * 5 + [self._celula(texto_valor, estilo)])
+        self.numero += 1
+        self.ws.merged_cells.add(f"A{self.numero}:F{self.numero}")
+    
+    def vazias(self, quantidade):
+        for _ in range(quantidade):
+            self.ws.append([])
+            self.numero += 1
 
 
 # Job automático
@@ -837,6 +1415,7 @@ def job_automatico_06h():
         ano = hoje.year
         
         generator = ExcelGeneratorBRK()
+        generator.auth = MicrosoftAuth()
         excel_bytes = generator.gerar_planilha_mensal(mes, ano)
         
         generator._salvar_onedrive_background(excel_bytes, mes, ano)
@@ -845,3 +1424,130 @@ def job_automatico_06h():
         
     except Exception as e:
         logger.error(f"Erro job_automatico_06h: {e}")
+
+
+# ============================================================================
+# BENCHMARK: modo padrão vs. streaming (dados sintéticos, sem OneDrive)
+# ============================================================================
+
+def _faturas_sinteticas(quantidade, semente=42):
+    """PIA + casas em 4 vencimentos + ~2% de outros status (formato de _buscar_faturas_prontas)"""
+    import random
+    aleatorio = random.Random(semente)
+    
+    dados_pia, dados_casas, faturas_outros = [], [], []
+    for i in range(quantidade):
+        media = aleatorio.randint(5, 60)
+        medido = max(0, int(media * aleatorio.uniform(0.4, 2.2)))
+        fatura = {
+            "cdc": f"{100000 + i}-{i % 10}",
+            "casa_oracao": "PIA" if i % 50 == 0 else f"BR 21-{i:04d} - CASA SINTÉTICA {i}",
+            "competencia": "Julho/2025",
+            "data_emissao": "05/07/2025",
+            "vencimento": f"{10 + 5 * (i % 4):02d}/07/2025",
+            "nota_fiscal": str(900000 + i),
+            "valor": f"R$ {aleatorio.uniform(20, 900):.2f}".replace(".", ","),
+            "medido_real": medido,
+            "faturado": medido,
+            "media_6m": media,
+            "porcentagem_consumo": f"{(medido - media) * 100 / media:.1f}%",
+            "alerta_consumo": "Consumo Normal",
+            "status_duplicata": "NORMAL",
+        }
+        if i % 50 == 25:
+            fatura["status_duplicata"] = "DUPLICATA"
+            faturas_outros.append(fatura)
+        elif fatura["casa_oracao"] == "PIA":
+            dados_pia.append(fatura)
+        else:
+            dados_casas.append(fatura)
+    
+    return dados_pia, dados_casas, faturas_outros
+
+
+def _assinatura_planilha(excel_bytes):
+    """Valores, mesclagens, larguras e estilo visível de cada célula (para comparar os modos)"""
+    wb = openpyxl.load_workbook(io.BytesIO(excel_bytes))
+    ws = wb.active
+    
+    celulas = {}
+    for row in ws.iter_rows():
+        for cell in row:
+            if cell.value is None and not cell.has_style:
+                continue
+            celulas[cell.coordinate] = (
+                cell.value,
+                bool(cell.font.b), bool(cell.font.i), cell.font.sz,
+                cell.font.color.rgb if cell.font.color is not None and cell.font.color.type == "rgb" else None,
+                cell.fill.fgColor.rgb if cell.fill.fill_type else None,
+                cell.border.left.style if cell.border.left is not None else None,
+                cell.alignment.horizontal,
+            )
+    
+    # Células sem valor, sem preenchimento e sem borda são indistinguíveis de vazias
+    celulas = {c: v for c, v in celulas.items() if v[0] is not None or v[5] or v[6]}
+    
+    return {
+        "titulo": ws.title,
+        "mescladas": sorted(str(m) for m in ws.merged_cells.ranges),
+        "larguras": {col: ws.column_dimensions[col].width for col in LARGURAS_COLUNAS},
+        "celulas": celulas,
+    }
+
+
+def benchmark_modos_excel(quantidades=(100, 1000, 10000)):
+    """
+    Gera a mesma planilha nos dois modos e mede tempo, pico de memória
+    (tracemalloc) e tamanho; confere se as saídas são equivalentes.
+    
+    Returns:
+        list: um dict por quantidade de faturas
+    """
+    import tracemalloc
+    
+    generator = ExcelGeneratorBRK()
+    resultados = []
+    
+    print(f"\n📊 BENCHMARK EXCEL: padrão vs. streaming")
+    for quantidade in quantidades:
+        dados = _faturas_sinteticas(quantidade)
+        medicoes = {}
+        saidas = {}
+        
+        for modo, gerar in (("padrao", generator._gerar_excel_padrao),
+                            ("streaming", generator._gerar_excel_streaming)):
+            inicio = time.perf_counter()
+            saidas[modo] = gerar(*dados, 7, 2025)
+            tempo = time.perf_counter() - inicio
+            
+            # Pico medido numa segunda execução (tracemalloc distorce o tempo)
+            tracemalloc.start()
+            gerar(*dados, 7, 2025)
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            
+            medicoes[modo] = {
+                "tempo_segundos": round(tempo, 3),
+                "pico_memoria_mb": round(pico / 1024 / 1024, 1),
+                "tamanho_kb": round(len(saidas[modo]) / 1024, 1),
+            }
+        
+        equivalente = _assinatura_planilha(saidas["padrao"]) == _assinatura_planilha(saidas["streaming"])
+        resultados.append({"faturas": quantidade, "equivalente": equivalente, **medicoes})
+        
+        p, s = medicoes["padrao"], medicoes["streaming"]
+        print(f"\n   📋 {quantidade} faturas {'✅ equivalentes' if equivalente else '❌ DIFERENTES'}")
+        print(f"      🐢 Padrão:    {p['tempo_segundos']}s | pico {p['pico_memoria_mb']} MB | {p['tamanho_kb']} KB")
+        print(f"      ⚡ Streaming: {s['tempo_segundos']}s | pico {s['pico_memoria_mb']} MB | {s['tamanho_kb']} KB")
+    
+    return resultados
+
+
+if __name__ == "__main__":
+    import sys
+    
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark":
+        quantidades = [int(q) for q in sys.argv[2:]] or [100, 1000, 10000]
+        benchmark_modos_excel(quantidades)
+    else:
+        print("Uso: python -m processor.excel_brk --benchmark [quantidade ...]")
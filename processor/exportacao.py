@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📤 EXPORTAÇÃO - faturas_brk em CSV / NDJSON com memória constante
+📁 FUNÇÃO: Linhas lidas do SQLite em lotes (cursor numa conexão só de leitura)
+          e enviadas em pedaços pela resposta Flask, com gzip opcional -
+          sem montar planilha, sem content_bytes (PDF)
+👨‍💼 AUTOR: Sidney Gubitoso, auxiliar tesouraria adm maua
+
+🔧 ROTAS (app.py):
+   /export/faturas.csv      ?ano=2025&mes=7&status=NORMAL
+   /export/faturas.ndjson   (mesmos filtros; uma fatura JSON por linha)
+   Accept-Encoding: gzip → Content-Encoding: gzip (compressão em fluxo)
+
+💡 LINHA DE COMANDO:
+   python -m processor.exportacao /caminho/database_brk.db csv > faturas.csv
+"""
+
+import io
+import sys
+import csv
+import json
+import zlib
+import sqlite3
+
+from processor.database_brk import SQL_ANO_COMPETENCIA, SQL_MES_VENCIMENTO
+
+COLUNAS_FORA_EXPORTACAO = {'content_bytes'}
+TAMANHO_LOTE = 500
+TAMANHO_PEDACO = 64 * 1024
+
+FORMATOS_EXPORTACAO = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+
+def colunas_exportacao(conn):
+    """Colunas reais de faturas_brk (schema antigo ou novo), sem o PDF."""
+    return [
+        row[1] for row in conn.execute("PRAGMA table_info(faturas_brk)")
+        if row[1] not in COLUNAS_FORA_EXPORTACAO
+    ]
+
+
+def _filtros_sql(filtros):
+    """
+    ?ano=&mes= (mesmo período da planilha) e ?status= → (WHERE, parâmetros).
+    ano/mes não numéricos ou mês fora de 1-12 → ValueError (HTTP 400 na rota).
+    """
+    condicoes, parametros = [], []
+
+    if filtros.get('ano'):
+        if not str(filtros['ano']).isdigit():
+            raise ValueError("ano deve ser um número")
+        condicoes.append(f"{SQL_ANO_COMPETENCIA} = ?")
+        parametros.append(f"/{int(filtros['ano'])}")
+    if filtros.get('mes'):
+        if not str(filtros['mes']).isdigit() or not 1 <= int(filtros['mes']) <= 12:
+            raise ValueError("Mês inválido")
+        condicoes.append(f"{SQL_MES_VENCIMENTO} = ?")
+        parametros.append(f"/{int(filtros['mes']):02d}/")
+    if filtros.get('status'):
+        condicoes.append("status_duplicata = ?")
+        parametros.append(filtros['status'].upper())
+
+    return (f"WHERE {' AND '.join(condicoes)}" if condicoes else ""), parametros
+
+
+def iterar_faturas(database, filtros=None):
+    """
+    Gera (colunas, linhas): linhas em lotes de TAMANHO_LOTE, nunca a tabela inteira.
+
+    Database em arquivo (WAL): conexão própria só de leitura, sem segurar o
+    lock da conexão compartilhada durante o download. Em memória: páginas por id.
+    """
+    where, parametros = _filtros_sql(filtros or {})
+
+    with database.lock_conexao:
+        colunas = colunas_exportacao(database.conn)
+        arquivo = database.conn.execute("PRAGMA database_list").fetchone()[2]
+
+    consulta = f"SELECT {', '.join(colunas)} FROM faturas_brk {where} ORDER BY id"
+
+    def _linhas_conexao_leitura():
+        conexao = sqlite3.connect(f"file:{arquivo}?mode=ro", uri=True)
+        try:
+            cursor = conexao.execute(consulta, parametros)
+            while True:
+                lote = cursor.fetchmany(TAMANHO_LOTE)
+                if not lote:
+                    break
+                yield from lote
+        finally:
+            conexao.close()
+
+    def _linhas_paginadas():
+        indice_id = colunas.index('id')
+        ultimo_id = -1
+        conector = "AND" if where else "WHERE"
+        while True:
+            with database.lock_conexao:
+                lote = database.conn.execute(
+                    f"SELECT {', '.join(colunas)} FROM faturas_brk {where} {conector} id > ? ORDER BY id LIMIT ?",
+                    parametros + [ultimo_id, TAMANHO_LOTE]
+                ).fetchall()
+            if not lote:
+                break
+            yield from lote
+            ultimo_id = lote[-1][indice_id]
+
+    return colunas, (_linhas_conexao_leitura() if arquivo else _linhas_paginadas())
+
+
+def gerar_csv(colunas, linhas):
+    """Pedaços de ~64 KB de CSV (cabeçalho + linhas)."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(colunas)
+
+    for linha in linhas:
+        escritor.writerow(linha)
+        if buffer.tell() >= TAMANHO_PEDACO:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue().encode('utf-8')
+
+
+def gerar_ndjson(colunas, linhas):
+    """Pedaços de ~64 KB de NDJSON (um objeto por fatura)."""
+    partes, tamanho = [], 0
+
+    for linha in linhas:
+        texto = json.dumps(dict(zip(colunas, linha)), ensure_ascii=False, default=str) + "\n"
+        partes.append(texto)
+        tamanho += len(texto)
+        if tamanho >= TAMANHO_PEDACO:
+            yield "".join(partes).encode('utf-8')
+            partes, tamanho = [], 0
+
+    yield "".join(partes).encode('utf-8')
+
+
+def comprimir_gzip(pedacos, nivel=6):
+    """gzip em fluxo (zlib wbits 16+): cada pedaço comprimido sai assim que há bytes."""
+    compressor = zlib.compressobj(nivel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    for pedaco in pedacos:
+        comprimido = compressor.compress(pedaco)
+        if comprimido:
+            yield comprimido
+
+    yield compressor.flush()
+
+
+def gerar_exportacao(database, formato, filtros=None, gzip=False):
+    """Iterador de bytes do arquivo exportado (csv ou ndjson)."""
+    colunas, linhas = iterar_faturas(database, filtros)
+    pedacos = gerar_csv(colunas, linhas) if formato == 'csv' else gerar_ndjson(colunas, linhas)
+    return comprimir_gzip(pedacos) if gzip else pedacos
+
+
+def resposta_exportacao(database, formato, filtros, aceita_gzip):
+    """
+    Response Flask em streaming (Content-Encoding: gzip se o cliente aceitar).
+    Filtros validados antes do streaming: ValueError sobe para a rota.
+    """
+    from flask import Response, stream_with_context
+
+    _filtros_sql(filtros)
+
+    headers = {
+        'Content-Disposition': f'attachment; filename=faturas_brk.{formato}',
+        'Vary': 'Accept-Encoding',
+    }
+    if aceita_gzip:
+        headers['Content-Encoding'] = 'gzip'
+
+    return Response(
+        stream_with_context(gerar_exportacao(database, formato, filtros, gzip=aceita_gzip)),
+        mimetype=FORMATOS_EXPORTACAO[formato].split(';')[0],
+        content_type=FORMATOS_EXPORTACAO[formato],
+        headers=headers
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[2] not in FORMATOS_EXPORTACAO:
+        print("Uso: python -m processor.exportacao /caminho/database_brk.db csv|ndjson [--gzip]")
+        sys.exit(1)
+
+    import threading
+    from types import SimpleNamespace
+
+    database = SimpleNamespace(conn=sqlite3.connect(sys.argv[1]), lock_conexao=threading.RLock())
+    for pedaco in gerar_exportacao(database, sys.argv[2], gzip="--gzip" in sys.argv):
+        sys.stdout.buffer.write(pedaco)
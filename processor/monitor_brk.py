@@ -201,10 +201,15 @@ class MonitorBRK:
             print("📧 ETAPA 1: Processamento de emails (monitor)")
             self.exibir_estatisticas_pasta()
             print()
+            if hasattr(self.processor, 'resetar_estatisticas_confianca'):
+                self.processor.resetar_estatisticas_confianca()
             self.processar_emails_novos()
+            self._registrar_confianca_ciclo()
+            self._descarregar_alertas_ciclo()
             
             # 2. ETAPA PLANILHA (usando recursos ISOLADOS do monitor)
             print(f"\n📊 ETAPA 2: Planilhas (RECURSOS ISOLADOS)")
+            self.verificar_casas_faltantes()
             self.atualizar_planilha_automatica_isolada()
             
         except Exception as e:
@@ -219,6 +224,75 @@ class MonitorBRK:
         print(f"=" * 55)
         print(f"⏰ Próximo ciclo monitor em {self.intervalo_minutos} minutos")
 
+    def _registrar_confianca_ciclo(self):
+        """📈 Guarda e exibe a confiança agregada da extração neste ciclo"""
+        try:
+            if not hasattr(self.processor, 'obter_estatisticas_confianca'):
+                return
+            
+            stats = self.processor.obter_estatisticas_confianca()
+            self.ultimas_estatisticas_confianca = stats
+            
+            if stats.get('faturas'):
+                print(f"📈 Confiança extração (ciclo): média {stats['confianca_media']} em {stats['faturas']} fatura(s)")
+                print(f"   🔁 Escalonadas p/ backend lento: {stats['escalonadas_backend_lento']}")
+                print(f"   🏷️ Fontes: {stats['por_fonte']}")
+                if stats['campos_baixa_confianca']:
+                    print(f"   ⚠️ Campos baixa confiança: {stats['campos_baixa_confianca']}")
+                    
+        except Exception as e:
+            print(f"⚠️ Erro estatísticas confiança: {e}")
+
+    def _descarregar_alertas_ciclo(self):
+        """📋 Envia alertas pendentes do ciclo (e os digests por responsável, se ativo)"""
+        try:
+            database = getattr(self.processor, 'database_brk', None)
+            if not database:
+                return
+            
+            from processor.alertas.alert_outbox import descarregar_alertas_ciclo
+            descarregar_alertas_ciclo(database)
+            
+        except ImportError:
+            pass  # Alertas opcionais
+        except Exception as e:
+            print(f"⚠️ Erro descarregando alertas do ciclo: {e}")
+
+    def verificar_casas_faltantes(self):
+        """
+        🏠 Casas sem fatura no mês atual: anti-join no database (sem montar
+        planilha). CDC_BRK_CCB.xlsx só é baixado quando o eTag mudou.
+        """
+        try:
+            database = getattr(self.processor, 'database_brk', None)
+            excel_generator = self._get_monitor_excel_generator()
+            if not database or not excel_generator:
+                return
+            
+            sincronizacao = excel_generator.sincronizar_relacionamento(database)
+            if sincronizacao['status'] != 'sucesso' and not sincronizacao['qtd_casas']:
+                print(f"⚠️ Faltantes: {sincronizacao['mensagem']}")
+                return
+            
+            hoje = datetime.now()
+            faltantes = database.casas_faltantes(hoje.month, hoje.year)
+            
+            self.ultimas_casas_faltantes = {
+                "mes": hoje.month,
+                "ano": hoje.year,
+                "total": len(faltantes),
+                "casas_relacionamento": sincronizacao['qtd_casas'],
+                "relacionamento_baixado": sincronizacao['baixado'],
+                "cdcs": [casa['cdc'] for casa in faltantes],
+                "timestamp": hoje.isoformat()
+            }
+            
+            print(f"🏠 Faltantes {self._nome_mes(hoje.month)}/{hoje.year}: "
+                  f"{len(faltantes)} de {sincronizacao['qtd_casas']} casa(s) sem fatura")
+            
+        except Exception as e:
+            print(f"⚠️ Erro verificando casas faltantes: {e}")
+
     def atualizar_planilha_automatica_isolada(self):
         """
         🛡️ ATUALIZAÇÃO ISOLADA: Sem interferir com interface web
@@ -232,6 +306,10 @@ class MonitorBRK:
         try:
             print("📊 Planilhas do monitor (ISOLADAS)...")
             
+            from processor.consolidado_anual import (
+                consolidado_ativo, meses_consolidados, registrar_mes_consolidado, atualizar_consolidados
+            )
+            
             # ✅ USAR DATABASE DO PROCESSOR (leitura apenas - sem conflito)
             if not hasattr(self.processor, 'database_brk') or not self.processor.database_brk:
                 print("❌ DatabaseBRK do processor não disponível")
@@ -254,48 +332,138 @@ class MonitorBRK:
             print(f"✅ {len(meses_com_faturas)} mês(es) - processamento ISOLADO")
             
             # ✅ PROCESSAR (com ExcelGenerator próprio do monitor)
+            # Incremental: só meses cujo fingerprint (faturas do mês) ou eTag do
+            # CDC_BRK_CCB.xlsx mudaram desde a última planilha enviada
+            database = self.processor.database_brk
+            incremental = os.getenv("PLANILHAS_INCREMENTAL", "true").lower() in ("1", "true", "sim")
+            etag_relacionamento = excel_generator.obter_etag_base_onedrive() if incremental else None
+            
             planilhas_processadas = 0
+            planilhas_puladas = 0
             planilhas_com_erro = 0
+            planilhas_conteudo_igual = 0
+            bytes_nao_enviados = 0
+            
+            # Fila de reenvio (principal bloqueada/erro no ciclo anterior): sempre regeradas
+            pendentes = {(p['mes'], p['ano']) for p in database.obter_planilhas_pendentes()}
+            if pendentes:
+                print(f"🔁 {len(pendentes)} planilha(s) na fila de reenvio")
             
-            for mes, ano in meses_com_faturas:
+            # Consolidado anual: meses ainda sem folha guardada são gerados uma vez
+            consolidar = consolidado_ativo()
+            consolidados = meses_consolidados(database) if consolidar else set()
+            
+            meses_para_gerar = []
+            for mes, ano in sorted(set(meses_com_faturas) | pendentes, key=lambda m: (m[1], m[0])):
                 try:
-                    print(f"\n📊 MONITOR - {self._nome_mes(mes)}/{ano} (ISOLADO)")
+                    fingerprint, qtd_faturas = database.calcular_fingerprint_mes(mes, ano)
                     
-                    # ✅ GERAÇÃO ISOLADA (não interfere com web)
-                    print(f"🔄 Gerando planilha {mes:02d}/{ano} (ExcelGenerator MONITOR)...")
-                    dados_planilha = excel_generator.gerar_planilha_mensal(mes, ano)
+                    ja_consolidado = not consolidar or (mes, ano) in consolidados
+                    if incremental and etag_relacionamento and (mes, ano) not in pendentes and ja_consolidado:
+                        anterior = database.obter_planilha_gerada(mes, ano)
+                        if (anterior and anterior['fingerprint'] == fingerprint
+                                and anterior['etag_relacionamento'] == etag_relacionamento):
+                            planilhas_puladas += 1
+                            print(f"⏭️ {self._nome_mes(mes)}/{ano}: sem alterações desde {anterior['gerada_em']}")
+                            continue
+                    
+                    meses_para_gerar.append((mes, ano, fingerprint, qtd_faturas))
+                    
+                except Exception as e:
+                    print(f"❌ Monitor erro mês {mes:02d}/{ano}: {e}")
+                    planilhas_com_erro += 1
+            
+            # ✅ GERAÇÃO EM LOTE: uma consulta + um download do CDC_BRK_CCB.xlsx
+            # (leitura do database do processor, mesmo usado no fingerprint)
+            lote = {'planilhas': {}, 'erros': {}, 'tempos': None}
+            if meses_para_gerar:
+                print(f"🔄 Gerando {len(meses_para_gerar)} planilha(s) em lote (ExcelGenerator MONITOR)...")
+                from processor.excel_brk import hash_conteudo
+                lote = excel_generator.gerar_planilhas_multiplos_meses(
+                    [(mes, ano) for mes, ano, _, _ in meses_para_gerar], database=database,
+                    com_consolidado=consolidar
+                )
+                print(f"⏱️ Lote: {lote['tempos']}")
+                
+                for (mes, ano), folha in lote.get('folhas', {}).items():
+                    registrar_mes_consolidado(database, mes, ano, folha, lote['resumos'][(mes, ano)])
+            
+            for mes, ano, fingerprint, qtd_faturas in meses_para_gerar:
+                try:
+                    print(f"\n📊 MONITOR - {self._nome_mes(mes)}/{ano} (ISOLADO)")
+                    dados_planilha = lote['planilhas'].get((mes, ano))
                     
                     if dados_planilha:
                         print(f"✅ Planilha monitor: {len(dados_planilha)} bytes")
                         
+                        # Mesmo conteúdo da última planilha enviada (xlsx determinístico):
+                        # sem PUT no OneDrive, só atualiza o fingerprint
+                        hash_planilha = hash_conteudo(dados_planilha)
+                        anterior = database.obter_planilha_gerada(mes, ano)
+                        if anterior and anterior['hash_conteudo'] == hash_planilha and (mes, ano) not in pendentes:
+                            planilhas_conteudo_igual += 1
+                            bytes_nao_enviados += len(dados_planilha)
+                            database.registrar_planilha_gerada(
+                                mes, ano, fingerprint, etag_relacionamento, qtd_faturas,
+                                len(dados_planilha), hash_planilha
+                            )
+                            print(f"⏭️ Planilha {mes:02d}/{ano} com conteúdo idêntico - upload dispensado")
+                            continue
+                        
                         # ✅ SALVAR (sem conflitos)
                         from processor.planilha_backup import salvar_planilha_inteligente
                         sucesso = salvar_planilha_inteligente(
                             self.processor.auth, 
                             dados_planilha, 
                             mes, 
-                            ano
+                            ano,
+                            database=database
                         )
                         
                         if sucesso:
                             planilhas_processadas += 1
+                            database.registrar_planilha_gerada(
+                                mes, ano, fingerprint, etag_relacionamento, qtd_faturas,
+                                len(dados_planilha), hash_planilha
+                            )
                             print(f"✅ Monitor planilha {mes:02d}/{ano} salva")
                         else:
                             planilhas_com_erro += 1
-                            print(f"❌ Monitor falha salvando {mes:02d}/{ano}")
+                            print(f"❌ Monitor falha salvando {mes:02d}/{ano} (na fila de reenvio)")
                     else:
                         planilhas_com_erro += 1
-                        print(f"❌ Monitor erro gerando {mes:02d}/{ano}")
+                        print(f"❌ Monitor erro gerando {mes:02d}/{ano}: {lote['erros'].get((mes, ano))}")
                         
                 except Exception as e:
                     print(f"❌ Monitor erro mês {mes:02d}/{ano}: {e}")
                     planilhas_com_erro += 1
                     continue
             
+            # Consolidado anual: só anos com mês novo/alterado (ou envio pendente)
+            relatorio_consolidado = atualizar_consolidados(self.processor.auth, database) if consolidar else None
+            
+            self.ultimo_relatorio_planilhas = {
+                "meses": len(meses_com_faturas),
+                "regeneradas": planilhas_processadas,
+                "sem_alteracao": planilhas_puladas,
+                "conteudo_identico": planilhas_conteudo_igual,
+                "bytes_upload_evitados": bytes_nao_enviados,
+                "com_erro": planilhas_com_erro,
+                "fila_reenvio": len(database.obter_planilhas_pendentes()),
+                "incremental": bool(incremental and etag_relacionamento),
+                "tempos_geracao": lote['tempos'],
+                "consolidado_anual": relatorio_consolidado,
+                "timestamp": datetime.now().isoformat()
+            }
+            
             # ✅ RESULTADO ISOLADO
             print(f"\n📊 RESULTADO MONITOR (ISOLADO):")
             print(f"   ✅ Processadas: {planilhas_processadas}")
+            print(f"   ⏭️ Sem alteração (puladas): {planilhas_puladas}")
+            print(f"   🟰 Conteúdo idêntico (sem upload): {planilhas_conteudo_igual}")
             print(f"   ❌ Com erro: {planilhas_com_erro}")
+            if incremental and not etag_relacionamento:
+                print(f"   ⚠️ eTag do CDC_BRK_CCB.xlsx indisponível - todos os meses regenerados")
             print(f"   🛡️ Sem interferência com interface web")
             
         except Exception as e:
@@ -318,7 +486,14 @@ class MonitorBRK:
             
             if dados_planilha:
                 from processor.planilha_backup import salvar_planilha_inteligente
-                sucesso = salvar_planilha_inteligente(self.processor.auth, dados_planilha)
+                # Com database: If-Match no eTag do último envio (não sobrescreve edição alheia)
+                sucesso = salvar_planilha_inteligente(
+                    self.processor.auth,
+                    dados_planilha,
+                    hoje.month,
+                    hoje.year,
+                    database=getattr(self.processor, 'database_brk', None)
+                )
                 print(f"✅ Fallback monitor: {'Sucesso' if sucesso else 'Falha'}")
             else:
                 print("❌ Fallback monitor falhou - sem dados")
@@ -481,9 +656,48 @@ class MonitorBRK:
             "excel_generator_proprio": bool(self._monitor_excel_generator),
             "compatibilidade_web": "100%",
             "last_cleanup": self._last_cleanup.isoformat(),
-            "processador_ok": bool(self.processor)
+            "processador_ok": bool(self.processor),
+            "confianca_ultimo_ciclo": getattr(self, 'ultimas_estatisticas_confianca', None),
+            "cache_responsaveis": self._estatisticas_cache_responsaveis(),
+            "outbox_alertas": self._estatisticas_outbox_alertas(),
+            "pdfs_onedrive": self._estatisticas_pdfs_onedrive(),
+            "auth_alertas": self._estatisticas_auth_alertas(),
+            "planilhas_ultimo_ciclo": getattr(self, 'ultimo_relatorio_planilhas', None),
+            "faltantes_ultimo_ciclo": getattr(self, 'ultimas_casas_faltantes', None)
         }
 
+    def _estatisticas_cache_responsaveis(self):
+        """Hit/miss do cache de responsáveis CCB (None se módulo alertas indisponível)"""
+        try:
+            from processor.alertas.responsaveis_cache import obter_cache_responsaveis
+            return obter_cache_responsaveis().obter_estatisticas()
+        except Exception:
+            return None
+
+    def _estatisticas_outbox_alertas(self):
+        """Fila e entregas do despachante de alertas (None se módulo alertas indisponível)"""
+        try:
+            from processor.alertas.alert_outbox import obter_despachante
+            return obter_despachante().obter_estatisticas()
+        except Exception:
+            return None
+
+    def _estatisticas_pdfs_onedrive(self):
+        """Origem dos PDFs dos alertas: cache local, item id ou caminho (None se indisponível)"""
+        try:
+            from processor.alertas.alert_processor import obter_estatisticas_pdf_onedrive
+            return obter_estatisticas_pdf_onedrive()
+        except Exception:
+            return None
+
+    def _estatisticas_auth_alertas(self):
+        """Uso do auth compartilhado dos alertas (None se módulo alertas indisponível)"""
+        try:
+            from processor.alertas.auth_compartilhado import obter_estatisticas_auth_alertas
+            return obter_estatisticas_auth_alertas()
+        except Exception:
+            return None
+
     def executar_ciclo_manual(self):
         """Execução manual isolada"""
         print(f"🧪 EXECUÇÃO MANUAL - MONITOR ISOLADO")
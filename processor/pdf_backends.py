@@ -0,0 +1,837 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📄 PDF BACKENDS - Extração de texto plugável para faturas BRK
+📁 FUNÇÃO: Caminho rápido (pdfminer direto, sem objetos do pdfplumber) + fallback pdfplumber
+👨‍💼 AUTOR: Sidney Gubitoso, auxiliar tesouraria adm maua
+
+🔧 LÓGICA:
+   1. Backends tentados na ordem de PDF_BACKENDS
+      (padrão: pdfminer_rapido,pdfplumber_regioes,pdfplumber)
+   2. Texto de cada backend passa pelos MESMOS patterns do EmailProcessor
+   3. Campos essenciais válidos e confiáveis (CDC, valor, vencimento, competência,
+      consumo dentro de faixas plausíveis) → aceita
+   4. Campos faltando/baixa confiança → próximo backend (só os campos fracos são substituídos):
+      caixas justas por campo do template BRK (CDC, vencimento, referência, valor,
+      consumo) → página inteira (layout completo, mais lento). Âncora ou formato
+      de uma caixa não confere → o próprio backend de regiões lê a página inteira
+   5. Tempo e taxa de sucesso registrados por backend (relatório + benchmark)
+   6. Parsing em subprocesso com timeout e limite de memória (PDF_SANDBOX):
+      arquivo patológico é encerrado e vira erro_extracao, o lote continua
+
+💡 BENCHMARK EM CORPUS LOCAL:
+   python -m processor.pdf_backends /caminho/pasta_pdfs
+   python -m processor.pdf_backends /caminho/pasta_pdfs regioes   (latência por PDF: recorte vs página inteira)
+
+💡 CALIBRAR CAIXAS COM UMA FATURA REAL (gera JSON para PDF_TEMPLATE_BRK_ARQUIVO):
+   python -m processor.pdf_backends /caminho/fatura.pdf calibrar /caminho/template_brk.json
+"""
+
+import io
+import os
+import re
+import sys
+import time
+import threading
+from contextlib import redirect_stdout
+
+
+# Ordem padrão: rápido primeiro, pdfplumber (layout completo) como garantia
+BACKENDS_PADRAO = "pdfminer_rapido,pdfplumber_regioes,pdfplumber"
+
+# Campos que precisam estar válidos para aceitar o texto de um backend
+CAMPOS_ESSENCIAIS = {
+    "Codigo_Cliente": r'^\d{1,6}-\d{1,2}$',
+    "Valor": r'^(\d{1,3}(\.\d{3})+|\d+),\d{2}$',
+    "Vencimento": r'^\d{2}/\d{2}/\d{4}$',
+    "Competencia": r'^[A-Za-zçÇ]+/\d{4}$',
+}
+
+# Consumo (m³) precisa ser inteiro dentro da faixa: números grudados
+# ("15" + "2025" → 152025) caem fora e forçam o próximo backend
+CAMPOS_CONSUMO_OBRIGATORIOS = ["Medido_Real", "Faturado"]
+CAMPOS_CONSUMO = CAMPOS_CONSUMO_OBRIGATORIOS + ["Média 6M"]
+
+
+# Confiança por fonte do valor (tag gravada em fontes_extracao por campo)
+CONFIANCA_FONTES = {
+    "primario": 1.0,          # regex principal do desktop
+    "relacionamento": 1.0,    # CDC/Casa confirmados no CDC_BRK_CCB.xlsx
+    "alternativo": 0.8,       # regex alternativa
+    "linha": 0.6,             # varredura linha a linha
+    "candidato": 0.3,         # CDC solto no texto, não verificado
+}
+
+# Peso do backend que leu o texto: o caminho rápido não usa a análise de
+# layout completa, então o mesmo regex vale menos nele. Em empate de
+# confiança entre backends, fica o de maior peso (layout completo).
+CONFIANCA_BACKENDS = {
+    "pdfminer_rapido": 0.9,
+    "pdfplumber_regioes": 1.0,
+    "pdfplumber": 1.0,
+}
+
+# Fontes que não dependem do texto do backend (confirmadas fora do PDF)
+FONTES_EXTERNAS = {"relacionamento"}
+
+# Campos que compõem o score geral da extração
+CAMPOS_CONFIANCA = [
+    "Codigo_Cliente", "Nota_Fiscal", "Data_Emissao", "Valor", "Vencimento",
+    "Competencia", "Medido_Real", "Faturado", "Média 6M",
+]
+
+# Formato de cada campo pontuado: valor fora do formato = confiança 0
+FORMATOS_CAMPOS = {
+    **CAMPOS_ESSENCIAIS,
+    "Nota_Fiscal": r'^\d+$',
+    "Data_Emissao": r'^\d{1,2}/\d{1,2}/\d{4}$',
+}
+
+
+class BackendTextoPDF:
+    """
+    Interface base: cada backend converte bytes do PDF em texto da 1ª página.
+    """
+    nome = "base"
+
+    def disponivel(self):
+        return False
+
+    def extrair_texto(self, pdf_bytes):
+        raise NotImplementedError
+
+
+class BackendPdfminerRapido(BackendTextoPDF):
+    """
+    pdfminer.six direto (TextConverter + LAParams): só a 1ª página, sem os
+    objetos por caractere/tabelas do pdfplumber. LAParams agrupa os caracteres
+    em linhas - sem ele os trechos saem grudados ("123,45MEDIDO REAL 25...")
+    e as buscas linha a linha dos patterns do desktop não funcionam.
+    pdfminer.six já vem instalado como dependência do pdfplumber.
+    """
+    nome = "pdfminer_rapido"
+
+    def disponivel(self):
+        try:
+            import pdfminer.pdfinterp  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def extrair_texto(self, pdf_bytes):
+        from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+        from pdfminer.converter import TextConverter
+        from pdfminer.layout import LAParams
+        from pdfminer.pdfpage import PDFPage
+
+        saida = io.StringIO()
+        gerenciador = PDFResourceManager(caching=True)
+        dispositivo = TextConverter(gerenciador, saida, laparams=LAParams())
+        try:
+            interpretador = PDFPageInterpreter(gerenciador, dispositivo)
+            for pagina in PDFPage.get_pages(io.BytesIO(pdf_bytes), pagenos=[0], maxpages=1):
+                interpretador.process_page(pagina)
+        finally:
+            dispositivo.close()
+
+        return saida.getvalue()
+
+
+class BackendPdfplumber(BackendTextoPDF):
+    """
+    pdfplumber com análise de layout completa (comportamento original do desktop).
+    """
+    nome = "pdfplumber"
+
+    def disponivel(self):
+        try:
+            import pdfplumber  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def extrair_texto(self, pdf_bytes):
+        import pdfplumber
+
+        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+            if not pdf.pages:
+                return ""
+            return pdf.pages[0].extract_text() or ""
+
+
+# Template de layout da fatura BRK: UMA caixa justa por campo, em frações da
+# página (x0, top, x1, bottom). "ancora" precisa aparecer no recorte e
+# "formato" (regex) precisa casar nele - senão o backend lê a página inteira.
+# "busca" (opcional, senão "formato") localiza o campo na calibração.
+# Ordem das caixas = ordem do texto final (patterns do desktop continuam valendo).
+TEMPLATE_BRK = {
+    "cdc": {
+        "bbox": [0.0622, 0.0607, 0.1844, 0.0797],
+        "ancora": "CDC",
+        "formato": r'CDC\D*\d{1,6}-\d{1,2}',
+    },
+    "vencimento": {
+        "bbox": [0.4992, 0.0607, 0.7876, 0.0797],
+        "ancora": "VENCIMENTO",
+        "formato": r'DATA DE VENCIMENTO\s+\d{2}/\d{2}/\d{4}',
+    },
+    "referencia": {
+        "bbox": [0.0622, 0.1082, 0.2675, 0.1272],
+        "ancora": "REFER",
+        "formato": r'REFERÊNCIA\s*[A-Za-zçÇ]+/\d{4}',
+    },
+    "valor": {
+        "bbox": [0.0622, 0.1557, 0.2806, 0.1747],
+        "ancora": "VALOR TOTAL",
+        "formato": r'VALOR TOTAL - R\$\s*\d[\d.]*,\d{2}',
+    },
+    "consumo": {
+        "bbox": [0.0622, 0.1794, 0.4570, 0.2222],
+        "ancora": "MEDIDO REAL",
+        "formato": r'MEDIDO REAL\s+\d+[\s\S]*FATURADO\s+\d+',
+        "busca": r'MEDIDO REAL[\s\S]*?Média dos últimos 6 meses:?\s*\d+',
+    },
+}
+
+# Folga em pontos em volta da caixa encontrada na calibração
+MARGEM_CALIBRACAO_PT = 3
+
+
+def carregar_template_brk():
+    """
+    Template padrão ou JSON informado em PDF_TEMPLATE_BRK_ARQUIVO
+    (mesmo formato de TEMPLATE_BRK, gerado por calibrar_template_brk)
+    para recalibrar sem deploy de código.
+    """
+    caminho = os.getenv("PDF_TEMPLATE_BRK_ARQUIVO")
+    if not caminho:
+        return TEMPLATE_BRK
+
+    try:
+        import json
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ Template PDF inválido ({caminho}): {e} - usando padrão")
+        return TEMPLATE_BRK
+
+
+class BackendPdfplumberRegioes(BackendTextoPDF):
+    """
+    pdfplumber recortando uma caixa justa por campo do template BRK
+    (page.crop): a análise de layout roda só nos caracteres de cada campo.
+    Âncora ausente ou formato que não casa em qualquer caixa = template não
+    corresponde → texto da página inteira (mesmo PDF já aberto).
+    ultimo_recorte_ok indica qual caminho foi usado (benchmark).
+    """
+    nome = "pdfplumber_regioes"
+
+    def __init__(self, template=None):
+        self.template = template or carregar_template_brk()
+        self.ultimo_recorte_ok = None
+
+    def disponivel(self):
+        try:
+            import pdfplumber  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def extrair_texto(self, pdf_bytes):
+        import pdfplumber
+
+        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+            if not pdf.pages:
+                return ""
+
+            pagina = pdf.pages[0]
+            texto = self._texto_recortado(pagina)
+            self.ultimo_recorte_ok = texto is not None
+            if texto is None:
+                return pagina.extract_text() or ""
+            return texto
+
+    def _texto_recortado(self, pagina):
+        """Texto das caixas na ordem do template, ou None se alguma não conferir."""
+        largura, altura = float(pagina.width), float(pagina.height)
+        trechos = []
+
+        for campo, regiao in self.template.items():
+            x0, top, x1, bottom = regiao["bbox"]
+            caixa = (
+                max(0.0, x0 * largura), max(0.0, top * altura),
+                min(largura, x1 * largura), min(altura, bottom * altura)
+            )
+            texto = pagina.crop(caixa).extract_text() or ""
+
+            ancora = regiao.get("ancora")
+            if ancora and ancora.upper() not in texto.upper():
+                print(f"  ↪️ Template BRK não corresponde (caixa {campo} sem '{ancora}') - página inteira")
+                return None
+
+            formato = regiao.get("formato")
+            if formato and not re.search(formato, texto):
+                print(f"  ↪️ Template BRK não corresponde (caixa {campo} fora do formato) - página inteira")
+                return None
+
+            trechos.append(texto)
+
+        return "\n".join(trechos)
+
+
+def calibrar_template_brk(pdf_bytes, template=None, margem_pt=MARGEM_CALIBRACAO_PT):
+    """
+    Caixas justas a partir de uma fatura real: cada campo é localizado na
+    1ª página (page.search com "busca"/"formato") e vira a caixa do texto
+    encontrado + margem, em frações da página.
+
+    Returns:
+        dict: Template no formato de TEMPLATE_BRK (campos não encontrados mantêm a caixa anterior)
+    """
+    import pdfplumber
+
+    template = template or carregar_template_brk()
+    calibrado = {}
+
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        pagina = pdf.pages[0]
+        largura, altura = float(pagina.width), float(pagina.height)
+
+        for campo, regiao in template.items():
+            calibrado[campo] = dict(regiao)
+            encontrados = pagina.search(regiao.get("busca") or regiao["formato"])
+            if not encontrados:
+                print(f"⚠️ Calibração: campo {campo} não encontrado - caixa mantida")
+                continue
+
+            achado = encontrados[0]
+            calibrado[campo]["bbox"] = [
+                round(max(0.0, achado["x0"] - margem_pt) / largura, 4),
+                round(max(0.0, achado["top"] - margem_pt) / altura, 4),
+                round(min(largura, achado["x1"] + margem_pt) / largura, 4),
+                round(min(altura, achado["bottom"] + margem_pt) / altura, 4),
+            ]
+            print(f"📐 {campo}: {calibrado[campo]['bbox']} ('{achado['text'][:40]}')")
+
+    return calibrado
+
+
+# Registro de backends disponíveis (nome → classe)
+BACKENDS_REGISTRADOS = {
+    BackendPdfminerRapido.nome: BackendPdfminerRapido,
+    BackendPdfplumberRegioes.nome: BackendPdfplumberRegioes,
+    BackendPdfplumber.nome: BackendPdfplumber,
+}
+
+_estatisticas_backends = {}
+_lock_estatisticas = threading.Lock()
+
+# Processo isolado para parsing (PDF malformado/gigante não trava o ciclo)
+_contexto_sandbox = None
+_lock_sandbox = threading.Lock()
+
+
+def obter_backends_ativos():
+    """
+    Retorna instâncias dos backends configurados em PDF_BACKENDS, na ordem,
+    descartando nomes desconhecidos e backends sem dependência instalada.
+    """
+    nomes = os.getenv("PDF_BACKENDS", BACKENDS_PADRAO)
+    backends = []
+
+    for nome in [n.strip() for n in nomes.split(",") if n.strip()]:
+        classe = BACKENDS_REGISTRADOS.get(nome)
+        if not classe:
+            print(f"⚠️ Backend PDF desconhecido ignorado: {nome}")
+            continue
+
+        backend = classe()
+        if backend.disponivel():
+            backends.append(backend)
+
+    return backends
+
+
+def _worker_extracao(conexao, backend, pdf_bytes, limite_mb):
+    """
+    Executado no processo filho: aplica limite de memória e extrai o texto.
+    Resultado volta pelo Pipe como dict (mesmo formato de executar_backend).
+    """
+    try:
+        if limite_mb:
+            try:
+                import resource
+                limite_bytes = int(limite_mb) * 1024 * 1024
+                # RLIMIT_AS (espaço de endereçamento): o Linux não aplica RLIMIT_RSS
+                resource.setrlimit(resource.RLIMIT_AS, (limite_bytes, limite_bytes))
+            except (ImportError, ValueError, OSError):
+                pass
+
+        texto = backend.extrair_texto(pdf_bytes)
+        conexao.send({"status": "sucesso", "texto": texto})
+
+    except MemoryError:
+        conexao.send({"status": "erro", "limite_excedido": True,
+                      "mensagem": f"Limite de memória excedido ({limite_mb}MB) na extração PDF"})
+    except Exception as e:
+        conexao.send({"status": "erro", "limite_excedido": False, "mensagem": str(e)})
+    finally:
+        conexao.close()
+
+
+def _obter_contexto_sandbox():
+    """
+    Contexto multiprocessing para os workers (PDF_SANDBOX_METODO, padrão forkserver):
+    forkserver não herda locks de outras threads (monitor/Flask) e já vem com
+    pdfplumber pré-carregado, evitando o custo de import por arquivo.
+    """
+    global _contexto_sandbox
+
+    with _lock_sandbox:
+        if _contexto_sandbox is None:
+            import multiprocessing
+
+            metodo = os.getenv("PDF_SANDBOX_METODO", "forkserver")
+            if metodo not in multiprocessing.get_all_start_methods():
+                metodo = "spawn"
+
+            _contexto_sandbox = multiprocessing.get_context(metodo)
+            if metodo == "forkserver":
+                _contexto_sandbox.set_forkserver_preload(["processor.pdf_backends", "pdfplumber"])
+
+        return _contexto_sandbox
+
+
+def sandbox_ativo():
+    """PDF_SANDBOX=false desliga o processo isolado (extração na própria thread)."""
+    return os.getenv("PDF_SANDBOX", "true").lower() not in ("false", "0", "nao", "não")
+
+
+def executar_backend(backend, pdf_bytes):
+    """
+    Extrai texto com o backend, isolado em subprocesso quando PDF_SANDBOX ativo.
+
+    Limites configuráveis:
+        PDF_TIMEOUT_SEGUNDOS (padrão 30) - tempo de parede; estourou → processo morto
+        PDF_LIMITE_MEMORIA_MB (padrão 768) - limite de memória do processo filho
+
+    Returns:
+        dict: {'status': 'sucesso', 'texto': str} ou
+              {'status': 'erro', 'mensagem': str, 'limite_excedido': bool}
+    """
+    if not sandbox_ativo():
+        try:
+            return {"status": "sucesso", "texto": backend.extrair_texto(pdf_bytes)}
+        except Exception as e:
+            return {"status": "erro", "limite_excedido": False, "mensagem": str(e)}
+
+    timeout = float(os.getenv("PDF_TIMEOUT_SEGUNDOS", "30"))
+    limite_mb = int(os.getenv("PDF_LIMITE_MEMORIA_MB", "768"))
+
+    contexto = _obter_contexto_sandbox()
+    conexao_pai, conexao_filho = contexto.Pipe(duplex=False)
+    processo = contexto.Process(
+        target=_worker_extracao,
+        args=(conexao_filho, backend, pdf_bytes, limite_mb),
+        daemon=True
+    )
+
+    try:
+        processo.start()
+        conexao_filho.close()
+
+        # Ler antes do join: texto grande poderia encher o pipe e travar o filho
+        if not conexao_pai.poll(timeout):
+            print(f"⏰ Extração PDF excedeu {timeout:.0f}s ({backend.nome}) - encerrando processo")
+            processo.kill()
+            return {"status": "erro", "limite_excedido": True,
+                    "mensagem": f"Timeout {timeout:.0f}s na extração PDF ({backend.nome})"}
+
+        try:
+            resultado = conexao_pai.recv()
+        except EOFError:
+            # Filho morreu sem responder (OOM killer, segfault em lib nativa...)
+            processo.join(5)
+            return {"status": "erro", "limite_excedido": True,
+                    "mensagem": f"Processo de extração PDF encerrado (exit code {processo.exitcode})"}
+
+        if resultado.get("limite_excedido"):
+            print(f"💥 {resultado['mensagem']} ({backend.nome})")
+
+        return resultado
+
+    finally:
+        conexao_pai.close()
+        processo.join(1)
+        if processo.is_alive():
+            processo.kill()
+            processo.join(1)
+
+
+def _valor_em_reais(valor):
+    """'1.234,56' → 1234.56 (None se não for número)."""
+    try:
+        return float(valor.replace(".", "").replace(",", "."))
+    except (AttributeError, ValueError):
+        return None
+
+
+def _consumo_plausivel(valor):
+    """Consumo em m³ inteiro entre 0 e PDF_CONSUMO_MAXIMO (padrão 10000)."""
+    maximo = int(os.getenv("PDF_CONSUMO_MAXIMO", "10000"))
+    try:
+        return 0 <= int(valor) <= maximo and str(int(valor)) == str(valor).strip()
+    except (TypeError, ValueError):
+        return False
+
+
+def valor_valido(campo, valor):
+    """
+    Valor extraído passa no formato do campo e em faixas plausíveis:
+    Valor em reais até PDF_VALOR_MAXIMO (padrão 50000), consumo em m³ inteiro.
+    """
+    if campo in CAMPOS_CONSUMO:
+        return _consumo_plausivel(valor)
+
+    texto = str(valor or "")
+    if not texto or texto == "Não encontrado":
+        return False
+
+    padrao = FORMATOS_CAMPOS.get(campo)
+    if padrao and not re.match(padrao, texto):
+        return False
+
+    if campo == "Valor":
+        reais = _valor_em_reais(texto)
+        return reais is not None and reais <= float(os.getenv("PDF_VALOR_MAXIMO", "50000"))
+
+    return True
+
+
+def registrar_backend_campos(info, nome_backend):
+    """Marca o backend que leu cada campo do resultado (peso na confiança)."""
+    info["backend_pdf"] = nome_backend
+    info["backends_extracao"] = {campo: nome_backend for campo in (info.get("fontes_extracao") or {})}
+    return info
+
+
+def _peso_backend(info, campo):
+    nome = (info.get("backends_extracao") or {}).get(campo)
+    return CONFIANCA_BACKENDS.get(nome, 1.0)
+
+
+def confianca_campo(info, campo):
+    """
+    Confiança (0-1) do campo: fonte registrada na extração × peso do backend
+    que leu o texto. Valor fora do formato/faixa vale 0, qualquer que seja a fonte.
+    """
+    fonte = (info.get("fontes_extracao") or {}).get(campo)
+    if fonte is None or not valor_valido(campo, info.get(campo)):
+        return 0.0
+
+    confianca = CONFIANCA_FONTES.get(fonte, 0.0)
+    if fonte not in FONTES_EXTERNAS:
+        confianca *= _peso_backend(info, campo)
+    return round(confianca, 2)
+
+
+def calcular_confianca(info):
+    """Score médio de confiança dos campos principais (0-1)."""
+    return round(sum(confianca_campo(info, c) for c in CAMPOS_CONFIANCA) / len(CAMPOS_CONFIANCA), 2)
+
+
+def validar_campos_essenciais(info):
+    """
+    Verifica se os campos essenciais têm formato válido E confiança mínima
+    (PDF_CONFIANCA_MINIMA, padrão 0.5). Sem fontes registradas (benchmark com
+    processador antigo) vale só o formato.
+
+    Consumo também entra: Medido_Real/Faturado obrigatórios, Média 6M se
+    houver - pega números grudados de texto sem quebra de linha.
+
+    Returns:
+        list: Campos inválidos/ausentes/baixa confiança (vazia = texto aceito)
+    """
+    minima = float(os.getenv("PDF_CONFIANCA_MINIMA", "0.5"))
+    tem_fontes = bool(info.get("fontes_extracao"))
+
+    faltando = []
+    for campo in list(CAMPOS_ESSENCIAIS) + CAMPOS_CONSUMO:
+        valor = info.get(campo)
+        if valor is None and campo not in CAMPOS_ESSENCIAIS and campo not in CAMPOS_CONSUMO_OBRIGATORIOS:
+            continue
+        if not valor_valido(campo, valor):
+            faltando.append(campo)
+        elif tem_fontes and confianca_campo(info, campo) < minima:
+            faltando.append(campo)
+    return faltando
+
+
+def mesclar_por_confianca(info_atual, info_novo):
+    """
+    Combina o resultado de um backend mais caro com o anterior: cada campo
+    fica com o valor de MAIOR confiança (o caminho lento só substitui os
+    campos fracos do caminho rápido). Empate → backend de maior peso
+    (layout completo).
+
+    Returns:
+        dict: info_atual atualizado
+    """
+    fontes_atual = info_atual.setdefault("fontes_extracao", {})
+    backends_atual = info_atual.setdefault("backends_extracao", {})
+    backends_novo = info_novo.get("backends_extracao") or {}
+
+    for campo, fonte in (info_novo.get("fontes_extracao") or {}).items():
+        confianca_nova = confianca_campo(info_novo, campo)
+        confianca_atual = confianca_campo(info_atual, campo)
+        empate_layout = (
+            confianca_nova == confianca_atual and confianca_nova > 0
+            and _peso_backend(info_novo, campo) > _peso_backend(info_atual, campo)
+        )
+
+        if confianca_nova > confianca_atual or empate_layout:
+            info_atual[campo] = info_novo.get(campo)
+            fontes_atual[campo] = fonte
+            if campo in backends_novo:
+                backends_atual[campo] = backends_novo[campo]
+    return info_atual
+
+
+def registrar_resultado_backend(nome, tempo_ms, sucesso, erro=False):
+    """Acumula tempo e resultado de uma tentativa de extração por backend."""
+    with _lock_estatisticas:
+        stats = _estatisticas_backends.setdefault(nome, {
+            "tentativas": 0,
+            "sucessos": 0,
+            "falhas_validacao": 0,
+            "erros": 0,
+            "tempo_total_ms": 0.0
+        })
+        stats["tentativas"] += 1
+        stats["tempo_total_ms"] += tempo_ms
+        if erro:
+            stats["erros"] += 1
+        elif sucesso:
+            stats["sucessos"] += 1
+        else:
+            stats["falhas_validacao"] += 1
+
+
+def obter_estatisticas_backends():
+    """
+    Relatório de tempo médio e taxa de sucesso por backend desde o início do processo.
+    """
+    with _lock_estatisticas:
+        relatorio = {}
+        for nome, stats in _estatisticas_backends.items():
+            tentativas = stats["tentativas"] or 1
+            relatorio[nome] = {
+                **stats,
+                "tempo_total_ms": round(stats["tempo_total_ms"], 1),
+                "tempo_medio_ms": round(stats["tempo_total_ms"] / tentativas, 1),
+                "taxa_sucesso": round(stats["sucessos"] / tentativas * 100, 1)
+            }
+        return relatorio
+
+
+def _processador_offline():
+    """
+    EmailProcessor sem autenticação/OneDrive - só os patterns de extração.
+    Usado no benchmark para validar campos exatamente como em produção.
+    """
+    from processor.email_processor import EmailProcessor
+
+    processador = EmailProcessor.__new__(EmailProcessor)
+    processador.cdc_brk_vetor = []
+    processador.ultimo_erro_extracao = None
+    processador.casa_oracao_vetor = []
+    return processador
+
+
+def benchmark_backends(pasta_pdfs, nomes_backends=None):
+    """
+    Mede tempo por PDF e taxa de sucesso (campos essenciais válidos) de cada
+    backend em um corpus local de faturas, além da cascata configurada.
+
+    Args:
+        pasta_pdfs (str): Pasta com PDFs de faturas BRK
+        nomes_backends (list, optional): Backends a medir (padrão: todos registrados)
+
+    Returns:
+        dict: Relatório por backend + cascata
+    """
+    arquivos = sorted(
+        os.path.join(pasta_pdfs, nome) for nome in os.listdir(pasta_pdfs)
+        if nome.lower().endswith(".pdf")
+    )
+    if not arquivos:
+        print(f"❌ Nenhum PDF encontrado em {pasta_pdfs}")
+        return {"status": "erro", "mensagem": "Nenhum PDF no corpus"}
+
+    processador = _processador_offline()
+    nomes_backends = nomes_backends or list(BACKENDS_REGISTRADOS.keys())
+    backends = [BACKENDS_REGISTRADOS[n]() for n in nomes_backends if n in BACKENDS_REGISTRADOS]
+    backends = [b for b in backends if b.disponivel()]
+
+    print(f"\n⏱️ BENCHMARK BACKENDS PDF")
+    print(f"   📁 Corpus: {len(arquivos)} PDFs em {pasta_pdfs}")
+    print(f"   🔧 Backends: {', '.join(b.nome for b in backends)}")
+
+    resultados = {b.nome: {"sucessos": 0, "erros": 0, "tempos_ms": []} for b in backends}
+    cascata = {"sucessos": 0, "tempos_ms": [], "backend_final": {}}
+
+    for caminho in arquivos:
+        with open(caminho, "rb") as f:
+            pdf_bytes = f.read()
+        nome_arquivo = os.path.basename(caminho)
+        tempo_cascata = 0.0
+        aceito_por = None
+
+        for backend in backends:
+            inicio = time.perf_counter()
+            try:
+                texto = backend.extrair_texto(pdf_bytes)
+                tempo_ms = (time.perf_counter() - inicio) * 1000
+                with redirect_stdout(io.StringIO()):
+                    info = processador._extrair_campos_texto(texto, nome_arquivo, len(pdf_bytes))
+                registrar_backend_campos(info, backend.nome)
+                valido = not validar_campos_essenciais(info)
+            except Exception:
+                tempo_ms = (time.perf_counter() - inicio) * 1000
+                resultados[backend.nome]["erros"] += 1
+                valido = False
+
+            resultados[backend.nome]["tempos_ms"].append(tempo_ms)
+            if valido:
+                resultados[backend.nome]["sucessos"] += 1
+
+            # Cascata: soma tempos até o primeiro backend que valida
+            if aceito_por is None:
+                tempo_cascata += tempo_ms
+                if valido:
+                    aceito_por = backend.nome
+
+        cascata["tempos_ms"].append(tempo_cascata)
+        if aceito_por:
+            cascata["sucessos"] += 1
+            cascata["backend_final"][aceito_por] = cascata["backend_final"].get(aceito_por, 0) + 1
+
+    def _resumir(sucessos, tempos):
+        total = len(tempos) or 1
+        ordenados = sorted(tempos)
+        return {
+            "arquivos": len(tempos),
+            "sucessos": sucessos,
+            "taxa_sucesso": round(sucessos / total * 100, 1),
+            "tempo_medio_ms": round(sum(tempos) / total, 1),
+            "tempo_p95_ms": round(ordenados[int(0.95 * (len(ordenados) - 1))], 1) if ordenados else 0,
+            "tempo_total_ms": round(sum(tempos), 1)
+        }
+
+    relatorio = {nome: {**_resumir(r["sucessos"], r["tempos_ms"]), "erros": r["erros"]}
+                 for nome, r in resultados.items()}
+    relatorio["cascata"] = {**_resumir(cascata["sucessos"], cascata["tempos_ms"]),
+                            "backend_final": cascata["backend_final"]}
+
+    print(f"\n📊 RESULTADO ({len(arquivos)} PDFs):")
+    for nome, r in relatorio.items():
+        print(f"   🔧 {nome:16} sucesso {r['taxa_sucesso']:5.1f}% | "
+              f"médio {r['tempo_medio_ms']:7.1f}ms | p95 {r['tempo_p95_ms']:7.1f}ms")
+    print(f"   🎯 Cascata aceitou por: {relatorio['cascata']['backend_final']}")
+
+    return relatorio
+
+
+def benchmark_regioes_vs_pagina(pasta_pdfs):
+    """
+    Latência por PDF: caixas do template vs página inteira, com o caminho
+    que o backend de regiões realmente usou (recorte ou página inteira).
+
+    Returns:
+        dict: {'por_pdf': [...], 'regioes': resumo, 'pagina': resumo, 'ganho_regioes'}
+    """
+    arquivos = sorted(
+        os.path.join(pasta_pdfs, nome) for nome in os.listdir(pasta_pdfs)
+        if nome.lower().endswith(".pdf")
+    )
+    if not arquivos:
+        print(f"❌ Nenhum PDF encontrado em {pasta_pdfs}")
+        return {"status": "erro", "mensagem": "Nenhum PDF no corpus"}
+
+    processador = _processador_offline()
+    regioes, pagina = BackendPdfplumberRegioes(), BackendPdfplumber()
+    por_pdf = []
+
+    print(f"\n⏱️ BENCHMARK RECORTE vs PÁGINA INTEIRA ({len(arquivos)} PDFs)")
+    print(f"   {'arquivo':30} {'regiões':>9} {'página':>9}  caminho")
+
+    for caminho in arquivos:
+        with open(caminho, "rb") as f:
+            pdf_bytes = f.read()
+        nome_arquivo = os.path.basename(caminho)
+        linha = {"arquivo": nome_arquivo}
+
+        for chave, backend in (("regioes", regioes), ("pagina", pagina)):
+            inicio = time.perf_counter()
+            try:
+                with redirect_stdout(io.StringIO()):
+                    texto = backend.extrair_texto(pdf_bytes)
+                    info = processador._extrair_campos_texto(texto, nome_arquivo, len(pdf_bytes))
+                registrar_backend_campos(info, backend.nome)
+                linha[f"{chave}_valido"] = not validar_campos_essenciais(info)
+            except Exception:
+                linha[f"{chave}_valido"] = False
+            linha[f"{chave}_ms"] = round((time.perf_counter() - inicio) * 1000, 1)
+
+        linha["recorte_ok"] = bool(regioes.ultimo_recorte_ok)
+        por_pdf.append(linha)
+        print(f"   {nome_arquivo[:30]:30} {linha['regioes_ms']:7.1f}ms {linha['pagina_ms']:7.1f}ms  "
+              f"{'recorte' if linha['recorte_ok'] else 'página inteira'}"
+              f"{'' if linha['regioes_valido'] else ' ❌ inválido'}")
+
+    def _resumir(chave):
+        tempos = sorted(l[f"{chave}_ms"] for l in por_pdf)
+        return {
+            "tempo_medio_ms": round(sum(tempos) / len(tempos), 1),
+            "tempo_p95_ms": tempos[int(0.95 * (len(tempos) - 1))],
+            "taxa_sucesso": round(sum(1 for l in por_pdf if l[f"{chave}_valido"]) / len(por_pdf) * 100, 1),
+        }
+
+    relatorio = {
+        "por_pdf": por_pdf,
+        "regioes": _resumir("regioes"),
+        "pagina": _resumir("pagina"),
+        "recorte_correspondeu": sum(1 for l in por_pdf if l["recorte_ok"]),
+    }
+    if relatorio["regioes"]["tempo_medio_ms"] > 0:
+        relatorio["ganho_regioes"] = round(
+            relatorio["pagina"]["tempo_medio_ms"] / relatorio["regioes"]["tempo_medio_ms"], 2
+        )
+        print(f"   ⚡ Recorte por caixas: {relatorio['ganho_regioes']}x vs página inteira "
+              f"(template correspondeu em {relatorio['recorte_correspondeu']}/{len(por_pdf)} PDFs)")
+
+    return relatorio
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python -m processor.pdf_backends /caminho/pasta_pdfs [backend1,backend2 | regioes]")
+        print("     python -m processor.pdf_backends /caminho/fatura.pdf calibrar [saida.json]")
+        sys.exit(1)
+
+    if len(sys.argv) > 2 and sys.argv[2] == "calibrar":
+        import json
+        with open(sys.argv[1], "rb") as f:
+            template_calibrado = calibrar_template_brk(f.read())
+        saida = json.dumps(template_calibrado, ensure_ascii=False, indent=2)
+        if len(sys.argv) > 3:
+            with open(sys.argv[3], "w", encoding="utf-8") as f:
+                f.write(saida)
+            print(f"💾 Template salvo em {sys.argv[3]} (use PDF_TEMPLATE_BRK_ARQUIVO)")
+        else:
+            print(saida)
+    elif len(sys.argv) > 2 and sys.argv[2] == "regioes":
+        benchmark_regioes_vs_pagina(sys.argv[1])
+    else:
+        nomes = sys.argv[2].split(",") if len(sys.argv) > 2 else None
+        benchmark_backends(sys.argv[1], nomes)
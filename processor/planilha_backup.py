@@ -2,15 +2,18 @@
 # -*- coding: utf-8 -*-
 """
 📊 PLANILHA BACKUP SIMPLES - Sistema transparente para planilha BRK
-📁 FUNÇÃO: Salvar backups VISÍVEIS na pasta correta /BRK/Faturas/YYYY/MM/
+📁 FUNÇÃO: Salvar a planilha na pasta correta /BRK/Faturas/YYYY/MM/
 👨‍💼 AUTOR: Sidney Gubitoso, auxiliar tesouraria adm maua
 
-🔧 LÓGICA SIMPLES:
+🔧 LÓGICA:
    1. Detectar mês/ano atual (julho/2025) ou específico
-   2. Tentar salvar /BRK/Faturas/2025/07/BRK-Planilha-2025-07.xlsx
-   3. Se ocupada → /BRK/Faturas/2025/07/BRK-Planilha-2025-07_TEMPORARIA_05Jul_15h30.xlsx
-   4. A cada 30min → tentar principal + limpar temporárias na pasta correta
-   5. Usuário vê claramente os arquivos temporários na pasta do mês
+   2. PUT /BRK/Faturas/2025/07/BRK-Planilha-2025-07.xlsx com If-Match no eTag
+      do último envio (database informado) → não sobrescreve às cegas
+   3. HTTP 412 (alterada por outra pessoa) → NÃO sobrescreve: fila
+      planilhas_upload + aviso ao admin (apagar/renomear o arquivo libera)
+   4. HTTP 423/409 (aberta/bloqueada) → planilha vai para a fila
+      planilhas_upload e o monitor reenvia no próximo ciclo (sem cópias)
+   5. Principal salva → remove _TEMPORARIA_ antigas da pasta em lote ($batch)
 """
 
 import os
@@ -18,40 +21,48 @@ import requests
 from datetime import datetime
 
 
-def salvar_planilha_inteligente(auth_manager, dados_planilha, mes=None, ano=None):
+GRAPH_BASE_URL = "https://graph.microsoft.com/v1.0"
+CONTENT_TYPE_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Arquivo aberto no Excel Online/desktop ou com check-out
+STATUS_BLOQUEADA = (409, 423)
+
+# If-Match falhou: alguém editou a planilha depois do nosso último envio
+STATUS_ALTERADA = 412
+
+# Limite de requisições por chamada /$batch do Graph
+LIMITE_BATCH_GRAPH = 20
+
+
+def salvar_planilha_inteligente(auth_manager, dados_planilha, mes=None, ano=None, database=None):
     """
-    🆕 FUNÇÃO CORRIGIDA: Salvar planilha com backup para MÊS/ANO ESPECÍFICO
+    Salvar a planilha principal do mês/ano (upload condicional)
     
-    ANTES: Sempre usava mês/ano atual
-    AGORA: Aceita mês/ano específico para múltiplas planilhas
-    
-    ✅ MUDANÇAS:
-       - Parâmetros mes/ano opcionais
-       - Se não informado, usa mês/ano atual (compatibilidade)
-       - Nomes de arquivo específicos para cada mês/ano
-       - Backup na pasta correta de cada mês
+    ✅ COMPORTAMENTO:
+       - Parâmetros mes/ano opcionais (None → mês/ano atual)
+       - Com database: If-Match no eTag do último envio + fila de reenvio
+       - Sem database: upload direto, sem fila (compatibilidade)
+       - Bloqueada (423/409) NÃO gera cópia _TEMPORARIA_
+       - Alterada por outra pessoa (412) NÃO é sobrescrita: fica na fila
     
     Args:
         auth_manager: Gerenciador de autenticação
         dados_planilha: Bytes da planilha Excel
         mes (int, optional): Mês específico (1-12). Se None, usa atual
         ano (int, optional): Ano específico. Se None, usa atual
+        database (DatabaseBRK, optional): eTag e fila planilhas_upload
         
     Returns:
-        bool: True se salvamento bem-sucedido
+        bool: True se a planilha principal foi atualizada
     """
+    hoje = datetime.now()
+    mes_usado = mes if mes is not None else hoje.month
+    ano_usado = ano if ano is not None else hoje.year
+    
     try:
-        # ✅ DETECTAR MÊS/ANO ESPECÍFICO OU USAR ATUAL
         if mes is None or ano is None:
-            # Fallback para compatibilidade (lógica original)
-            hoje = datetime.now()
-            mes_usado = mes if mes is not None else hoje.month
-            ano_usado = ano if ano is not None else hoje.year
             print(f"📊 Salvamento planilha BRK - Usando mês/ano atual: {mes_usado:02d}/{ano_usado}")
         else:
-            # Usar mês/ano específico informado
-            mes_usado = mes
-            ano_usado = ano
             print(f"📊 Salvamento planilha BRK - Mês/ano específico: {mes_usado:02d}/{ano_usado}")
         
         # ✅ NOMES CORRETOS PARA O MÊS/ANO ESPECÍFICO
@@ -61,180 +72,193 @@ def salvar_planilha_inteligente(auth_manager, dados_planilha, mes=None, ano=None
         print(f"📁 Pasta destino: {pasta_destino}")
         print(f"📄 Arquivo principal: {nome_principal}")
         
-        # 1. Tentar salvar planilha principal
-        if tentar_salvar_principal(auth_manager, dados_planilha, pasta_destino, nome_principal):
+        upload_anterior = database.obter_upload_planilha(mes_usado, ano_usado) if database else None
+        etag_anterior = upload_anterior['etag'] if upload_anterior else None
+        
+        # 1. Upload condicional da planilha principal
+        resultado = tentar_salvar_principal(
+            auth_manager, dados_planilha, pasta_destino, nome_principal, etag_anterior
+        )
+        
+        if resultado['sucesso']:
             print(f"✅ Planilha principal {mes_usado:02d}/{ano_usado} atualizada com sucesso")
             
-            # 2. Principal salvou → limpar temporárias da pasta correta
+            if database:
+                database.registrar_upload_planilha(mes_usado, ano_usado, resultado['etag'], len(dados_planilha))
+            
+            # 2. Principal salvou → limpar temporárias antigas da pasta
             limpar_planilhas_temporarias(auth_manager, pasta_destino, ano_usado, mes_usado)
             return True
         
-        # 3. Principal ocupada → salvar temporária VISÍVEL na mesma pasta
-        print(f"⚠️ Planilha principal {mes_usado:02d}/{ano_usado} ocupada, criando versão temporária...")
+        # 3. Bloqueada ou erro → fila para o próximo ciclo (sem cópia temporária)
+        status_http = resultado['status_http']
+        bloqueada = status_http in STATUS_BLOQUEADA
+        alterada = status_http == STATUS_ALTERADA
         
-        nome_temporaria = gerar_nome_temporaria(ano_usado, mes_usado)
+        if bloqueada:
+            print(f"🔒 Planilha principal {mes_usado:02d}/{ano_usado} em uso (HTTP {status_http})")
+        elif alterada:
+            print(f"✋ Planilha principal {mes_usado:02d}/{ano_usado} alterada por outra pessoa - não sobrescrita")
         
-        if salvar_planilha_temporaria(auth_manager, dados_planilha, pasta_destino, nome_temporaria):
-            print(f"💾 Planilha temporária criada: {nome_temporaria}")
-            print(f"📁 Arquivo visível em: {pasta_destino}")
-            print(f"🔄 Sistema tentará atualizar principal em 30 minutos")
-            
-            # 4. Notificar admin se configurado
-            notificar_planilha_temporaria(nome_temporaria, pasta_destino, mes_usado, ano_usado)
+        if database:
+            tentativas = database.enfileirar_upload_planilha(mes_usado, ano_usado, status_http, resultado['erro'])
+            print(f"🔁 Planilha {mes_usado:02d}/{ano_usado} na fila de reenvio (tentativa {tentativas})")
             
-            return True
-        else:
-            print(f"❌ Falha criando planilha temporária {mes_usado:02d}/{ano_usado}")
-            return False
+            if (bloqueada or alterada) and tentativas == 1:
+                notificar_planilha_bloqueada(pasta_destino, mes_usado, ano_usado, alterada=alterada)
+        
+        return False
             
     except Exception as e:
         print(f"❌ Erro salvamento planilha {mes_usado:02d}/{ano_usado}: {e}")
         return False
 
 
-def tentar_salvar_principal(auth_manager, dados_planilha, pasta_destino, nome_arquivo):
-    """Tentar salvar na planilha principal na pasta correta"""
+def tentar_salvar_principal(auth_manager, dados_planilha, pasta_destino, nome_arquivo, etag=None):
+    """
+    PUT da planilha principal com If-Match (quando há eTag do último envio)
+    
+    Returns:
+        dict: {'sucesso', 'status_http', 'etag', 'erro'}
+    """
     try:
         pasta_brk_id = os.getenv('ONEDRIVE_BRK_ID')
         if not pasta_brk_id:
             print("❌ ONEDRIVE_BRK_ID não configurado")
-            return False
-        
-        headers = auth_manager.obter_headers_autenticados()
+            return {'sucesso': False, 'status_http': None, 'etag': None, 'erro': 'ONEDRIVE_BRK_ID não configurado'}
         
         # ✅ CAMINHO COMPLETO: /BRK/Faturas/2025/07/BRK-Planilha-2025-07.xlsx
         caminho_completo = f"{pasta_destino}{nome_arquivo}"
-        upload_url = f"https://graph.microsoft.com/v1.0/me/drive/root:{caminho_completo}:/content"
+        upload_url = f"{GRAPH_BASE_URL}/me/drive/root:{caminho_completo}:/content"
         
-        headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        upload_response = _put_condicional(auth_manager, upload_url, dados_planilha, etag)
         
-        upload_response = requests.put(upload_url, headers=headers, data=dados_planilha, timeout=60)
+        # Removida desde o nosso último envio: nada a preservar, recria com o eTag atual.
+        # Alterada (412) NÃO é reenviada - sobrescreveria a edição de outra pessoa
+        if etag and upload_response.status_code == 404:
+            print(f"⚠️ Planilha removida do OneDrive desde o último envio - recriando")
+            etag_atual = obter_etag_planilha(auth_manager, caminho_completo)
+            upload_response = _put_condicional(auth_manager, upload_url, dados_planilha, etag_atual)
         
         if upload_response.status_code in [200, 201]:
-            return True
-        else:
-            print(f"❌ Erro salvando principal: HTTP {upload_response.status_code}")
-            return False
+            return {
+                'sucesso': True,
+                'status_http': upload_response.status_code,
+                'etag': upload_response.json().get('eTag'),
+                'erro': None,
+            }
+        
+        print(f"❌ Erro salvando principal: HTTP {upload_response.status_code}")
+        return {
+            'sucesso': False,
+            'status_http': upload_response.status_code,
+            'etag': None,
+            'erro': upload_response.text[:300],
+        }
             
     except requests.exceptions.RequestException as e:
-        if "locked" in str(e).lower() or "busy" in str(e).lower():
-            print("⚠️ Arquivo principal está em uso")
-        else:
-            print(f"❌ Erro rede: {e}")
-        return False
+        print(f"❌ Erro rede: {e}")
+        return {'sucesso': False, 'status_http': None, 'etag': None, 'erro': str(e)}
     except Exception as e:
         print(f"❌ Erro salvando principal: {e}")
-        return False
+        return {'sucesso': False, 'status_http': None, 'etag': None, 'erro': str(e)}
 
 
-def salvar_planilha_temporaria(auth_manager, dados_planilha, pasta_destino, nome_temporaria):
-    """Salvar planilha temporária na pasta correta do mês/ano"""
-    try:
-        pasta_brk_id = os.getenv('ONEDRIVE_BRK_ID')
-        if not pasta_brk_id:
-            return False
-        
+def _put_condicional(auth_manager, upload_url, dados_planilha, etag):
+    """PUT com If-Match opcional e uma renovação de token em caso de HTTP 401."""
+    def _headers():
         headers = auth_manager.obter_headers_autenticados()
+        headers['Content-Type'] = CONTENT_TYPE_XLSX
+        if etag:
+            headers['If-Match'] = etag
+        return headers
+    
+    response = requests.put(upload_url, headers=_headers(), data=dados_planilha, timeout=60)
+    
+    if response.status_code == 401 and auth_manager.atualizar_token():
+        response = requests.put(upload_url, headers=_headers(), data=dados_planilha, timeout=60)
+    
+    return response
+
+
+def obter_etag_planilha(auth_manager, caminho_completo):
+    """eTag atual do arquivo no OneDrive (só metadados) ou None se não existir."""
+    try:
+        url = f"{GRAPH_BASE_URL}/me/drive/root:{caminho_completo}?$select=eTag"
+        response = requests.get(url, headers=auth_manager.obter_headers_autenticados(), timeout=15)
         
-        # ✅ CAMINHO COMPLETO: /BRK/Faturas/2025/07/BRK-Planilha-2025-07_TEMPORARIA_05Jul_15h30.xlsx
-        caminho_completo = f"{pasta_destino}{nome_temporaria}"
-        upload_url = f"https://graph.microsoft.com/v1.0/me/drive/root:{caminho_completo}:/content"
-        
-        headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        
-        upload_response = requests.put(upload_url, headers=headers, data=dados_planilha, timeout=60)
-        
-        return upload_response.status_code in [200, 201]
+        if response.status_code == 200:
+            return response.json().get('eTag')
+        return None
         
     except Exception as e:
-        print(f"❌ Erro salvando temporária: {e}")
-        return False
+        print(f"⚠️ Erro consultando eTag da planilha: {e}")
+        return None
 
 
 def limpar_planilhas_temporarias(auth_manager, pasta_destino, ano, mes):
-    """Limpar planilhas temporárias da pasta específica do mês/ano"""
+    """Remover _TEMPORARIA_ antigas da pasta do mês/ano (DELETEs agrupados em /$batch)"""
     try:
         # ✅ BUSCAR NA PASTA ESPECÍFICA: /BRK/Faturas/2025/07/
         caminho_pasta = pasta_destino.rstrip('/')  # Remove / final se tiver
-        list_url = f"https://graph.microsoft.com/v1.0/me/drive/root:{caminho_pasta}:/children"
+        list_url = f"{GRAPH_BASE_URL}/me/drive/root:{caminho_pasta}:/children?$select=id,name"
         
         headers = auth_manager.obter_headers_autenticados()
         response = requests.get(list_url, headers=headers, timeout=30)
         
-        if response.status_code == 200:
-            items = response.json().get('value', [])
-            temporarias_removidas = 0
-            
-            # ✅ PADRÃO ESPECÍFICO: BRK-Planilha-2025-07_TEMPORARIA_*
-            padrao_temporaria = f"BRK-Planilha-{ano}-{mes:02d}_TEMPORARIA_"
+        if response.status_code != 200:
+            return
+        
+        # ✅ PADRÃO ESPECÍFICO: BRK-Planilha-2025-07_TEMPORARIA_*
+        padrao_temporaria = f"BRK-Planilha-{ano}-{mes:02d}_TEMPORARIA_"
+        temporarias = [
+            (item.get('id'), item.get('name', ''))
+            for item in response.json().get('value', [])
+            if item.get('name', '').startswith(padrao_temporaria) and item.get('name', '').endswith('.xlsx')
+        ]
+        
+        temporarias_removidas = 0
+        
+        for inicio in range(0, len(temporarias), LIMITE_BATCH_GRAPH):
+            lote = temporarias[inicio:inicio + LIMITE_BATCH_GRAPH]
+            corpo = {
+                "requests": [
+                    {"id": str(indice), "method": "DELETE", "url": f"/me/drive/items/{item_id}"}
+                    for indice, (item_id, _) in enumerate(lote)
+                ]
+            }
             
-            for item in items:
-                nome = item.get('name', '')
-                item_id = item.get('id')
-                
-                # Remover arquivos temporários específicos deste mês/ano
-                if nome.startswith(padrao_temporaria) and nome.endswith('.xlsx'):
-                    delete_url = f"https://graph.microsoft.com/v1.0/me/drive/items/{item_id}"
-                    delete_response = requests.delete(delete_url, headers=headers, timeout=30)
-                    
-                    if delete_response.status_code == 204:
-                        print(f"🗑️ Planilha temporária removida: {nome}")
-                        temporarias_removidas += 1
-                    else:
-                        print(f"⚠️ Erro removendo {nome}: {delete_response.status_code}")
+            batch_response = requests.post(f"{GRAPH_BASE_URL}/$batch", headers=headers, json=corpo, timeout=30)
+            if batch_response.status_code != 200:
+                print(f"⚠️ Erro no lote de limpeza: HTTP {batch_response.status_code}")
+                continue
             
-            if temporarias_removidas > 0:
-                print(f"🧹 Limpeza concluída: {temporarias_removidas} planilha(s) temporária(s) removida(s)")
+            for resposta in batch_response.json().get('responses', []):
+                nome = lote[int(resposta.get('id'))][1]
+                if resposta.get('status') == 204:
+                    print(f"🗑️ Planilha temporária removida: {nome}")
+                    temporarias_removidas += 1
+                else:
+                    print(f"⚠️ Erro removendo {nome}: {resposta.get('status')}")
+        
+        if temporarias_removidas > 0:
+            print(f"🧹 Limpeza concluída: {temporarias_removidas} planilha(s) temporária(s) removida(s)")
         
     except Exception as e:
         print(f"❌ Erro limpando temporárias: {e}")
 
 
-def gerar_nome_temporaria(ano, mes):
+def notificar_planilha_bloqueada(pasta_destino, mes, ano, alterada=False, nome_arquivo=None):
     """
-    🔧 FUNÇÃO CORRIGIDA: Gerar nome temporário para mês/ano específico
-    
-    ANTES: Sempre baseado no mês atual para timestamp
-    AGORA: Nome baseado no mês/ano da planilha + timestamp atual
+    Avisar admin (uma vez por bloqueio) que a planilha principal está em uso
+    ou foi alterada por outra pessoa desde o último envio
     
     Args:
-        ano (int): Ano da planilha (ex: 2025)
-        mes (int): Mês da planilha (ex: 7 para julho)
-        
-    Returns:
-        str: Nome do arquivo temporário
-    """
-    agora = datetime.now()
-    
-    # ✅ PADRÃO CORRIGIDO: BRK-Planilha-{ANO}-{MES}_TEMPORARIA_{dia_atual}{mes_atual}_{hora}
-    # Exemplo: BRK-Planilha-2025-08_TEMPORARIA_05Jul_15h30.xlsx
-    
-    # Meses em português abreviado
-    meses = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun',
-             'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
-    
-    dia_atual = agora.day
-    mes_atual_abrev = meses[agora.month - 1]  # Mês atual para timestamp
-    hora_atual = agora.strftime('%Hh%M')
-    
-    # Nome: Planilha do mês/ano específico + timestamp atual
-    nome = f"BRK-Planilha-{ano}-{mes:02d}_TEMPORARIA_{dia_atual:02d}{mes_atual_abrev}_{hora_atual}.xlsx"
-    
-    return nome
-
-
-def notificar_planilha_temporaria(nome_temporaria, pasta_destino, mes, ano):
-    """
-    🔧 FUNÇÃO CORRIGIDA: Notificar admin sobre planilha temporária específica
-    
-    ANTES: Mensagem genérica
-    AGORA: Mensagem específica para o mês/ano da planilha
-    
-    Args:
-        nome_temporaria (str): Nome do arquivo temporário
-        pasta_destino (str): Pasta onde foi salvo
-        mes (int): Mês específico da planilha
+        pasta_destino (str): Pasta da planilha
+        mes (int): Mês específico da planilha (None = consolidado do ano)
         ano (int): Ano específico da planilha
+        alterada (bool): HTTP 412 (edição de outra pessoa) em vez de bloqueio
+        nome_arquivo (str, optional): Padrão BRK-Planilha-YYYY-MM.xlsx
     """
     try:
         # Import opcional - não quebra se módulo não existir
@@ -250,21 +274,35 @@ def notificar_planilha_temporaria(nome_temporaria, pasta_destino, mes, ano):
                 9: "Setembro", 10: "Outubro", 11: "Novembro", 12: "Dezembro"
             }
             
-            nome_mes = meses_nomes.get(mes, f"Mês{mes}")
+            periodo = f"{meses_nomes.get(mes, f'Mês{mes}')}/{ano}" if mes else f"Consolidado {ano}"
+            nome_arquivo = nome_arquivo or f"BRK-Planilha-{ano}-{mes:02d}.xlsx"
+            
+            if alterada:
+                mensagem = f"""📊 PLANILHA BRK - ALTERADA NO ONEDRIVE
+
+📅 Planilha: {periodo}
+✋ {nome_arquivo} foi editada por outra pessoa
+📁 Localização: {pasta_destino}
+🛡️ Atualização automática NÃO sobrescreveu a edição (fila de reenvio)
+
+📄 Copie o que precisar e apague/renomeie o arquivo
+✅ O monitor recria a planilha no próximo ciclo"""
+                enviar_telegram(admin_ids[0].strip(), mensagem)
+                print(f"📱 Admin notificado via Telegram sobre {nome_arquivo} alterada")
+                return
             
-            mensagem = f"""📊 PLANILHA BRK - VERSÃO TEMPORÁRIA
+            mensagem = f"""📊 PLANILHA BRK - EM USO
 
-📅 Planilha: {nome_mes}/{ano}
-⚠️ Arquivo principal estava em uso
-💾 Dados salvos em: {nome_temporaria}
+📅 Planilha: {periodo}
+🔒 {nome_arquivo} está aberta/bloqueada
 📁 Localização: {pasta_destino}
-🔄 Sistema tentará atualizar principal em 30 min
+🔁 Atualização na fila - nova tentativa no próximo ciclo do monitor
 
-📄 Feche BRK-Planilha-{ano}-{mes:02d}.xlsx quando possível
+📄 Feche a planilha quando possível
 ✅ Processamento continua normalmente"""
             
             enviar_telegram(admin_ids[0].strip(), mensagem)
-            print(f"📱 Admin notificado via Telegram sobre planilha {mes:02d}/{ano}")
+            print(f"📱 Admin notificado via Telegram sobre {nome_arquivo}")
             
     except ImportError:
         print("⚠️ Telegram não configurado - seguindo sem notificação")
@@ -309,8 +347,12 @@ if __name__ == "__main__":
     print(f"# Para planilha de mês específico:")
     print(f"sucesso = salvar_planilha_inteligente(auth, dados_planilha, mes=8, ano=2025)")
     print(f"")
+    print(f"# Com eTag (If-Match) e fila de reenvio:")
+    print(f"sucesso = salvar_planilha_inteligente(auth, dados_planilha, mes=8, ano=2025, database=database_brk)")
+    print(f"")
     print(f"📊 RESULTADO ESPERADO:")
     print(f"   ✅ Planilha principal: /BRK/Faturas/2025/08/BRK-Planilha-2025-08.xlsx")
-    print(f"   💾 Se ocupada: /BRK/Faturas/2025/08/BRK-Planilha-2025-08_TEMPORARIA_05Jul_15h30.xlsx")
-    print(f"   🧹 Limpeza automática de temporárias antigas")
+    print(f"   🔒 Se ocupada (423/409): fila planilhas_upload, reenvio no próximo ciclo")
+    print(f"   ✋ Se alterada por outra pessoa (412): fila + aviso, sem sobrescrever")
+    print(f"   🧹 Limpeza em lote de temporárias antigas")
     print(f"   📱 Notificação admin via Telegram (opcional)")
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🔁 REPROCESSAMENTO BRK - Reextração em massa das faturas já salvas
+📁 FUNÇÃO: Rodar patterns corrigidos sobre o histórico (content_bytes) do faturas_brk
+👨‍💼 AUTOR: Sidney Gubitoso, auxiliar tesouraria adm maua
+
+🔧 LÓGICA:
+   1. Lê faturas_brk em lotes por keyset (WHERE id > ultimo_id ORDER BY id LIMIT n)
+   2. Reextrai cada PDF em pool de processos (mesmos backends do EmailProcessor)
+   3. Compara com os campos gravados → só aplica valores ENCONTRADOS e diferentes
+   4. UPDATE em lote dentro de uma transação + checkpoint no mesmo commit
+   5. Interrompido? Próxima execução retoma do último id do checkpoint
+   6. aplicar=False (padrão) = simulação: só relatório de diferenças
+
+💡 USO:
+   python -m processor.reprocessamento --db /caminho/database_brk.db [--aplicar]
+   python -m processor.reprocessamento --aplicar            (OneDrive via MicrosoftAuth)
+   POST /reprocessar-faturas  +  GET /reprocessar-faturas/status
+"""
+
+import io
+import os
+import json
+import sys
+import time
+import base64
+import sqlite3
+import threading
+from contextlib import redirect_stdout
+from datetime import datetime
+
+
+# Coluna faturas_brk → chave do dict retornado por extrair_dados_fatura_pdf
+CAMPOS_REPROCESSADOS = {
+    'cdc': 'Codigo_Cliente',
+    'nota_fiscal': 'Nota_Fiscal',
+    'casa_oracao': 'Casa de Oração',
+    'data_emissao': 'Data_Emissao',
+    'vencimento': 'Vencimento',
+    'competencia': 'Competencia',
+    'valor': 'Valor',
+    'medido_real': 'Medido_Real',
+    'faturado': 'Faturado',
+    'media_6m': 'Média 6M',
+    'porcentagem_consumo': 'Porcentagem Consumo',
+    'alerta_consumo': 'Alerta de Consumo',
+}
+
+# Progresso do job em execução (consultado pelo endpoint de status)
+_progresso_atual = {}
+_lock_progresso = threading.Lock()
+
+# Processador de cada worker do pool (criado no initializer)
+_processador_worker = None
+
+
+def _criar_tabela_checkpoint(conn):
+    """Tabela de checkpoints dos jobs de reprocessamento (um registro por job_id)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS reprocessamento_checkpoint (
+            job_id TEXT PRIMARY KEY,
+            ultimo_id INTEGER DEFAULT 0,
+            processadas INTEGER DEFAULT 0,
+            alteradas INTEGER DEFAULT 0,
+            erros INTEGER DEFAULT 0,
+            aplicar BOOLEAN DEFAULT FALSE,
+            status TEXT DEFAULT 'EM_ANDAMENTO',
+            iniciado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+            atualizado_em DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.commit()
+
+
+def _inicializar_worker(cdc_vetor, casa_vetor):
+    """Initializer do pool: processador offline com os vetores de relacionamento."""
+    global _processador_worker
+    from processor.pdf_backends import _processador_offline
+
+    _processador_worker = _processador_offline()
+    _processador_worker.cdc_brk_vetor = list(cdc_vetor)
+    _processador_worker.casa_oracao_vetor = list(casa_vetor)
+
+
+def _reextrair_fatura(item):
+    """
+    Executado no worker: decodifica content_bytes e reextrai os campos.
+
+    Returns:
+        dict: {'id', 'status', 'campos'} ou {'id', 'status': 'erro', 'mensagem'}
+    """
+    id_fatura, content_bytes = item
+    try:
+        pdf_bytes = base64.b64decode(content_bytes)
+        with redirect_stdout(io.StringIO()):
+            info = _processador_worker.extrair_dados_fatura_pdf(pdf_bytes, f"fatura_{id_fatura}.pdf")
+
+        if not info:
+            return {'id': id_fatura, 'status': 'erro',
+                    'mensagem': _processador_worker.ultimo_erro_extracao or 'Falha na extração de dados'}
+
+        campos = {coluna: info.get(chave) for coluna, chave in CAMPOS_REPROCESSADOS.items()}
+        metadados = {
+            'fontes_extracao': json.dumps(info.get('fontes_extracao') or {}, ensure_ascii=False),
+            'confianca_extracao': info.get('confianca_extracao')
+        }
+        return {'id': id_fatura, 'status': 'sucesso', 'campos': campos, 'metadados': metadados}
+
+    except Exception as e:
+        return {'id': id_fatura, 'status': 'erro', 'mensagem': str(e)}
+
+
+def _valor_encontrado(valor):
+    """Valor novo só substitui o gravado se a extração realmente encontrou algo."""
+    return valor is not None and valor != '' and valor != 'Não encontrado'
+
+
+def calcular_diferencas(registro_atual, campos_novos):
+    """
+    Compara campos gravados x reextraídos.
+
+    Returns:
+        dict: coluna → novo valor (apenas campos encontrados e diferentes)
+    """
+    diferencas = {}
+    for coluna, novo in campos_novos.items():
+        if not _valor_encontrado(novo):
+            continue
+        atual = registro_atual.get(coluna)
+        if atual is None or str(atual) != str(novo):
+            diferencas[coluna] = novo
+    return diferencas
+
+
+def _atualizar_progresso(**dados):
+    with _lock_progresso:
+        _progresso_atual.update(dados)
+
+
+def obter_progresso_reprocessamento():
+    """Snapshot do progresso do job atual/último job (para endpoint e logs)."""
+    with _lock_progresso:
+        return dict(_progresso_atual)
+
+
+def reprocessar_faturas(database, processador=None, tamanho_lote=50, workers=None,
+                        aplicar=False, retomar=True, job_id="padrao"):
+    """
+    Reextrai todas as faturas com content_bytes e aplica as diferenças.
+
+    Args:
+        database: DatabaseBRK (ou objeto com conn + lock_conexao) - leituras,
+                  UPDATEs e commit/rollback de cada lote acontecem com o lock
+                  adquirido, sempre na conexão atual (sincronizar_onedrive
+                  fecha e troca database.conn durante o job)
+        processador: EmailProcessor (opcional) - fornece vetores CDC → Casa
+        tamanho_lote (int): Faturas por lote/transação
+        workers (int): Processos no pool (padrão: os.cpu_count())
+        aplicar (bool): False = simulação (só relatório)
+        retomar (bool): Continuar do checkpoint do job_id
+        job_id (str): Identificador do checkpoint
+
+    Returns:
+        dict: Relatório com totais, diferenças por campo e throughput
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Conexão compartilhada com monitor, rotas web e dispatcher de alertas:
+    # conn/cursor relidos a cada bloco com o lock (nunca guardados entre lotes)
+    lock = database.lock_conexao
+
+    try:
+        with lock:
+            conn = database.conn
+            _criar_tabela_checkpoint(conn)
+            cursor = conn.cursor()
+
+            # Checkpoint: retomar do último id confirmado
+            ultimo_id = 0
+            acumulado = {'processadas': 0, 'alteradas': 0, 'erros': 0}
+            if retomar:
+                cursor.execute("""
+                    SELECT ultimo_id, processadas, alteradas, erros, status
+                    FROM reprocessamento_checkpoint WHERE job_id = ?
+                """, (job_id,))
+                linha = cursor.fetchone()
+                if linha and linha[4] != 'CONCLUIDO':
+                    ultimo_id = linha[0] or 0
+                    acumulado = {'processadas': linha[1] or 0, 'alteradas': linha[2] or 0, 'erros': linha[3] or 0}
+                    print(f"⏩ Retomando job '{job_id}' a partir do id {ultimo_id}")
+
+            cursor.execute("""
+                INSERT OR REPLACE INTO reprocessamento_checkpoint
+                    (job_id, ultimo_id, processadas, alteradas, erros, aplicar, status, atualizado_em)
+                VALUES (?, ?, ?, ?, ?, ?, 'EM_ANDAMENTO', CURRENT_TIMESTAMP)
+            """, (job_id, ultimo_id, acumulado['processadas'], acumulado['alteradas'], acumulado['erros'], aplicar))
+            conn.commit()
+
+            cursor.execute("""
+                SELECT COUNT(*) FROM faturas_brk
+                WHERE id > ? AND content_bytes IS NOT NULL AND content_bytes != ''
+            """, (ultimo_id,))
+            total_pendente = cursor.fetchone()[0]
+
+            # Colunas de confiança (databases antigos abertos via --db podem não ter)
+            cursor.execute("PRAGMA table_info(faturas_brk)")
+            colunas_existentes = {linha[1] for linha in cursor.fetchall()}
+            grava_confianca = {'fontes_extracao', 'confianca_extracao'} <= colunas_existentes
+
+        cdc_vetor = getattr(processador, 'cdc_brk_vetor', []) if processador else []
+        casa_vetor = getattr(processador, 'casa_oracao_vetor', []) if processador else []
+        workers = workers or os.cpu_count() or 2
+
+        print(f"\n🔁 REPROCESSAMENTO FATURAS BRK - job '{job_id}'")
+        print(f"   📊 Pendentes: {total_pendente} faturas com PDF")
+        print(f"   📦 Lote: {tamanho_lote} | 👷 Workers: {workers}")
+        print(f"   🏪 Relacionamento: {len(cdc_vetor)} CDCs")
+        print(f"   ✍️ Modo: {'APLICAR' if aplicar else 'SIMULAÇÃO (sem gravar)'}")
+
+        _atualizar_progresso(job_id=job_id, status='EM_ANDAMENTO', aplicar=aplicar,
+                             total=total_pendente, processadas=0, alteradas=0, erros=0,
+                             faturas_por_segundo=0, iniciado_em=datetime.now().isoformat())
+
+        colunas = ", ".join(CAMPOS_REPROCESSADOS.keys())
+        diferencas_por_campo = {coluna: 0 for coluna in CAMPOS_REPROCESSADOS}
+        processadas = alteradas = erros = 0
+        inicio = time.perf_counter()
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_worker,
+                                 initargs=(cdc_vetor, casa_vetor)) as pool:
+            while True:
+                # Keyset pagination: custo constante por lote, sem OFFSET
+                with lock:
+                    cursor = database.conn.cursor()
+                    cursor.execute(f"""
+                        SELECT id, content_bytes, {colunas} FROM faturas_brk
+                        WHERE id > ? AND content_bytes IS NOT NULL AND content_bytes != ''
+                        ORDER BY id LIMIT ?
+                    """, (ultimo_id, tamanho_lote))
+                    linhas = cursor.fetchall()
+                if not linhas:
+                    break
+
+                registros = {
+                    linha[0]: dict(zip(CAMPOS_REPROCESSADOS.keys(), linha[2:]))
+                    for linha in linhas
+                }
+                itens = [(linha[0], linha[1]) for linha in linhas]
+                del linhas
+
+                atualizacoes = []
+                metadados_lote = []
+                for resultado in pool.map(_reextrair_fatura, itens):
+                    processadas += 1
+                    if resultado['status'] != 'sucesso':
+                        erros += 1
+                        print(f"   ⚠️ ID {resultado['id']}: {resultado.get('mensagem')}")
+                        continue
+
+                    metadados_lote.append((resultado['metadados']['fontes_extracao'],
+                                           resultado['metadados']['confianca_extracao'], resultado['id']))
+                    diferencas = calcular_diferencas(registros[resultado['id']], resultado['campos'])
+                    if diferencas:
+                        alteradas += 1
+                        for coluna in diferencas:
+                            diferencas_por_campo[coluna] += 1
+                        atualizacoes.append((resultado['id'], diferencas))
+
+                ultimo_id = itens[-1][0]
+
+                # Lote inteiro + checkpoint no mesmo commit (retomada consistente).
+                # Com o lock: o rollback não descarta escrita de outra thread
+                with lock:
+                    conn = database.conn
+                    cursor = conn.cursor()
+                    try:
+                        if aplicar:
+                            for id_fatura, diferencas in atualizacoes:
+                                sets = ", ".join(f"{coluna} = ?" for coluna in diferencas)
+                                cursor.execute(
+                                    f"UPDATE faturas_brk SET {sets}, observacao = ? WHERE id = ?",
+                                    (*diferencas.values(),
+                                     f"Reprocessado {datetime.now().strftime('%d/%m/%Y %H:%M')}: {', '.join(diferencas)}",
+                                     id_fatura)
+                                )
+                            # Confiança recalculada sempre (não conta como alteração)
+                            if grava_confianca and metadados_lote:
+                                cursor.executemany(
+                                    "UPDATE faturas_brk SET fontes_extracao = ?, confianca_extracao = ? WHERE id = ?",
+                                    metadados_lote
+                                )
+                        cursor.execute("""
+                            UPDATE reprocessamento_checkpoint
+                            SET ultimo_id = ?, processadas = ?, alteradas = ?, erros = ?, atualizado_em = CURRENT_TIMESTAMP
+                            WHERE job_id = ?
+                        """, (ultimo_id, acumulado['processadas'] + processadas,
+                              acumulado['alteradas'] + alteradas, acumulado['erros'] + erros, job_id))
+                        conn.commit()
+                    except Exception:
+                        conn.rollback()
+                        raise
+
+                decorrido = time.perf_counter() - inicio
+                taxa = processadas / decorrido if decorrido > 0 else 0
+                _atualizar_progresso(processadas=processadas, alteradas=alteradas, erros=erros,
+                                     ultimo_id=ultimo_id, faturas_por_segundo=round(taxa, 2))
+                print(f"   🔄 {processadas}/{total_pendente} | alteradas {alteradas} | "
+                      f"erros {erros} | {taxa:.1f} faturas/s")
+
+        with lock:
+            conn = database.conn
+            conn.execute("""
+                UPDATE reprocessamento_checkpoint SET status = 'CONCLUIDO', atualizado_em = CURRENT_TIMESTAMP
+                WHERE job_id = ?
+            """, (job_id,))
+            conn.commit()
+
+        decorrido = time.perf_counter() - inicio
+        relatorio = {
+            'status': 'sucesso',
+            'job_id': job_id,
+            'aplicar': aplicar,
+            'processadas': processadas,
+            'alteradas': alteradas,
+            'erros': erros,
+            'diferencas_por_campo': {c: n for c, n in diferencas_por_campo.items() if n},
+            'tempo_segundos': round(decorrido, 2),
+            'faturas_por_segundo': round(processadas / decorrido, 2) if decorrido > 0 else 0
+        }
+        _atualizar_progresso(status='CONCLUIDO', **{k: v for k, v in relatorio.items() if k != 'status'})
+
+        print(f"\n✅ REPROCESSAMENTO CONCLUÍDO:")
+        print(f"   📊 Processadas: {processadas} | ✏️ Alteradas: {alteradas} | ❌ Erros: {erros}")
+        print(f"   🧾 Diferenças por campo: {relatorio['diferencas_por_campo']}")
+        print(f"   ⏱️ {relatorio['tempo_segundos']}s ({relatorio['faturas_por_segundo']} faturas/s)")
+
+        return relatorio
+
+    except Exception as e:
+        print(f"❌ Erro no reprocessamento: {e}")
+        _atualizar_progresso(status='ERRO', erro=str(e))
+        return {'status': 'erro', 'mensagem': str(e), 'job_id': job_id}
+
+
+def reprocessar_faturas_processor(email_processor, **opcoes):
+    """
+    Reprocessa usando o DatabaseBRK do EmailProcessor (conexão compartilhada,
+    sempre sob lock_conexao) e sincroniza com OneDrive ao final quando houve
+    alterações aplicadas.
+    """
+    database_brk = getattr(email_processor, 'database_brk', None)
+    if not database_brk or not database_brk.conn:
+        return {'status': 'erro', 'mensagem': 'DatabaseBRK não disponível'}
+
+    relatorio = reprocessar_faturas(database_brk, email_processor, **opcoes)
+
+    if relatorio.get('status') == 'sucesso' and relatorio.get('aplicar') and relatorio.get('alteradas'):
+        relatorio['sincronizado_onedrive'] = database_brk.sincronizar_onedrive()
+
+    return relatorio
+
+
+def iniciar_reprocessamento_background(email_processor, **opcoes):
+    """
+    Dispara o reprocessamento em thread (usado pelo endpoint Flask).
+
+    Returns:
+        dict: status da solicitação (não espera terminar)
+    """
+    progresso = obter_progresso_reprocessamento()
+    if progresso.get('status') == 'EM_ANDAMENTO':
+        return {'status': 'erro', 'mensagem': 'Reprocessamento já em andamento', 'progresso': progresso}
+
+    _atualizar_progresso(status='EM_ANDAMENTO', job_id=opcoes.get('job_id', 'padrao'))
+    thread = threading.Thread(
+        target=reprocessar_faturas_processor,
+        args=(email_processor,),
+        kwargs=opcoes,
+        daemon=True,
+        name="ReprocessamentoBRK"
+    )
+    thread.start()
+
+    return {'status': 'sucesso', 'mensagem': 'Reprocessamento iniciado', 'opcoes': opcoes}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Reprocessar faturas BRK salvas (content_bytes)")
+    parser.add_argument("--db", help="Arquivo SQLite local (sem OneDrive)")
+    parser.add_argument("--aplicar", action="store_true", help="Gravar diferenças (padrão: simulação)")
+    parser.add_argument("--lote", type=int, default=50, help="Faturas por lote")
+    parser.add_argument("--workers", type=int, default=None, help="Processos no pool")
+    parser.add_argument("--job", default="padrao", help="Identificador do checkpoint")
+    parser.add_argument("--do-zero", action="store_true", help="Ignorar checkpoint e recomeçar")
+    args = parser.parse_args()
+
+    opcoes = dict(tamanho_lote=args.lote, workers=args.workers, aplicar=args.aplicar,
+                  retomar=not args.do_zero, job_id=args.job)
+
+    if args.db:
+        from types import SimpleNamespace
+
+        database = SimpleNamespace(conn=sqlite3.connect(args.db), lock_conexao=threading.RLock())
+        resultado = reprocessar_faturas(database, None, **opcoes)
+        database.conn.close()
+    else:
+        from auth.microsoft_auth import MicrosoftAuth
+        from processor.email_processor import EmailProcessor
+
+        auth_manager = MicrosoftAuth()
+        try:
+            from processor.alertas.auth_compartilhado import configurar_auth_alertas
+            configurar_auth_alertas(auth_manager)
+        except ImportError:
+            pass  # Alertas opcionais
+
+        resultado = reprocessar_faturas_processor(EmailProcessor(auth_manager), **opcoes)
+
+    sys.exit(0 if resultado.get('status') == 'sucesso' else 1)